@@ -0,0 +1,129 @@
+import random
+
+# Modelos de título no estilo da listagem Magalu, cobrindo os ramos da hierarquia
+# de regras (hardware, acessórios, bundles, chips, falsos positivos de specs) e
+# títulos que nenhuma regra resolve (fallback de IA).
+MODELOS_TITULO = (
+    "Smartphone {marca} {modelo} {armazenamento}GB {cor} {rede} {ram}GB RAM {tela}\" Câm Tripla até {camera}MP + Selfie {selfie}MP Bateria {bateria}mAh",
+    "Celular {marca} {modelo} {armazenamento}GB {cor} Dual Chip {ram}GB+{ram}GB RAM",
+    "iPhone {iphone} Apple {armazenamento}GB {cor} Tela {tela}\" Câm {camera}MP",
+    "Capa Capinha Anti Impacto Para iPhone {iphone} Transparente",
+    "Película de Vidro 3D Para {marca} {modelo}",
+    "Kit Capa + Película Para {marca} {modelo}",
+    "Smartwatch {marca} Watch {modelo} {cor} + Pulseira Extra",
+    "Relógio Smartwatch HW5 Pro Max + Fone Bluetooth + {pulseiras} Pulseiras",
+    "Smartband Mi Band {modelo} {cor}",
+    "Carregador Turbo USB-C {potencia}W {marca} Original",
+    "Cabo USB-C Para Lightning {tamanho}m Reforçado",
+    "Fone de Ouvido Bluetooth {marca} {modelo} Sem Fio",
+    "Chip Pré-Pago {operadora} {rede} Triplo Corte",
+    "Suporte Veicular Celular Magnético Para Painel",
+    "Suporte Garra Celular P/ Motos Universal Com Carregador Usb",
+    "Gamepad Controle Joystick Para Celular Bluetooth",
+    "Óculos VR Realidade Virtual 3D Para Celular",
+    "Cola B7000 Adesivo Para Reparo de Tela {tamanho}ml",
+    "Power Bank {bateria}mAh {marca} Carregamento Rápido",
+    "Tela Touch Display Frontal {marca} {modelo}",
+    "Caneta Touch Universal Para Tablet e Celular",
+    "Tablet {marca} Tab {modelo} {armazenamento}GB Wi-Fi {tela}\"",
+)
+
+VALORES = {
+    "marca": ("Samsung", "Motorola", "Xiaomi", "Realme", "Positivo", "LG", "Multilaser", "JBL", "Baseus"),
+    "modelo": ("Galaxy A16", "Moto G24", "Redmi 13C", "Note 50", "A55", "Edge 50", "S10", "X6", "Pro 3"),
+    "armazenamento": ("32", "64", "128", "256", "512"),
+    "cor": ("Preto", "Azul", "Verde Claro", "Grafite", "Branco", "Rosa"),
+    "rede": ("4G", "5G"),
+    "ram": ("2", "4", "6", "8", "12"),
+    "tela": ("6,1", "6,5", "6,7", "6,8", "10,1"),
+    "camera": ("13", "50", "64", "108", "200"),
+    "selfie": ("5", "8", "13", "32"),
+    "bateria": ("4000", "5000", "6000", "10000", "20000"),
+    "iphone": ("11", "12", "13", "14", "15", "15 Pro Max", "16"),
+    "pulseiras": ("3", "5", "7"),
+    "potencia": ("15", "20", "25", "45", "65"),
+    "tamanho": ("1", "2", "15", "50"),
+    "operadora": ("Vivo", "Claro", "TIM"),
+}
+
+
+def _reais(valor):
+    inteiro, centavos = f"{valor:.2f}".split(".")
+    return f"R$\xa0{int(inteiro):,}".replace(",", ".") + f",{centavos}"
+
+
+def gerar_titulos(quantidade, semente=42):
+    """
+    Títulos sintéticos realistas, determinísticos para a mesma `semente`.
+
+    Args:
+        quantidade (int): Quantidade de títulos.
+        semente (int): Semente do gerador.
+    Returns:
+        list[str]: Títulos (com repetições, como em uma coleta real).
+    """
+
+    rng = random.Random(semente)
+    titulos = []
+    for _ in range(quantidade):
+        modelo = rng.choice(MODELOS_TITULO)
+        titulos.append(modelo.format(**{chave: rng.choice(opcoes) for chave, opcoes in VALORES.items()}))
+    return titulos
+
+
+def gerar_precos(quantidade, semente=42):
+    """
+    Textos de preço no formato da página (`price-original`, `price-value`, `installment`).
+
+    Args:
+        quantidade (int): Quantidade de produtos.
+        semente (int): Semente do gerador.
+    Returns:
+        list[tuple[str, str, str]]: (preço original, preço Pix, parcelamento) por produto.
+    """
+
+    rng = random.Random(semente)
+    precos = []
+    for _ in range(quantidade):
+        original = round(rng.uniform(9.9, 8999.0), 2)
+        pix = round(original * rng.uniform(0.7, 1.0), 2)
+        parcelas = rng.choice((1, 2, 3, 5, 6, 10, 12))
+        precos.append((
+            _reais(original),
+            f"ou {_reais(pix)} no Pix",
+            f"{parcelas}x de {_reais(original / parcelas)} sem juros"
+        ))
+    return precos
+
+
+def gerar_listagem(quantidade_cards, semente=42):
+    """
+    HTML de uma página de listagem com `quantidade_cards` cards e o peso típico de
+    uma página real (scripts e menus que não interessam ao parser).
+
+    Args:
+        quantidade_cards (int): Cards na página.
+        semente (int): Semente do gerador.
+    Returns:
+        str: HTML da página.
+    """
+
+    titulos = gerar_titulos(quantidade_cards, semente)
+    precos = gerar_precos(quantidade_cards, semente)
+    cards = []
+    for i, (titulo, (original, pix, parcelamento)) in enumerate(zip(titulos, precos)):
+        cards.append(
+            f'<li><a data-testid="product-card-container" href="/magazineoficialweblu/produto-{i}/p/{238000000 + i}/te/x/?seller_id=magazineluiza">'
+            f'<img src="https://a-static.mlcdn.com.br/280x210/produto-{i}.jpg" alt="">'
+            f'<h2 data-testid="product-title">{titulo}</h2>'
+            f'<div data-testid="product-price"><p data-testid="price-original">{original}</p>'
+            f'<p data-testid="price-value">{pix}</p><p data-testid="installment">{parcelamento}</p></div>'
+            '</a></li>'
+        )
+    estado_app = "window.__APP_STATE__ = {" + ",".join(f'"k{i}": {i}' for i in range(5000)) + "};"
+    menu = "".join(f'<li><a href="/categoria-{i}/">Categoria {i}</a></li>' for i in range(400))
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>Celulares</title>'
+        f'<script>{estado_app}</script></head><body><header><nav><ul>{menu}</ul></nav></header>'
+        f'<main><ul data-testid="product-list">{"".join(cards)}</ul></main></body></html>'
+    )
@@ -0,0 +1,219 @@
+"""
+Micro-benchmarks dos caminhos quentes de parsing e classificação.
+
+Uso:
+    python -m benchmarks.executar                     # roda e compara com a baseline
+    python -m benchmarks.executar --salvar-baseline   # grava a baseline desta máquina
+    python -m benchmarks.executar --estrito           # código de saída 1 se houver regressão
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import gerar_listagem, gerar_precos, gerar_titulos
+from src.parsers import (
+    calcular_preco_total_parcelado, categorizar_por_regras, detectar_bundle, extrair_cards,
+    limpar_valor_simples_para_float, montar_objeto_produto
+)
+
+CAMINHO_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CONTEXTO = {
+    "timestamp": "2026-01-01 09:00:00", "ambiente": "bench", "versao_pipeline": "bench",
+    "tipo_coleta": "benchmark", "url_produto": "https://www.magazinevoce.com.br/p/1/",
+    "canal_venda": "VENDA_DIRETA", "loja": "Magazine Luiza", "pagina": 1
+}
+
+
+def medir(funcao, quantidade, repeticoes, preparar=None):
+    """
+    Mede uma função que processa `quantidade` itens por chamada.
+
+    Args:
+        funcao (Callable[[], object]): Processa o corpus inteiro uma vez.
+        quantidade (int): Itens processados por chamada (para itens/s).
+        repeticoes (int): Quantas vezes medir (vale a melhor, a menos afetada por ruído da máquina).
+        preparar (Callable[[], None], optional): Executado antes de cada medição
+            (ex.: limpar caches para não medir só acertos).
+    Returns:
+        dict: `itens_por_s`, `us_por_item`, `pico_kib` e `kib_por_item` (alocação
+            de pico medida com tracemalloc em uma execução separada).
+    """
+
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    melhor = min(tempos)
+    return {
+        "itens_por_s": round(quantidade / melhor, 1),
+        "us_por_item": round(melhor / quantidade * 1e6, 3),
+        "pico_kib": round(pico / 1024, 1),
+        "kib_por_item": round(pico / 1024 / quantidade, 4)
+    }
+
+
+def consumir(iteravel):
+    """Percorre os resultados sem guardá-los (a medição não inclui o crescimento da lista)."""
+    for _ in iteravel:
+        pass
+
+
+def montar_cenarios(quantidade, cards_por_pagina=60):
+    """Cenários do suite: nome -> (função, itens por chamada, preparar)."""
+    titulos = gerar_titulos(quantidade)
+    precos = gerar_precos(quantidade)
+    originais = [p[0] for p in precos]
+    parcelamentos = [p[2] for p in precos]
+    itens = [
+        ({"id_produto": str(i), "titulo": titulo, "preco_antigo": 1299.0, "preco_pix": 1139.05,
+          "preco_atual": 1199.0, "parcelamento_original": parcelamento}, CONTEXTO)
+        for i, (titulo, parcelamento) in enumerate(zip(titulos, parcelamentos))
+    ]
+    paginas = max(1, quantidade // (cards_por_pagina * 10))
+    listagem = gerar_listagem(cards_por_pagina)
+
+    return {
+        "montar_objeto_produto": (
+            lambda: consumir(montar_objeto_produto(dados, contexto) for dados, contexto in itens),
+            quantidade, categorizar_por_regras.cache_clear
+        ),
+        "detectar_bundle": (lambda: consumir(map(detectar_bundle, titulos)), quantidade, None),
+        "limpar_valor_simples_para_float": (lambda: consumir(map(limpar_valor_simples_para_float, originais)), quantidade, None),
+        "calcular_preco_total_parcelado": (lambda: consumir(map(calcular_preco_total_parcelado, parcelamentos)), quantidade, None),
+        "extrair_cards": (lambda: consumir(extrair_cards(listagem) for _ in range(paginas)), paginas * cards_por_pagina, None),
+    }
+
+
+def cenarios_classificador(quantidade, batch_size=16):
+    """
+    `ProductClassifier.classificar` um a um versus `classificar_lote`, nos títulos
+    que as regras não resolvem. Requer transformers/torch; sem eles (ou com
+    `quantidade` <= 0), retorna vazio.
+    """
+    if quantidade <= 0:
+        return {}
+    try:
+        import transformers  # noqa: F401
+    except ImportError:
+        logging.warning("⏭️ transformers não instalado: benchmarks do classificador pulados.")
+        return {}
+
+    from src.models.classifier import obter_classificador
+
+    classificador = obter_classificador()
+    pendentes = [t for t in dict.fromkeys(gerar_titulos(quantidade * 20)) if categorizar_por_regras(t.lower()) is None]
+    pendentes = pendentes[:quantidade]
+    if not pendentes:
+        return {}
+    classificador.classificar(pendentes[0])  # carrega o modelo fora da medição
+
+    return {
+        "classificador_unitario": (lambda: consumir(map(classificador.classificar, pendentes)), len(pendentes), None),
+        "classificador_lote": (lambda: classificador.classificar_lote(pendentes, batch_size=batch_size), len(pendentes), None),
+    }
+
+
+def comparar(resultados, baseline, tolerancia):
+    """
+    Compara itens/s com a baseline.
+
+    Returns:
+        list[str]: Nomes dos cenários mais lentos que `baseline * (1 - tolerancia)`.
+    """
+
+    regressoes = []
+    for nome, atual in resultados.items():
+        referencia = baseline.get(nome)
+        if not referencia:
+            atual["vs_baseline"] = None
+            continue
+        razao = atual["itens_por_s"] / referencia["itens_por_s"]
+        atual["vs_baseline"] = round(razao, 3)
+        if razao < 1 - tolerancia:
+            regressoes.append(nome)
+    return regressoes
+
+
+def imprimir(resultados, regressoes):
+    print(f"{'cenário':34} {'itens/s':>12} {'µs/item':>10} {'pico KiB':>10} {'vs base':>8}")
+    for nome, r in resultados.items():
+        razao = f"{r['vs_baseline']:.2f}x" if r.get("vs_baseline") else "-"
+        marca = "  ⚠️ regressão" if nome in regressoes else ""
+        print(f"{nome:34} {r['itens_por_s']:>12,.0f} {r['us_por_item']:>10.2f} {r['pico_kib']:>10.1f} {razao:>8}{marca}")
+
+
+def executar(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de parsers e classificador.")
+    parser.add_argument("--quantidade", type=int, default=20_000, help="títulos/preços do corpus sintético")
+    parser.add_argument("--repeticoes", type=int, default=7, help="medições por cenário (vale a melhor)")
+    parser.add_argument("--titulos-ia", type=int, default=64, help="títulos usados nos cenários do classificador (0 pula)")
+    parser.add_argument("--sem-classificador", action="store_true",
+                        help="pula os cenários do classificador (não carrega o modelo)")
+    parser.add_argument("--baseline", default=CAMINHO_BASELINE, help="arquivo da baseline")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="queda de itens/s tolerada (0.25 = 25%%)")
+    parser.add_argument("--estrito", action="store_true", help="sai com código 1 se houver regressão")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    argumentos = parser.parse_args(argv)
+
+    # Os logs por página/lote mediriam o logging, não o parser
+    logging.disable(logging.INFO)
+    try:
+        cenarios = montar_cenarios(argumentos.quantidade)
+        if not argumentos.sem_classificador:
+            cenarios.update(cenarios_classificador(argumentos.titulos_ia))
+        resultados = {nome: medir(funcao, quantidade, argumentos.repeticoes, preparar)
+                      for nome, (funcao, quantidade, preparar) in cenarios.items()}
+    finally:
+        logging.disable(logging.NOTSET)
+
+    baseline = {}
+    if os.path.exists(argumentos.baseline):
+        with open(argumentos.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("resultados", {})
+    regressoes = comparar(resultados, baseline, argumentos.tolerancia)
+    imprimir(resultados, regressoes)
+
+    relatorio = {
+        "maquina": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "parametros": {"quantidade": argumentos.quantidade, "repeticoes": argumentos.repeticoes},
+        "resultados": resultados
+    }
+    if argumentos.saida:
+        with open(argumentos.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=4)
+    if argumentos.salvar_baseline:
+        for r in relatorio["resultados"].values():
+            r.pop("vs_baseline", None)
+        with open(argumentos.baseline, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=4)
+        print(f"📌 Baseline gravada em {argumentos.baseline}")
+
+    if regressoes:
+        print(f"⚠️ Regressão (> {argumentos.tolerancia:.0%} mais lento que a baseline): {', '.join(regressoes)}")
+        if argumentos.estrito:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(executar())
@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 from datetime import datetime
@@ -5,6 +6,13 @@ from dotenv import load_dotenv
 
 # Importações internas
 from src.scraper import MagaluScraper
+from src.agendador import AgendadorColeta, ler_plano
+from src.arquivo_html import reprocessar_arquivo
+from src.checkpoint import Checkpoint
+from src.historico import HistoricoPrecos
+from src.metricas import ARQUIVO_PROMETHEUS, metricas
+from src.models.cascata import CAMINHO_CASCATA, LIMIAR_CASCATA
+from src.saida import EscritorParquet
 from src.utils import configurar_logs
 
 # 1. Carrega as configurações do ambiente (.env)
@@ -12,31 +20,193 @@ load_dotenv()
 
 ENV = os.getenv("ENVIRONMENT", "dev")
 VERSION = os.getenv("PIPELINE_VERSION", "v1.0")
+FETCH_MODE = os.getenv("FETCH_MODE", "selenium")
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+REQUESTS_PER_SECOND = float(os.getenv("REQUESTS_PER_SECOND", "0.5"))
+CARDS_TIMEOUT = float(os.getenv("CARDS_TIMEOUT", "15"))
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "jsonl")
+PRICE_HISTORY = os.getenv("PRICE_HISTORY", "true").lower() in ("1", "true", "sim")
+ARCHIVE_HTML = os.getenv("ARCHIVE_HTML", "false").lower() in ("1", "true", "sim")
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE", ARQUIVO_PROMETHEUS)
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "pytorch")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0")) or None
+CASCADE_MODEL = os.getenv("CASCADE_MODEL", CAMINHO_CASCATA)
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", str(LIMIAR_CASCATA)))
+DEDUP = os.getenv("DEDUP", "true").lower() in ("1", "true", "sim")
+DEDUP_ACROSS_RUNS = os.getenv("DEDUP_ACROSS_RUNS", "false").lower() in ("1", "true", "sim")
+LEAN_BROWSER = os.getenv("LEAN_BROWSER", "true").lower() in ("1", "true", "sim")
+# Curingas separados por vírgula; vazio usa a lista padrão de src.fetchers
+BLOCKED_URL_PATTERNS = [p.strip() for p in os.getenv("BLOCKED_URL_PATTERNS", "").split(",") if p.strip()] or None
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_DEBUG_SAMPLE = int(os.getenv("LOG_DEBUG_SAMPLE", "100"))
 
-def salvar_dados(dados):
+def salvar_dados(lotes, checkpoint=None):
 
     """
-    Persiste os dados coletados em formato JSON na camada local de dados brutos (raw).
+    Persiste os produtos em JSON Lines na camada local de dados brutos (raw), à
+    medida que a coleta avança.
     
-    Cria automaticamente o diretório de destino e versiona o arquivo utilizando 
-    um timestamp para evitar sobrescrita e garantir o histórico da coleta.
+    Cada lote (uma página) é anexado como uma linha JSON compacta por produto e
+    descarregado em disco logo em seguida, então a memória não cresce com o
+    catálogo e uma queda no meio da coleta preserva as páginas já gravadas no
+    arquivo `.parcial`. Só ao final o arquivo é renomeado (de forma atômica) para
+    o nome versionado por timestamp.
+
+    Com um `checkpoint`, cada página descarregada é registrada junto com o tamanho
+    do arquivo. Se o checkpoint veio de uma coleta interrompida, o mesmo `.parcial`
+    é reaberto, cortado no último ponto registrado (descarta uma página gravada
+    pela metade) e a escrita continua dali.
 
     Args:
-        dados (list[dict]): Lista de produtos estruturados para salvar.
+        lotes (Iterable[tuple[int, list[dict]]]): Páginas e seus produtos, como
+            entregues por `MagaluScraper.coletar_produtos_stream`.
+        checkpoint (Checkpoint, optional): Ponto de retomada da coleta.
+    Returns:
+        tuple[str | None, int]: Caminho do arquivo salvo (None se nada foi coletado)
+            e quantidade de produtos gravados.
     """
 
     if not os.path.exists('data/raw'):
         os.makedirs('data/raw')
     
-    timestamp_nome = datetime.now().strftime("%Y%m%d_%H%M%S")
-    caminho = f'data/raw/produtos_magalu_{timestamp_nome}.json'
-    
-    with open(caminho, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=4)
+    retomada = checkpoint.dados if checkpoint else None
+    if retomada:
+        caminho_parcial = retomada["destino"]
+        caminho = caminho_parcial[:-len('.parcial')]
+        os.truncate(caminho_parcial, retomada["bytes"])
+        total = retomada["total"]
+    else:
+        timestamp_nome = datetime.now().strftime("%Y%m%d_%H%M%S")
+        caminho = f'data/raw/produtos_magalu_{timestamp_nome}.jsonl'
+        caminho_parcial = caminho + '.parcial'
+        open(caminho_parcial, 'wb').close()
+        total = 0
+        if checkpoint:
+            checkpoint.iniciar(caminho_parcial, bytes=0)
     
-    print(f"\n💾 Arquivo versionado salvo em: {caminho}")
+    with open(caminho_parcial, 'ab') as f:
+        for pagina, produtos in lotes:
+            with metricas.cronometrar("gravacao"):
+                for produto in produtos:
+                    f.write(json.dumps(produto, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                    f.write(b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            total += len(produtos)
+            if checkpoint and pagina is not None:
+                checkpoint.registrar(pagina, bytes=f.tell(), total=total)
+
+    if not total:
+        os.remove(caminho_parcial)
+    else:
+        os.replace(caminho_parcial, caminho)
+    if checkpoint:
+        checkpoint.concluir(destino=caminho, total=total)
+
+    if not total:
+        return None, 0
+    print(f"\n💾 Arquivo versionado salvo em: {caminho} ({total} produtos)")
+    return caminho, total
+
+def salvar_parquet(lotes, caminho=None, checkpoint=None):
+
+    """
+    Persiste os produtos como Parquet (camada Bronze), achatados em um schema
+    tipado e particionados por `data_coleta`/`categoria`.
+
+    Com um `checkpoint`, a última página é registrada sempre que o escritor
+    descarrega suas linhas em disco; numa retomada, os novos arquivos continuam a
+    numeração da execução interrompida em vez de sobrescrevê-los.
+
+    Args:
+        lotes (Iterable[tuple[int, list[dict]]]): Páginas e seus produtos, como
+            entregues por `MagaluScraper.coletar_produtos_stream`.
+        caminho (str, optional): Raiz do dataset; `src.saida.CAMINHO_PARQUET` por padrão.
+        checkpoint (Checkpoint, optional): Ponto de retomada da coleta.
+    Returns:
+        tuple[str | None, int]: Raiz do dataset (None se nada foi coletado) e
+            quantidade de produtos gravados.
+    """
+
+    retomada = checkpoint.dados if checkpoint else None
+    if retomada:
+        escritor = EscritorParquet(retomada["destino"], id_execucao=retomada["id_execucao"],
+                                   primeira_escrita=retomada["escritas"])
+    else:
+        escritor = EscritorParquet(caminho) if caminho else EscritorParquet()
+    total_anterior = retomada["total"] if retomada else 0
+    if checkpoint and not retomada:
+        os.makedirs(escritor.caminho, exist_ok=True)
+        checkpoint.iniciar(escritor.caminho, id_execucao=escritor.id_execucao, escritas=0)
+
+    ultima_pagina = None
+    try:
+        for pagina, produtos in lotes:
+            escritas = escritor.escritas
+            with metricas.cronometrar("gravacao"):
+                escritor.adicionar(produtos)
+            if pagina is not None:
+                ultima_pagina = pagina
+            if checkpoint and escritor.escritas != escritas and ultima_pagina is not None:
+                checkpoint.registrar(ultima_pagina, escritas=escritor.escritas, total=total_anterior + escritor.total)
+    finally:
+        # Mesmo em caso de queda, as páginas já coletadas vão para o dataset
+        escritas = escritor.escritas
+        escritor.fechar()
+        if checkpoint and escritor.escritas != escritas and ultima_pagina is not None:
+            checkpoint.registrar(ultima_pagina, escritas=escritor.escritas, total=total_anterior + escritor.total)
+
+    total = total_anterior + escritor.total
+    if checkpoint:
+        checkpoint.concluir(total=total)
+    if not total:
+        return None, 0
+
+    print(f"\n💾 Dataset Parquet atualizado em: {escritor.caminho} ({total} produtos)")
+    return escritor.caminho, total
 
-def executar():
+def registrar_historico(lotes, historico):
+
+    """
+    Repassa as páginas adiante gravando, no caminho, cada uma no histórico de preços.
+
+    Args:
+        lotes (Iterable[tuple[int, list[dict]]]): Páginas e seus produtos.
+        historico (HistoricoPrecos): Histórico que recebe as observações.
+    Yields:
+        tuple[int, list[dict]]: As mesmas páginas, inalteradas.
+    """
+
+    for pagina, produtos in lotes:
+        historico.ingerir(produtos)
+        yield pagina, produtos
+
+def ler_argumentos(argv=None):
+    """Lê as opções de linha de comando da coleta."""
+    parser = argparse.ArgumentParser(description="Coleta de preços da listagem Magalu.")
+    parser.add_argument("--delta", action="store_true",
+                        help="emite só produtos novos, alterados e desaparecidos desde a última coleta")
+    parser.add_argument("--max-paginas", type=int, default=None,
+                        help="limite de páginas da coleta (padrão: catálogo inteiro)")
+    parser.add_argument("--reprocessar", metavar="PASTA",
+                        help="reconstrói os produtos do HTML arquivado em PASTA (data/html/<execução>), sem navegador")
+    parser.add_argument("--trabalhadores", type=int, default=None,
+                        help="processos usados no --reprocessar (padrão: núcleos da máquina)")
+    parser.add_argument("--plano", metavar="ARQUIVO",
+                        help="coleta os alvos de um plano YAML/TOML (ex.: plano_coleta.yaml) em um único processo")
+    return parser.parse_args(argv)
+
+def salvar(lotes, checkpoint=None):
+
+    """Grava os lotes no formato configurado em `OUTPUT_FORMAT`."""
+
+    if OUTPUT_FORMAT == "parquet":
+        return salvar_parquet(lotes, checkpoint=checkpoint)
+    if OUTPUT_FORMAT == "jsonl":
+        return salvar_dados(lotes, checkpoint=checkpoint)
+    raise ValueError(f"Formato de saída desconhecido: {OUTPUT_FORMAT}")
+
+def executar(argv=None):
 
     """
     Orquestra o fluxo principal (workflow) da aplicação.
@@ -44,23 +214,94 @@ def executar():
     Responsável por inicializar as configurações de log, instanciar o motor de 
     scraping com as variáveis de ambiente corretas, disparar o processo de 
     coleta e garantir a persistência dos dados finais.
+
+    Args:
+        argv (list[str], optional): Argumentos de linha de comando (padrão: sys.argv).
     """
 
-    configurar_logs()
+    argumentos = ler_argumentos(argv)
+    configurar_logs(nivel=LOG_LEVEL, amostragem_debug=LOG_DEBUG_SAMPLE)
+    metricas.reiniciar()
+    try:
+        _executar(argumentos)
+    finally:
+        # Também em coletas que caíram: o resumo mostra até onde cada estágio chegou
+        metricas.gravar(caminho_prometheus=PROMETHEUS_TEXTFILE or None)
+
+def _gravar(lotes, checkpoint=None):
+    """Grava os lotes no formato configurado, passando antes pelo histórico de preços (se ativo)."""
+    historico = HistoricoPrecos() if PRICE_HISTORY else None
+    if historico:
+        lotes = registrar_historico(lotes, historico)
+    try:
+        caminho, _ = salvar(lotes, checkpoint=checkpoint)
+    finally:
+        if historico:
+            historico.fechar()
+    return caminho
+
+def _executar(argumentos):
+    if argumentos.reprocessar:
+        print(f"♻️ Reprocessando HTML arquivado em {argumentos.reprocessar}")
+        lotes = reprocessar_arquivo(argumentos.reprocessar, trabalhadores=argumentos.trabalhadores,
+                                    ambiente=ENV, versao=VERSION, backend_ia=CLASSIFIER_BACKEND,
+                                    threads_ia=ONNX_THREADS, caminho_cascata=CASCADE_MODEL or None,
+                                    limiar_cascata=CASCADE_THRESHOLD, deduplicar=DEDUP)
+        caminho, _ = salvar(lotes)
+        if caminho is None:
+            print("⚠ Nenhum produto no arquivo.")
+        return
+
+    if argumentos.plano:
+        if argumentos.delta:
+            raise SystemExit("O modo --delta não é suportado com --plano.")
+        plano = ler_plano(argumentos.plano)
+        print(f"🗺️ Executando o plano {argumentos.plano} ({len(plano['alvos'])} alvos) | Ambiente: {ENV} | Versão: {VERSION}")
+        agendador = AgendadorColeta(plano, ambiente=ENV, versao=VERSION, modo_fetch=FETCH_MODE, timeout_cards=CARDS_TIMEOUT,
+                                    backend_ia=CLASSIFIER_BACKEND, threads_ia=ONNX_THREADS,
+                                    caminho_cascata=CASCADE_MODEL or None, limiar_cascata=CASCADE_THRESHOLD,
+                                    deduplicar=DEDUP, dedup_entre_execucoes=DEDUP_ACROSS_RUNS,
+                                    navegador_enxuto=LEAN_BROWSER, padroes_bloqueados=BLOCKED_URL_PATTERNS)
+        caminho = _gravar(agendador.coletar_stream())
+        if caminho is None:
+            print("⚠ Nenhum dado foi coletado.")
+        return
     
     print(f"🚀 Iniciando extração | Ambiente: {ENV} | Versão: {VERSION}")
     
     # 2. É passada as variáveis para o bot (scraper) corretamente
-    bot = MagaluScraper(ambiente=ENV, versao=VERSION)
+    bot = MagaluScraper(ambiente=ENV, versao=VERSION, modo_fetch=FETCH_MODE, concorrencia=FETCH_CONCURRENCY,
+                        taxa_requisicoes=REQUESTS_PER_SECOND, timeout_cards=CARDS_TIMEOUT, delta=argumentos.delta,
+                        arquivar_html=ARCHIVE_HTML, backend_ia=CLASSIFIER_BACKEND, threads_ia=ONNX_THREADS,
+                        caminho_cascata=CASCADE_MODEL or None, limiar_cascata=CASCADE_THRESHOLD, deduplicar=DEDUP,
+                        # O delta precisa ver todos os produtos para detectar os removidos
+                        dedup_entre_execucoes=DEDUP_ACROSS_RUNS and not argumentos.delta,
+                        navegador_enxuto=LEAN_BROWSER, padroes_bloqueados=BLOCKED_URL_PATTERNS)
     
-    # 3. Executa a coleta
-    resultados = bot.coletar_produtos()
+    # 3. Retoma a coleta anterior se ela não terminou. O modo delta não é retomado:
+    # o índice da coleta interrompida foi descartado e ela recomeça do zero.
+    # Os produtos já gravados vão junto no checkpoint: na retomada, não saem de novo.
+    checkpoint = None
+    pagina_inicial = 1
+    vistos_retomada = None
+    if not argumentos.delta:
+        checkpoint = Checkpoint({
+            "formato": OUTPUT_FORMAT, "modo_fetch": FETCH_MODE, "url_listagem": bot.url_listagem,
+            "max_paginas": argumentos.max_paginas, "ambiente": ENV, "versao": VERSION
+        }, complemento=lambda pagina: {"vistos": bot.vistos_ate(pagina)})
+        retomada = checkpoint.carregar()
+        if retomada:
+            pagina_inicial = retomada["ultima_pagina"] + 1
+            vistos_retomada = retomada.get("vistos")
+            print(f"🔄 Retomando coleta iniciada em {retomada['iniciado_em']} a partir da página {pagina_inicial}.")
+
+    # 4. Executa a coleta e salva cada página assim que ela fica pronta
+    lotes = bot.coletar_produtos_stream(max_paginas=argumentos.max_paginas, pagina_inicial=pagina_inicial,
+                                        vistos_retomada=vistos_retomada)
+    caminho = _gravar(lotes, checkpoint=checkpoint)
     
-    # 4. Salva o resultado final
-    if resultados:
-        salvar_dados(resultados)
-    else:
-        print("⚠ Nenhum dado foi coletado.")
+    if caminho is None:
+        print("⚠ Nenhuma alteração desde a última coleta." if argumentos.delta else "⚠ Nenhum dado foi coletado.")
 
 if __name__ == "__main__":
     executar()
\ No newline at end of file
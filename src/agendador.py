@@ -0,0 +1,245 @@
+"""
+Plano de coleta com vários alvos (departamentos ou lojas) em um único processo.
+
+O plano vem de um arquivo YAML ou TOML:
+
+    concorrencia: 8                 # páginas em voo ao mesmo tempo, somando todos os alvos
+    requisicoes_por_segundo_por_host: 0.5
+    alvos:
+      - nome: celulares
+        url: https://www.magazinevoce.com.br/magazineoficialweblu/celulares-e-smartphones/l/te/?page={pagina}
+        max_paginas: 20
+        prioridade: 2               # recebe o dobro de páginas por rodada de um alvo com prioridade 1
+
+O `AgendadorColeta` intercala as páginas dos alvos sob o teto global de
+concorrência, com um fetcher (e um limitador de taxa) por host, e passa tudo
+pelo mesmo pipeline em estágios e pelo mesmo classificador do processo.
+"""
+import logging
+import os
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from src.deduplicacao import CAMINHO_VISTOS
+from src.fetchers import pagina_tem_cards
+from src.metricas import metricas
+from src.pipeline import ErroEstagio, PipelineEstagios
+from src.scraper import MagaluScraper
+from src.utils import obter_timestamp
+
+PLANO_PADRAO = "plano_coleta.yaml"
+
+
+def ler_plano(caminho=PLANO_PADRAO):
+    """
+    Lê e valida o plano de coleta.
+
+    Args:
+        caminho (str): Arquivo `.yaml`/`.yml` ou `.toml`.
+    Returns:
+        dict: `concorrencia`, `requisicoes_por_segundo_por_host` e `alvos` (cada um
+            com `nome`, `url`, `max_paginas` e `prioridade`).
+    Raises:
+        ValueError: Plano sem alvos, alvo sem nome/URL, nomes repetidos, URL sem
+            `{pagina}` ou prioridade menor que 1.
+    """
+
+    if caminho.endswith(".toml"):
+        with open(caminho, "rb") as f:
+            bruto = tomllib.load(f)
+    else:
+        import yaml
+
+        with open(caminho, encoding="utf-8") as f:
+            bruto = yaml.safe_load(f) or {}
+
+    alvos = []
+    for alvo in bruto.get("alvos") or []:
+        nome, url = alvo.get("nome"), alvo.get("url")
+        if not nome or not url:
+            raise ValueError(f"Alvo sem nome ou URL no plano {caminho}: {alvo}")
+        if "{pagina}" not in url:
+            raise ValueError(f"A URL do alvo '{nome}' precisa de {{pagina}}: {url}")
+        prioridade = int(alvo.get("prioridade", 1))
+        if prioridade < 1:
+            raise ValueError(f"A prioridade do alvo '{nome}' deve ser >= 1.")
+        alvos.append({"nome": str(nome), "url": url, "max_paginas": alvo.get("max_paginas"), "prioridade": prioridade})
+
+    if not alvos:
+        raise ValueError(f"O plano {caminho} não tem nenhum alvo.")
+    nomes = [alvo["nome"] for alvo in alvos]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError(f"Nomes de alvo repetidos no plano {caminho}.")
+
+    return {
+        "concorrencia": int(bruto.get("concorrencia", 8)),
+        "requisicoes_por_segundo_por_host": float(bruto.get("requisicoes_por_segundo_por_host", 0.5)),
+        "alvos": alvos
+    }
+
+
+class AgendadorColeta:
+    """
+    Coleta vários alvos de um plano intercalando as suas páginas.
+
+    A cada rodada entram até `concorrencia` páginas, distribuídas entre os alvos
+    ainda ativos em proporção à `prioridade`; as páginas de cada host são buscadas
+    juntas pelo fetcher daquele host, cujo limitador é o orçamento de requisições
+    do host. O fetcher de cada host dura o plano inteiro: no modo "pool", os
+    navegadores abertos na primeira rodada são reaproveitados nas seguintes e
+    buscam as páginas do host em paralelo. Um alvo sai da rodada quando chega ao `max_paginas` ou a uma página
+    sem cards. Extração e classificação rodam no mesmo `PipelineEstagios` da
+    coleta simples, com o classificador compartilhado do processo.
+
+    Cada alvo tem o seu `MagaluScraper` (barato: nada é carregado na construção),
+    que guarda a URL e a deduplicação do alvo. Os produtos saem marcados com
+    `origem.alvo`.
+    """
+
+    def __init__(self, plano, **parametros_scraper):
+        """
+        Args:
+            plano (dict): Saída de `ler_plano`.
+            **parametros_scraper: Repassados ao `MagaluScraper` de cada alvo (ex.:
+                `modo_fetch`, `ambiente`, `backend_ia`). Concorrência e taxa vêm do plano.
+        """
+        if parametros_scraper.get("delta"):
+            raise ValueError("O modo delta não é suportado no plano de coleta.")
+        self.plano = plano
+        self.concorrencia = max(1, plano["concorrencia"])
+        self.alvos = sorted(plano["alvos"], key=lambda alvo: -alvo["prioridade"])
+
+        self.scrapers = {}
+        for alvo in self.alvos:
+            parametros = dict(parametros_scraper)
+            if parametros.get("dedup_entre_execucoes"):
+                # Uma memória de vistos por alvo: um mesmo produto pode estar em dois departamentos
+                pasta, arquivo = os.path.split(parametros.get("caminho_vistos") or CAMINHO_VISTOS)
+                parametros["caminho_vistos"] = os.path.join(pasta, f"{alvo['nome']}_{arquivo}")
+            self.scrapers[alvo["nome"]] = MagaluScraper(
+                url_listagem=alvo["url"], concorrencia=self.concorrencia,
+                taxa_requisicoes=plano["requisicoes_por_segundo_por_host"], **parametros
+            )
+
+    @staticmethod
+    def host(url):
+        return urlparse(url).netloc
+
+    def _rodadas(self):
+        """
+        Páginas de cada rodada: ciclo ponderado pela prioridade, sem passar de
+        `concorrencia` páginas nem do `max_paginas` de cada alvo.
+
+        Yields:
+            list[tuple[str, int]]: (alvo, página) da rodada. Quem consome marca em
+                `self._encerrados` os alvos que chegaram ao fim do catálogo.
+        """
+        proxima = {alvo["nome"]: 1 for alvo in self.alvos}
+        ciclo = [alvo for volta in range(max(a["prioridade"] for a in self.alvos))
+                 for alvo in self.alvos if alvo["prioridade"] > volta]
+        posicao = 0
+
+        def disponivel(alvo):
+            limite = alvo["max_paginas"]
+            return alvo["nome"] not in self._encerrados and (limite is None or proxima[alvo["nome"]] <= limite)
+
+        while any(disponivel(alvo) for alvo in self.alvos):
+            rodada = []
+            sem_vaga = 0
+            while len(rodada) < self.concorrencia and sem_vaga < len(ciclo):
+                alvo = ciclo[posicao % len(ciclo)]
+                posicao += 1
+                if not disponivel(alvo):
+                    sem_vaga += 1
+                    continue
+                sem_vaga = 0
+                rodada.append((alvo["nome"], proxima[alvo["nome"]]))
+                proxima[alvo["nome"]] += 1
+            yield rodada
+
+    def _buscar_rodada(self, rodada, fetchers, executor):
+        por_host = {}
+        for nome, pagina in rodada:
+            url = self.scrapers[nome].montar_url(pagina)
+            por_host.setdefault(self.host(url), []).append(((nome, pagina), url))
+        for host in por_host:
+            if host not in fetchers:
+                # O primeiro alvo do host cria o fetcher, que vive até o fim do plano. Um
+                # limitador único por host (também entre os navegadores do modo "pool")
+                # é o orçamento de requisições do host
+                scraper = self.scrapers[por_host[host][0][0][0]]
+                fetchers[host] = scraper.criar_fetcher(limitador=scraper.criar_limitador())
+
+        futuros = {host: executor.submit(fetchers[host].buscar_lote, [url for _, url in itens])
+                   for host, itens in por_host.items()}
+        htmls = {}
+        for host, itens in por_host.items():
+            for (chave, _), html in zip(itens, futuros[host].result()):
+                htmls[chave] = html
+        return [(chave, htmls[chave]) for chave in rodada]
+
+    def coletar_stream(self):
+        """
+        Executa o plano inteiro.
+
+        Yields:
+            tuple[tuple[str, int], list[dict]]: (alvo, página) e os produtos da
+                página no Schema VIP, com `origem.alvo`.
+        """
+        self._encerrados = set()
+        fetchers = {}
+        totais = {alvo["nome"]: 0 for alvo in self.alvos}
+        concluida = False
+        for scraper in self.scrapers.values():
+            scraper._iniciar_deduplicacao()
+
+        def buscar():
+            with ThreadPoolExecutor(max_workers=self.concorrencia, thread_name_prefix="agendador") as executor:
+                for rodada in self._rodadas():
+                    for (nome, pagina), html in self._buscar_rodada(rodada, fetchers, executor):
+                        if nome in self._encerrados:
+                            continue  # páginas da rodada além do fim do alvo
+                        if html is None:
+                            html = ErroEstagio("busca", "HTML não foi obtido.")
+                        elif not pagina_tem_cards(html):
+                            self._encerrados.add(nome)
+                        yield (nome, pagina), html
+
+        def extrair(chave, html):
+            nome, pagina = chave
+            return self.scrapers[nome].extrair_itens(html, pagina, timestamp=obter_timestamp())
+
+        def classificar(chave, itens):
+            return None if itens is None else self.scrapers[chave[0]].classificar_itens(itens)
+
+        pipeline = PipelineEstagios(buscar(), [("extração", extrair), ("classificação", classificar)])
+        try:
+            for (nome, pagina), produtos in pipeline:
+                if isinstance(produtos, ErroEstagio):
+                    metricas.incrementar("paginas_com_erro")
+                    logging.error(f"⚠️ Erro crítico em {nome}, página {pagina} ({produtos.estagio}): {produtos.erro}")
+                    continue
+                if produtos is None:
+                    logging.info(f"🏁 {nome}: fim do catálogo na página {pagina}.")
+                    continue
+
+                for produto in produtos:
+                    produto["origem"]["alvo"] = nome
+                totais[nome] += len(produtos)
+                metricas.incrementar("paginas")
+                metricas.incrementar("produtos", len(produtos))
+                logging.info("✅ %s, página %s finalizada. Total do alvo: %d itens.", nome, pagina, totais[nome])
+                yield (nome, pagina), produtos
+            concluida = True
+        finally:
+            pipeline.fechar()
+            for fetcher in fetchers.values():
+                fetcher.fechar()
+            for scraper in self.scrapers.values():
+                scraper._encerrar_deduplicacao(concluida)
+            logging.info(f"📋 Plano concluído: {totais} ({len(fetchers)} hosts).")
+
+    def coletar(self):
+        """Executa o plano e devolve os produtos de todos os alvos em uma lista."""
+        return [produto for _, produtos in self.coletar_stream() for produto in produtos]
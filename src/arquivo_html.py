@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from src.deduplicacao import VistosExecucao, chave_produto
+from src.utils import obter_timestamp, reabrir_logs
+
+# zstd comprime HTML melhor e bem mais rápido que gzip; sem o pacote, o
+# arquivamento continua funcionando com gzip.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PASTA_ARQUIVO_HTML = "data/html"
+ARQUIVO_PAGINAS = "paginas.bin"
+ARQUIVO_INDICE = "indice.jsonl"
+
+
+def _comprimir(dados, codec, nivel):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=nivel).compress(dados)
+    return gzip.compress(dados, compresslevel=nivel)
+
+
+def _descomprimir(dados, codec):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(dados)
+    return gzip.decompress(dados)
+
+
+class ArquivoHtml:
+    """
+    Arquivo comprimido do HTML bruto das páginas de uma execução.
+
+    Cada execução ganha uma pasta `data/html/<id_execucao>/` com:
+    - `paginas.bin`: as páginas comprimidas uma a uma (zstd, ou gzip se o pacote
+      `zstandard` não estiver instalado), concatenadas;
+    - `indice.jsonl`: uma linha por página com número, URL, timestamp da coleta,
+      posição/tamanho no `paginas.bin`, codec e hash do HTML.
+
+    Como cada página é comprimida de forma independente, qualquer uma pode ser lida
+    direto pela posição, o que permite reprocessar as páginas em paralelo
+    (`reprocessar_arquivo`).
+    """
+
+    def __init__(self, pasta=PASTA_ARQUIVO_HTML, id_execucao=None, nivel=None):
+        """
+        Args:
+            pasta (str): Pasta raiz dos arquivos.
+            id_execucao (str, optional): Nome da pasta da execução (timestamp atual por padrão).
+            nivel (int, optional): Nível de compressão (padrão: 10 no zstd, 6 no gzip).
+        """
+        self.codec = "zstd" if zstandard else "gzip"
+        self.nivel = nivel if nivel is not None else (10 if zstandard else 6)
+        self.id_execucao = id_execucao or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.caminho = os.path.join(pasta, self.id_execucao)
+        os.makedirs(self.caminho, exist_ok=True)
+
+        self._paginas = open(os.path.join(self.caminho, ARQUIVO_PAGINAS), 'ab')
+        self._indice = open(os.path.join(self.caminho, ARQUIVO_INDICE), 'a', encoding='utf-8')
+        self.bytes_html = 0
+        self.bytes_comprimidos = 0
+
+    def gravar(self, pagina, url, html, timestamp=None):
+        """
+        Comprime e acrescenta o HTML de uma página ao arquivo.
+
+        Args:
+            pagina (int): Número da página.
+            url (str): URL buscada.
+            html (str): HTML bruto.
+            timestamp (str, optional): Momento da coleta (padrão: agora).
+        """
+        bruto = html.encode('utf-8')
+        comprimido = _comprimir(bruto, self.codec, self.nivel)
+
+        posicao = self._paginas.tell()
+        self._paginas.write(comprimido)
+        self._paginas.flush()
+        self._indice.write(json.dumps({
+            "pagina": pagina,
+            "url": url,
+            "timestamp": timestamp or obter_timestamp(),
+            "posicao": posicao,
+            "tamanho": len(comprimido),
+            "codec": self.codec,
+            "sha1": hashlib.sha1(bruto).hexdigest()
+        }, ensure_ascii=False) + '\n')
+        self._indice.flush()
+
+        self.bytes_html += len(bruto)
+        self.bytes_comprimidos += len(comprimido)
+
+    def fechar(self):
+        """Fecha os arquivos da execução."""
+        self._paginas.close()
+        self._indice.close()
+        if self.bytes_comprimidos:
+            logging.info(
+                f"🗜️ HTML arquivado em {self.caminho}: {self.bytes_html / 1024:.0f} KiB -> "
+                f"{self.bytes_comprimidos / 1024:.0f} KiB ({self.codec})."
+            )
+
+
+def ler_indice(caminho):
+    """
+    Lê o índice de uma execução arquivada.
+
+    Args:
+        caminho (str): Pasta da execução (`data/html/<id_execucao>`).
+    Returns:
+        list[dict]: Entradas do índice, em ordem de página. Se uma página foi
+            arquivada mais de uma vez, vale a última.
+    """
+
+    entradas = {}
+    with open(os.path.join(caminho, ARQUIVO_INDICE), encoding='utf-8') as f:
+        for linha in f:
+            if linha.strip():
+                entrada = json.loads(linha)
+                entradas[entrada["pagina"]] = entrada
+    return [entradas[p] for p in sorted(entradas)]
+
+
+def ler_pagina(caminho, entrada):
+    """Lê e descomprime o HTML de uma entrada do índice."""
+    with open(os.path.join(caminho, ARQUIVO_PAGINAS), 'rb') as f:
+        f.seek(entrada["posicao"])
+        return _descomprimir(f.read(entrada["tamanho"]), entrada["codec"]).decode('utf-8')
+
+
+# Scraper de cada processo do reprocessamento. Os processos só extraem os cards:
+# nunca tocam o classificador, então não carregam o modelo nem abrem o cache.
+_scraper_processo = None
+
+def _iniciar_processo(parametros_scraper):
+    global _scraper_processo
+    reabrir_logs()
+    from src.scraper import MagaluScraper
+    _scraper_processo = MagaluScraper(**parametros_scraper)
+
+
+def _extrair_pagina(caminho, entrada):
+    html = ler_pagina(caminho, entrada)
+    return _scraper_processo.extrair_itens(html, entrada["pagina"], timestamp=entrada["timestamp"])
+
+
+def reprocessar_arquivo(caminho, trabalhadores=None, **parametros_scraper):
+    """
+    Reconstrói os produtos de uma execução arquivada, sem navegador e em paralelo.
+
+    Como os estágios da coleta ao vivo (`coletar_produtos_stream`): a leitura e a
+    extração dos cards (`extrair_itens`, o parsing do HTML) são distribuídas entre
+    processos, e a categorização (`classificar_itens`: regras e fallback de IA)
+    roda neste processo, com o classificador compartilhado. Assim há uma única
+    cópia do modelo em memória e um único dono do cache de classificação, seja
+    qual for o número de processos. Regras e limiares atuais, timestamp original
+    da coleta.
+
+    Args:
+        caminho (str): Pasta da execução (`data/html/<id_execucao>`).
+        trabalhadores (int, optional): Processos de extração (padrão: núcleos da máquina).
+        **parametros_scraper: Repassados ao `MagaluScraper` (ex.: `ambiente`,
+            `versao`, `backend_ia`). Com `deduplicar` (padrão), produtos que já
+            saíram em uma página anterior são descartados antes da categorização,
+            como na coleta.
+    Yields:
+        tuple[int, list[dict]]: Página e seus produtos, na ordem da paginação. Páginas
+            sem cards (fim do catálogo) são puladas.
+    """
+
+    from src.scraper import MagaluScraper
+
+    entradas = ler_indice(caminho)
+    scraper = MagaluScraper(**parametros_scraper)
+    # Cada processo vê só as suas páginas: a deduplicação entre páginas fica aqui
+    vistos = VistosExecucao() if parametros_scraper.get("deduplicar", True) else None
+    parametros_processo = {chave: parametros_scraper[chave] for chave in ("ambiente", "versao") if chave in parametros_scraper}
+    logging.info(f"♻️ Reprocessando {len(entradas)} páginas de {caminho}...")
+    with ProcessPoolExecutor(max_workers=trabalhadores, initializer=_iniciar_processo,
+                             initargs=(parametros_processo,)) as executor:
+        resultados = executor.map(_extrair_pagina, [caminho] * len(entradas), entradas)
+        for entrada, itens in zip(entradas, resultados):
+            if itens is None:
+                continue
+            if vistos is not None:
+                itens = [
+                    (dados, contexto) for dados, contexto in itens
+                    if vistos.registrar(chave_produto(dados["id_produto"], contexto["url_produto"]), entrada["pagina"])
+                ]
+            yield entrada["pagina"], scraper.classificar_itens(itens)
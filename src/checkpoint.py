@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+from src.utils import obter_timestamp
+
+CAMINHO_CHECKPOINT = "data/checkpoints/coleta.json"
+
+
+class Checkpoint:
+    """
+    Ponto de retomada durável de uma coleta longa.
+
+    Guarda a última página já persistida pelo destino (JSONL ou Parquet), onde estão
+    os resultados parciais e os metadados da execução. É regravado a cada página de
+    forma atômica (arquivo temporário + `os.replace`), então uma queda no meio da
+    escrita nunca deixa um checkpoint corrompido.
+
+    O arquivo só é atualizado depois que a página foi descarregada em disco pelo
+    destino: o checkpoint nunca aponta para dados que não existem.
+    """
+
+    def __init__(self, configuracao, caminho=CAMINHO_CHECKPOINT, complemento=None):
+        """
+        Args:
+            configuracao (dict): Parâmetros da coleta (formato, modo, limite...). Um
+                checkpoint gravado com outra configuração não é retomado.
+            caminho (str): Arquivo JSON do checkpoint.
+            complemento (Callable[[int], dict], optional): Estado da coleta até a
+                última página gravada (ex.: os produtos já vistos), salvo junto a cada
+                `registrar` para a retomada.
+        """
+        self.configuracao = configuracao
+        self.caminho = caminho
+        self.complemento = complemento
+        self.dados = None
+
+    def carregar(self):
+        """
+        Retorna o checkpoint de uma coleta anterior que não terminou, se houver.
+
+        Returns:
+            dict | None: Dados do checkpoint, ou None se não há o que retomar (nenhum
+                checkpoint, coleta concluída, outra configuração ou destino sumiu).
+        """
+
+        if not os.path.exists(self.caminho):
+            return None
+        try:
+            with open(self.caminho, encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ Checkpoint ilegível ({e}); a coleta começa do zero.")
+            return None
+
+        if dados.get("status") != "em_andamento":
+            return None
+        if dados.get("configuracao") != self.configuracao:
+            logging.warning("⚠️ Checkpoint de uma coleta com outra configuração; a coleta começa do zero.")
+            return None
+        if not os.path.exists(dados.get("destino", "")):
+            logging.warning("⚠️ Resultados parciais do checkpoint não existem mais; a coleta começa do zero.")
+            return None
+
+        self.dados = dados
+        return dados
+
+    def iniciar(self, destino, **extras):
+        """
+        Abre o checkpoint de uma nova execução (nenhuma página concluída ainda).
+
+        Args:
+            destino (str): Arquivo ou pasta com os resultados parciais da execução.
+            **extras: Metadados próprios do destino (ex.: bytes já gravados).
+        """
+        agora = obter_timestamp()
+        self.dados = {
+            "status": "em_andamento",
+            "configuracao": self.configuracao,
+            "destino": destino,
+            "iniciado_em": agora,
+            "atualizado_em": agora,
+            "ultima_pagina": 0,
+            "total": 0,
+            **extras
+        }
+        self._gravar()
+
+    def registrar(self, ultima_pagina, **extras):
+        """Registra que tudo até `ultima_pagina` já está persistido no destino."""
+        if self.complemento:
+            extras = {**self.complemento(ultima_pagina), **extras}
+        self.dados.update(extras, ultima_pagina=ultima_pagina, atualizado_em=obter_timestamp())
+        self._gravar()
+
+    def concluir(self, **extras):
+        """Marca a execução como terminada; a próxima coleta começa do zero."""
+        self.dados.update(extras, status="concluida", atualizado_em=obter_timestamp())
+        self._gravar()
+
+    def _gravar(self):
+        pasta = os.path.dirname(self.caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        temporario = self.caminho + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.dados, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
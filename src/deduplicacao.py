@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import os
+import threading
+import numpy as np
+
+# Memória compacta dos produtos (e categorias) vistos em coletas anteriores
+CAMINHO_VISTOS = "data/estado/vistos.npz"
+
+
+def chave_produto(id_produto, url_produto):
+    """
+    Chave de deduplicação: o `id_produto` quando ele vem do link (`/p/<id>/`);
+    senão o id é um hash do título, e a URL distingue anúncios diferentes.
+    """
+    return id_produto if f"/p/{id_produto}/" in url_produto else url_produto
+
+
+class VistosExecucao:
+    """
+    Conjunto dos produtos já vistos na coleta em andamento, chaveado por
+    `id_produto` (ou pela URL, quando o link não traz o id).
+
+    Cards patrocinados e destaques se repetem entre páginas; só a primeira
+    aparição segue para normalização, categorização e saída. As páginas em que
+    cada produto apareceu ficam registradas em `paginas`.
+    """
+
+    def __init__(self):
+        self.paginas = {}
+        self.duplicados = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, chave, pagina):
+        """
+        Anota a aparição do produto na página.
+
+        Returns:
+            bool: True na primeira aparição do produto nesta coleta.
+        """
+        with self._lock:
+            paginas = self.paginas.get(chave)
+            if paginas is None:
+                self.paginas[chave] = [pagina]
+                return True
+            if paginas[-1] != pagina:
+                paginas.append(pagina)
+            self.duplicados += 1
+            return False
+
+    def ate_pagina(self, pagina):
+        """
+        Produtos cuja primeira aparição foi até a `pagina`, com essa página.
+
+        É o que o checkpoint guarda: a extração corre à frente da gravação, e os
+        produtos de páginas ainda não gravadas não podem contar como vistos na retomada.
+        """
+        with self._lock:
+            return {chave: paginas[0] for chave, paginas in self.paginas.items() if paginas[0] <= pagina}
+
+    def restaurar(self, primeiras_paginas):
+        """Recoloca os produtos de uma coleta interrompida (saída de `ate_pagina`)."""
+        with self._lock:
+            for chave, pagina in primeiras_paginas.items():
+                self.paginas.setdefault(chave, [pagina])
+
+    def repetidos(self):
+        """Produtos que apareceram em mais de uma página, com as páginas de cada um."""
+        with self._lock:
+            return {chave: list(paginas) for chave, paginas in self.paginas.items() if len(paginas) > 1}
+
+
+class MemoriaVistos:
+    """
+    Memória persistente dos produtos de coletas anteriores e da categoria base de
+    cada um, para que um produto já conhecido não passe de novo pelas regras nem
+    pela IA.
+
+    Cada produto é um hash de 64 bits de (chave, título) -- um título alterado
+    conta como produto novo e é reclassificado -- ligado ao índice da categoria em
+    uma tabela pequena: cerca de 10 bytes por produto (10 MB para 1 milhão), em
+    arrays ordenados consultados com busca binária. Colisões de 64 bits são
+    desprezíveis nessa escala.
+
+    A memória vale para uma `assinatura` do classificador: com outro modelo,
+    categorias ou limiares, ela começa vazia.
+    """
+
+    def __init__(self, assinatura=""):
+        self.assinatura = assinatura
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.codigos = np.zeros(0, dtype=np.uint16)
+        self.categorias = []
+        self._novos = {}
+        self._lock = threading.Lock()
+
+    @property
+    def itens(self):
+        return len(self.hashes) + len(self._novos)
+
+    @staticmethod
+    def _hash(chave, titulo):
+        resumo = hashlib.blake2b(f"{chave}\x1f{titulo}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(resumo, "little")
+
+    def consultar(self, pares):
+        """
+        Args:
+            pares (list[tuple[str, str]]): (chave do produto, título).
+        Returns:
+            list[str | None]: Categoria base de cada par já visto, ou None.
+        """
+        if not pares:
+            return []
+        alvos = np.array([self._hash(chave, titulo) for chave, titulo in pares], dtype=np.uint64)
+        with self._lock:
+            posicoes = np.searchsorted(self.hashes, alvos)
+            encontrados = posicoes < len(self.hashes)
+            encontrados[encontrados] = self.hashes[posicoes[encontrados]] == alvos[encontrados]
+            resultado = []
+            for alvo, posicao, encontrado in zip(alvos.tolist(), posicoes.tolist(), encontrados.tolist()):
+                if encontrado:
+                    resultado.append(self.categorias[self.codigos[posicao]])
+                else:
+                    resultado.append(self._novos.get(alvo))
+            return resultado
+
+    def registrar(self, chave, titulo, categoria_base):
+        """Anota um produto (incorporado aos arrays em `salvar`)."""
+        with self._lock:
+            self._novos[self._hash(chave, titulo)] = categoria_base
+
+    def _incorporar(self):
+        if not self._novos:
+            return 0
+        indices = {categoria: i for i, categoria in enumerate(self.categorias)}
+        for categoria in self._novos.values():
+            if categoria not in indices:
+                indices[categoria] = len(self.categorias)
+                self.categorias.append(categoria)
+        hashes = np.concatenate([self.hashes, np.fromiter(self._novos, dtype=np.uint64, count=len(self._novos))])
+        codigos = np.concatenate([self.codigos, np.array([indices[c] for c in self._novos.values()], dtype=np.uint16)])
+        # Um hash repetido (título reclassificado) fica com a entrada mais recente
+        hashes, primeira = np.unique(hashes[::-1], return_index=True)
+        codigos = codigos[::-1][primeira]
+        novos = len(hashes) - len(self.hashes)
+        self.hashes, self.codigos = hashes, codigos
+        self._novos = {}
+        return novos
+
+    def salvar(self, caminho=CAMINHO_VISTOS):
+        """
+        Incorpora os produtos registrados e grava a memória de forma atômica.
+
+        Returns:
+            int: Produtos que não estavam na memória.
+        """
+        with self._lock:
+            novos = self._incorporar()
+            pasta = os.path.dirname(caminho)
+            if pasta and not os.path.exists(pasta):
+                os.makedirs(pasta)
+            temporario = caminho + ".tmp"
+            with open(temporario, "wb") as f:
+                np.savez_compressed(f, hashes=self.hashes, codigos=self.codigos,
+                                    categorias=np.array(self.categorias, dtype=str), assinatura=self.assinatura)
+            os.replace(temporario, caminho)
+        return novos
+
+    @classmethod
+    def carregar(cls, caminho=CAMINHO_VISTOS, assinatura=""):
+        """Lê a memória gravada em `caminho`; vazia se o arquivo não existe ou é de outro classificador."""
+        memoria = cls(assinatura)
+        if not os.path.exists(caminho):
+            return memoria
+        with np.load(caminho) as dados:
+            if str(dados["assinatura"]) != assinatura:
+                logging.info("♻️ Assinatura do classificador mudou. A memória de produtos vistos começa vazia.")
+                return memoria
+            memoria.hashes = dados["hashes"].copy()
+            memoria.codigos = dados["codigos"].copy()
+            memoria.categorias = [str(c) for c in dados["categorias"]]
+        return memoria
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from src.utils import obter_timestamp
+
+# Índice do modo delta: último estado conhecido de cada produto
+CAMINHO_ESTADO = "data/estado/produtos.sqlite"
+
+
+def impressao_produto(produto):
+    """
+    Impressão digital (hash) dos campos de preço e da categoria de um produto.
+
+    Dois snapshots com a mesma impressão são considerados iguais pelo modo delta;
+    timestamp, página e demais metadados da coleta não entram no cálculo.
+
+    Args:
+        produto (dict): Produto no Schema VIP.
+    Returns:
+        str: Hash SHA-1 hexadecimal.
+    """
+
+    preco = produto["preço"]
+    campos = [
+        produto["produto"]["categoria"],
+        preco["preco_base"],
+        preco["preco_original"],
+        preco["descontos"]["percentual"],
+        preco["precos_por_metodo"]["pix"],
+        preco["parcelamento"]["parcelas_max"],
+        preco["parcelamento"]["valor_parcela"],
+        preco["parcelamento"]["sem_juros"]
+    ]
+    return hashlib.sha1(json.dumps(campos, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def categoria_base_de(produto):
+    """Categoria antes da composição de bundle (ex.: "Smartwatch + Áudio" -> "Smartwatch")."""
+    categoria = produto["produto"]["categoria"]
+    return categoria.split(" + ")[0] if produto["produto"]["is_bundle"] else categoria
+
+
+class IndiceEstado:
+    """
+    Índice local (SQLite) do último snapshot de cada produto, chaveado por `id_produto`.
+
+    Usado pelo modo delta para emitir apenas produtos novos, alterados (impressão
+    diferente) e desaparecidos, e para reaproveitar a categoria de títulos que não
+    mudaram sem passar de novo pela IA.
+
+    Cada coleta é uma transação: `filtrar_alterados` atualiza o índice página a
+    página, mas nada é confirmado até `finalizar`. Uma coleta que cai no meio não
+    deixa o índice pela metade, e a próxima execução reemite o mesmo delta.
+
+    A categoria guardada só é reaproveitada se a `assinatura` do classificador for
+    a mesma da última coleta confirmada (mesma regra do cache de classificação).
+    """
+
+    def __init__(self, caminho=CAMINHO_ESTADO, assinatura=""):
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+
+        self.caminho = caminho
+        self.assinatura = assinatura
+        self.novos = 0
+        self.alterados = 0
+        self.inalterados = 0
+
+        # A consulta de categorias roda no estágio de classificação e o registro
+        # do delta no consumidor: uma conexão, serializada pelo lock
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS produtos ("
+            " id_produto TEXT PRIMARY KEY,"
+            " titulo TEXT NOT NULL,"
+            " categoria_base TEXT NOT NULL,"
+            " impressao TEXT NOT NULL,"
+            " objeto TEXT NOT NULL,"
+            " execucao INTEGER NOT NULL)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_produtos_execucao ON produtos (execucao)")
+        self._conexao.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+        self._conexao.commit()
+
+        meta = dict(self._conexao.execute("SELECT chave, valor FROM meta"))
+        self.reutilizar_categorias = meta.get("assinatura") == assinatura
+        if "assinatura" in meta and not self.reutilizar_categorias:
+            logging.info("♻️ Assinatura do classificador mudou. Categorias do índice delta não serão reaproveitadas.")
+        self.execucao = int(meta.get("execucao", 0)) + 1
+
+    def categorias_conhecidas(self, itens):
+        """
+        Categorias base já decididas para os títulos que não mudaram desde a última coleta.
+
+        Args:
+            itens (list[tuple[dict, dict]]): Pares (dados_limpos, contexto) da página.
+        Returns:
+            dict[str, str]: Título -> categoria base, só para os produtos cujo título
+                guardado é idêntico ao atual.
+        """
+
+        if not self.reutilizar_categorias:
+            return {}
+        titulos = {dados["id_produto"]: dados["titulo"] for dados, _ in itens}
+        with self._lock:
+            linhas = self._consultar(list(titulos), "titulo, categoria_base")
+        return {
+            titulo: categoria_base
+            for id_produto, titulo, categoria_base in linhas
+            if titulos[id_produto] == titulo
+        }
+
+    def filtrar_alterados(self, produtos):
+        """
+        Compara os produtos com o índice, registra o novo snapshot e devolve só o delta.
+
+        Args:
+            produtos (list[dict]): Produtos da página no Schema VIP.
+        Returns:
+            list[dict]: Produtos novos ou alterados, com `alteracao` = "NOVO" / "ALTERADO".
+        """
+
+        with self._lock:
+            anteriores = {id_produto: impressao for id_produto, impressao in
+                          self._consultar([p["produto"]["id_site"] for p in produtos], "impressao")}
+            delta = []
+            for produto in produtos:
+                id_produto = produto["produto"]["id_site"]
+                impressao = impressao_produto(produto)
+                anterior = anteriores.get(id_produto)
+                anteriores[id_produto] = impressao
+
+                if anterior == impressao:
+                    self.inalterados += 1
+                    self._conexao.execute(
+                        "UPDATE produtos SET execucao = ?, titulo = ? WHERE id_produto = ?",
+                        (self.execucao, produto["produto"]["nome"], id_produto)
+                    )
+                    continue
+
+                if anterior is None:
+                    self.novos += 1
+                    alteracao = "NOVO"
+                else:
+                    self.alterados += 1
+                    alteracao = "ALTERADO"
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO produtos (id_produto, titulo, categoria_base, impressao, objeto, execucao)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (id_produto, produto["produto"]["nome"], categoria_base_de(produto), impressao,
+                     json.dumps(produto, ensure_ascii=False), self.execucao)
+                )
+                delta.append({**produto, "alteracao": alteracao})
+            return delta
+
+    def finalizar(self, catalogo_completo):
+        """
+        Confirma a coleta no índice.
+
+        Args:
+            catalogo_completo (bool): Se a coleta chegou ao fim do catálogo. Só nesse
+                caso os produtos não vistos são tratados como desaparecidos; uma coleta
+                limitada por `max_paginas` não enxerga o resto do catálogo.
+        Returns:
+            list[dict]: Último snapshot de cada produto desaparecido, com
+                `alteracao` = "REMOVIDO" e o timestamp desta coleta (vazio se o
+                catálogo não foi percorrido todo).
+        """
+
+        removidos = []
+        if catalogo_completo:
+            agora = obter_timestamp()
+            for (objeto,) in self._conexao.execute("SELECT objeto FROM produtos WHERE execucao < ?", (self.execucao,)):
+                produto = json.loads(objeto)
+                produto["metadata"]["timestamp_coleta"] = agora
+                removidos.append({**produto, "alteracao": "REMOVIDO"})
+            self._conexao.execute("DELETE FROM produtos WHERE execucao < ?", (self.execucao,))
+        else:
+            logging.info("🔎 Coleta parcial: produtos desaparecidos não são calculados neste delta.")
+
+        self._conexao.executemany(
+            "INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)",
+            [("assinatura", self.assinatura), ("execucao", str(self.execucao))]
+        )
+        self._conexao.commit()
+        logging.info(
+            f"🔁 Delta: {self.novos} novos, {self.alterados} alterados, "
+            f"{len(removidos)} removidos, {self.inalterados} inalterados."
+        )
+        return removidos
+
+    def descartar(self):
+        """Desfaz o que foi registrado nesta coleta (ex.: coleta interrompida)."""
+        self._conexao.rollback()
+
+    def fechar(self):
+        """Fecha a conexão com o arquivo do índice."""
+        self._conexao.close()
+
+    def _consultar(self, ids, colunas):
+        linhas = []
+        # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+        for inicio in range(0, len(ids), 500):
+            bloco = ids[inicio:inicio + 500]
+            marcadores = ",".join("?" * len(bloco))
+            linhas.extend(self._conexao.execute(
+                f"SELECT id_produto, {colunas} FROM produtos WHERE id_produto IN ({marcadores})", bloco
+            ))
+        return linhas
@@ -0,0 +1,517 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from src.limitador import LimitadorAdaptativo
+from src.metricas import metricas
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+
+# Marcador dos cards de produto no HTML da listagem. Se não aparece no HTML bruto,
+# a página é o fim do catálogo ou depende de JavaScript para renderizar os cards.
+MARCADOR_CARD = 'data-testid="product-card-container"'
+SELETOR_CARD = '[data-testid="product-card-container"]'
+
+# Sem cards, o aviso de busca vazia marca o fim do catálogo; já o contêiner da
+# lista, o estado da aplicação ou um <noscript> indicam cards renderizados por JavaScript.
+MARCADOR_FIM = 'data-testid="empty-search"'
+MARCADORES_JAVASCRIPT = ('data-testid="product-list"', "__NEXT_DATA__", "__APP_STATE__", 'id="__next"', "<noscript")
+
+# Respostas HTTP transitórias, buscadas de novo antes de desistir da página
+STATUS_RETENTATIVA = {429, 500, 502, 503, 504}
+
+# Requisições que o navegador enxuto não faz (curingas do `Network.setBlockedURLs`):
+# imagens, fontes e mídia que o parser dos cards não usa, e scripts de anúncios e
+# rastreamento de terceiros. Os scripts do próprio site continuam, pois renderizam os cards.
+PADROES_BLOQUEADOS = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*.mp4*", "*.webm*",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*googleadservices.com*", "*facebook.net*", "*connect.facebook.*",
+    "*hotjar.com*", "*clarity.ms*", "*criteo.*", "*taboola.com*", "*analytics.tiktok.com*",
+    "*nr-data.net*", "*newrelic.com*"
+]
+
+
+def pagina_tem_cards(html):
+    """Checagem barata (sem parse) da presença de cards de produto no HTML."""
+    return bool(html) and MARCADOR_CARD in html
+
+
+def pagina_precisa_javascript(html):
+    """Checagem barata (sem parse) de uma listagem sem cards que depende do navegador para renderizá-los."""
+    if not html or MARCADOR_CARD in html or MARCADOR_FIM in html:
+        return False
+    return any(marcador in html for marcador in MARCADORES_JAVASCRIPT)
+
+
+def ler_log_rede(driver):
+    """
+    Esvazia o log de desempenho do Chrome (`goog:loggingPrefs`) e resume a rede
+    desde a última leitura.
+
+    Returns:
+        tuple[int, int]: Requisições bloqueadas (`Network.loadingFailed` com
+            `blockedReason`) e bytes baixados (`encodedDataLength` das que terminaram).
+    """
+
+    bloqueadas = baixados = 0
+    for entrada in driver.get_log("performance"):
+        mensagem = json.loads(entrada["message"]).get("message", {})
+        metodo, parametros = mensagem.get("method"), mensagem.get("params", {})
+        if metodo == "Network.loadingFailed" and parametros.get("blockedReason"):
+            bloqueadas += 1
+        elif metodo == "Network.loadingFinished":
+            baixados += int(parametros.get("encodedDataLength", 0))
+    return bloqueadas, baixados
+
+
+def aguardar_cards(driver, timeout=15, intervalo=0.25, leituras_estaveis=2, tolerancia_vazia=3):
+    """
+    Espera a listagem renderizar em vez de dormir um tempo fixo.
+
+    A página é considerada pronta quando a quantidade de cards é maior que zero e
+    se repete em `leituras_estaveis` leituras seguidas (a renderização terminou).
+    Se o documento já carregou e nenhum card apareceu após `tolerancia_vazia`
+    segundos, a página é tratada como vazia sem esperar o timeout inteiro.
+
+    Args:
+        driver (WebDriver): Navegador já posicionado na página.
+        timeout (float): Tempo máximo de espera (s).
+        intervalo (float): Intervalo entre leituras (s).
+        leituras_estaveis (int): Leituras iguais seguidas exigidas.
+        tolerancia_vazia (float): Espera (s) por cards depois do documento completo.
+    Returns:
+        int: Quantidade de cards na última leitura (0 se a página veio vazia).
+    """
+
+    contagens = []
+    inicio = time.monotonic()
+
+    def _pronta(d):
+        contagens.append(len(d.find_elements(By.CSS_SELECTOR, SELETOR_CARD)))
+        ultimas = contagens[-leituras_estaveis:]
+        if ultimas[-1] > 0:
+            return len(ultimas) == leituras_estaveis and len(set(ultimas)) == 1
+        return (time.monotonic() - inicio > tolerancia_vazia
+                and d.execute_script("return document.readyState") == "complete")
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=intervalo).until(_pronta)
+    except TimeoutException:
+        logging.warning(f"⏱️ Cards não estabilizaram em {timeout}s (última contagem: {contagens[-1] if contagens else 0}).")
+    return contagens[-1] if contagens else 0
+
+
+class Fetcher:
+    """
+    Interface comum dos motores de busca de páginas de listagem.
+
+    Cada implementação define `buscar_lote(urls)`; a paginação em ordem fica em
+    `iterar_paginas`, que pede `concorrencia` páginas por vez.
+    """
+
+    concorrencia = 1
+
+    def iniciar(self):
+        """Aloca os recursos do fetcher (navegador, sessão HTTP...)."""
+
+    def fechar(self):
+        """Libera os recursos alocados em `iniciar`."""
+
+    def buscar_lote(self, urls):
+        """
+        Busca várias URLs.
+
+        Returns:
+            list[str | None]: HTML de cada URL, na mesma ordem; None em caso de falha.
+        """
+        raise NotImplementedError
+
+    def iterar_paginas(self, montar_url, pagina_inicial=1, max_paginas=None):
+        """
+        Percorre a paginação entregando o HTML de cada página em ordem.
+
+        A iteração termina na primeira página que chega sem cards (fim do catálogo),
+        sem buscar as seguintes; o consumidor também pode parar antes, e as páginas já
+        buscadas além desse ponto são simplesmente descartadas.
+
+        Args:
+            montar_url (Callable[[int], str]): Gera a URL de uma página.
+            pagina_inicial (int): Primeira página a buscar.
+            max_paginas (int, optional): Última página. None percorre até o consumidor parar.
+        Yields:
+            tuple[int, str | None]: Número da página e seu HTML (None se a busca falhou).
+        """
+
+        pagina = pagina_inicial
+        while max_paginas is None or pagina <= max_paginas:
+            fim_janela = pagina + self.concorrencia - 1
+            if max_paginas is not None:
+                fim_janela = min(fim_janela, max_paginas)
+            paginas = list(range(pagina, fim_janela + 1))
+
+            htmls = self.buscar_lote([montar_url(p) for p in paginas])
+            for numero, html in zip(paginas, htmls):
+                yield numero, html
+                if html is not None and not pagina_tem_cards(html):
+                    return
+            pagina = fim_janela + 1
+
+
+class FetcherSelenium(Fetcher):
+    """
+    Busca as páginas com o Chrome headless, uma por vez (renderiza JavaScript).
+
+    A prontidão da página é detectada pelos próprios cards (`aguardar_cards`) e a
+    cortesia com o site fica a cargo do `limitador`, que desacelera em erros e
+    páginas vazias e acelera quando as respostas estão saudáveis.
+    """
+
+    def __init__(self, criar_driver, limitador=None, timeout_cards=15, medir_rede=False):
+        """
+        Args:
+            criar_driver (Callable[[], WebDriver]): Fábrica do navegador já configurado.
+            limitador (LimitadorAdaptativo, optional): Controle de taxa; um novo por padrão.
+            timeout_cards (float): Espera máxima (s) pelos cards de cada página.
+            medir_rede (bool): Lê o log de desempenho do navegador após cada página
+                (`ler_log_rede`) e registra as requisições bloqueadas e os bytes
+                baixados. Exige o navegador com `goog:loggingPrefs` de desempenho.
+        """
+        self.criar_driver = criar_driver
+        self.limitador = limitador or LimitadorAdaptativo()
+        self.timeout_cards = timeout_cards
+        self.medir_rede = medir_rede
+        self.driver = None
+        self.bloqueadas = 0
+        self.paginas = 0
+
+    def iniciar(self):
+        if self.driver is None:
+            self.driver = self.criar_driver()
+
+    def fechar(self):
+        """Encerra a instância do navegador e libera os recursos de memória do sistema."""
+        if self.driver:
+            if self.medir_rede and self.paginas:
+                logging.info("🚫 Navegador encerrado: %d requisições bloqueadas em %d páginas.", self.bloqueadas, self.paginas)
+            self.driver.quit()
+            self.driver = None
+
+    def buscar(self, url):
+        self.iniciar()
+        self.limitador.aguardar()
+        try:
+            with metricas.cronometrar("busca"):
+                self.driver.get(url)
+                quantidade = aguardar_cards(self.driver, timeout=self.timeout_cards)
+        except Exception:
+            self.limitador.registrar_falha()
+            metricas.incrementar("falhas_busca")
+            raise
+
+        if quantidade > 0:
+            self.limitador.registrar_sucesso()
+        else:
+            self.limitador.registrar_falha()
+        if self.medir_rede:
+            self._registrar_rede(url)
+        return self.driver.page_source
+
+    def _registrar_rede(self, url):
+        # Recursos que terminam depois dos cards entram na conta da página seguinte
+        try:
+            bloqueadas, baixados = ler_log_rede(self.driver)
+        except Exception as e:
+            logging.debug("Log de rede indisponível: %s", e)
+            return
+        self.bloqueadas += bloqueadas
+        self.paginas += 1
+        metricas.incrementar("requisicoes_bloqueadas", bloqueadas)
+        metricas.observar("kb_por_pagina", round(baixados / 1024, 1))
+        logging.debug("🚫 %s: %d requisições bloqueadas, %.0f KB baixados.", url, bloqueadas, baixados / 1024)
+
+    def buscar_lote(self, urls):
+        htmls = []
+        for url in urls:
+            try:
+                htmls.append(self.buscar(url))
+            except Exception as e:
+                logging.error(f"⚠️ Erro ao carregar {url} no navegador: {e}")
+                htmls.append(None)
+        return htmls
+
+
+class FetcherPoolSelenium(Fetcher):
+    """
+    Pool de K navegadores buscando páginas em paralelo.
+
+    Cada trabalhador (thread) tem o seu próprio Chrome e sua própria espera de
+    cortesia, e retira o próximo número de página de uma fila compartilhada. Os
+    HTMLs voltam para o consumidor na ordem da paginação. Quando um trabalhador
+    encontra uma página sem cards, o fim do catálogo é registrado para todos e
+    ninguém pega páginas além dele. Um navegador que falha é reiniciado e a
+    página é tentada mais uma vez.
+
+    Fora da paginação (`buscar_lote`, usado pelo plano de coleta), os navegadores
+    ficam abertos entre as chamadas e são reaproveitados até `fechar`.
+    """
+
+    def __init__(self, criar_driver, trabalhadores=4, criar_limitador=LimitadorAdaptativo,
+                 timeout_cards=15, timeout_espera=300, medir_rede=False, limitador=None):
+        """
+        Args:
+            criar_driver (Callable[[], WebDriver]): Fábrica do navegador já configurado.
+            trabalhadores (int): Quantidade de navegadores (K).
+            criar_limitador (Callable[[], LimitadorAdaptativo]): Fábrica do limitador de
+                cada trabalhador (a cortesia é por navegador).
+            timeout_cards (float): Espera máxima (s) pelos cards de cada página.
+            timeout_espera (float): Tempo máximo (s) esperando uma página antes de desistir dela.
+            medir_rede (bool): Repassado a cada `FetcherSelenium` do pool.
+            limitador (LimitadorAdaptativo, optional): Limitador único de todos os
+                navegadores (a cortesia passa a ser do pool inteiro, ex.: o orçamento
+                de um host). Se None, cada navegador recebe o seu de `criar_limitador`.
+        """
+        self.criar_driver = criar_driver
+        self.concorrencia = trabalhadores
+        self.criar_limitador = criar_limitador
+        self.timeout_cards = timeout_cards
+        self.timeout_espera = timeout_espera
+        self.medir_rede = medir_rede
+        self.limitador = limitador
+        # Navegadores abertos pelo `buscar_lote`, reaproveitados entre chamadas
+        self._navegadores = []
+
+    def _novo_fetcher(self):
+        return FetcherSelenium(self.criar_driver, limitador=self.limitador or self.criar_limitador(),
+                               timeout_cards=self.timeout_cards, medir_rede=self.medir_rede)
+
+    def fechar(self):
+        """Encerra os navegadores mantidos pelo `buscar_lote`."""
+        navegadores, self._navegadores = self._navegadores, []
+        for fetcher in navegadores:
+            try:
+                fetcher.fechar()
+            except Exception as e:
+                logging.error(f"⚠️ Erro ao encerrar navegador do pool: {e}")
+
+    def buscar_lote(self, urls):
+        """
+        Busca as URLs em paralelo, com até `concorrencia` navegadores.
+
+        Os navegadores continuam abertos para as próximas chamadas (não chame de
+        duas threads ao mesmo tempo); `fechar` os encerra.
+        """
+        if not urls:
+            return []
+        quantidade = min(self.concorrencia, len(urls))
+        while len(self._navegadores) < quantidade:
+            self._navegadores.append(self._novo_fetcher())
+
+        htmls = [None] * len(urls)
+        pendentes = iter(enumerate(urls))
+        trava = threading.Lock()
+
+        def trabalhador(id_trabalhador, fetcher):
+            while True:
+                with trava:
+                    item = next(pendentes, None)
+                if item is None:
+                    return
+                indice, url = item
+                htmls[indice] = self._buscar_com_reinicio(fetcher, url, id_trabalhador)
+
+        threads = [threading.Thread(target=trabalhador, args=(i + 1, fetcher), name=f"navegador-{i + 1}")
+                   for i, fetcher in enumerate(self._navegadores[:quantidade])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return htmls
+
+    def _buscar_com_reinicio(self, fetcher, url, id_trabalhador):
+        for tentativa in (1, 2):
+            try:
+                return fetcher.buscar(url)
+            except Exception as e:
+                logging.error(f"⚠️ Navegador {id_trabalhador} falhou em {url} (tentativa {tentativa}): {e}")
+                # Descarta o navegador quebrado; o próximo `buscar` cria outro
+                try:
+                    fetcher.fechar()
+                except Exception:
+                    fetcher.driver = None
+        return None
+
+    def iterar_paginas(self, montar_url, pagina_inicial=1, max_paginas=None):
+        fila_paginas = itertools.count(pagina_inicial)
+        resultados = {}
+        estado = {"fim": float("inf"), "esperada": pagina_inicial}
+        condicao = threading.Condition()
+        parar = threading.Event()
+
+        def trabalhador(id_trabalhador):
+            fetcher = self._novo_fetcher()
+            try:
+                while not parar.is_set():
+                    with condicao:
+                        # Contrapressão: não abre mais que 2K páginas à frente do consumidor
+                        while not parar.is_set() and len(resultados) >= 2 * self.concorrencia:
+                            condicao.wait(1)
+                        pagina = next(fila_paginas)
+                        if pagina >= estado["fim"] or (max_paginas is not None and pagina > max_paginas):
+                            return
+
+                    html = self._buscar_com_reinicio(fetcher, montar_url(pagina), id_trabalhador)
+
+                    with condicao:
+                        resultados[pagina] = html
+                        if html is not None and not pagina_tem_cards(html):
+                            estado["fim"] = min(estado["fim"], pagina)
+                        condicao.notify_all()
+            finally:
+                fetcher.fechar()
+                with condicao:
+                    condicao.notify_all()
+
+        threads = [
+            threading.Thread(target=trabalhador, args=(i,), name=f"navegador-{i}", daemon=True)
+            for i in range(1, self.concorrencia + 1)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while max_paginas is None or estado["esperada"] <= max_paginas:
+                esperada = estado["esperada"]
+                limite = time.monotonic() + self.timeout_espera
+                with condicao:
+                    while (esperada not in resultados and esperada <= estado["fim"]
+                           and any(t.is_alive() for t in threads) and time.monotonic() < limite):
+                        condicao.wait(1)
+                    if esperada not in resultados:
+                        if time.monotonic() >= limite:
+                            logging.error(f"⏱️ Página {esperada} não chegou em {self.timeout_espera}s. Encerrando o pool.")
+                        # Página além do fim do catálogo (ou todos os navegadores encerraram)
+                        break
+                    html = resultados.pop(esperada)
+                    estado["esperada"] += 1
+                    condicao.notify_all()
+                yield esperada, html
+        finally:
+            parar.set()
+            with condicao:
+                condicao.notify_all()
+            for thread in threads:
+                thread.join()
+
+
+class FetcherHttp(Fetcher):
+    """
+    Busca as páginas por HTTP puro com asyncio, várias em paralelo.
+
+    Usa uma única sessão `aiohttp` com pool de conexões keep-alive, limitada a
+    `concorrencia` requisições simultâneas. Erros de rede, timeouts e respostas
+    transitórias (429/5xx) são buscados de novo por HTTP, até `tentativas` vezes.
+    Só quando o HTML chega sem cards mas com a casca de uma listagem renderizada
+    por JavaScript (`pagina_precisa_javascript`) e há um `fallback` configurado,
+    a página é buscada de novo por ele, normalmente um `FetcherSelenium`; a
+    página vazia do fim do catálogo não abre o navegador. O `limitador`
+    (opcional) espaça as requisições e recua em erros HTTP.
+    """
+
+    def __init__(self, concorrencia=8, timeout=30, fallback=None, user_agent=USER_AGENT, limitador=None,
+                 tentativas=3, espera_retentativa=1.0):
+        self.concorrencia = concorrencia
+        self.timeout = timeout
+        self.fallback = fallback
+        self.user_agent = user_agent
+        self.limitador = limitador
+        self.tentativas = tentativas
+        self.espera_retentativa = espera_retentativa
+        self._loop = None
+        self._sessao = None
+
+    def iniciar(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._sessao = self._loop.run_until_complete(self._criar_sessao())
+
+    async def _criar_sessao(self):
+        import aiohttp
+
+        conector = aiohttp.TCPConnector(limit=self.concorrencia, keepalive_timeout=60)
+        return aiohttp.ClientSession(
+            connector=conector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={
+                "User-Agent": self.user_agent,
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Language": "pt-BR,pt;q=0.9"
+            }
+        )
+
+    def fechar(self):
+        if self._loop is not None:
+            self._loop.run_until_complete(self._sessao.close())
+            self._loop.close()
+            self._loop = None
+            self._sessao = None
+        if self.fallback:
+            self.fallback.fechar()
+
+    async def _buscar(self, url):
+        for tentativa in range(1, self.tentativas + 1):
+            if tentativa > 1:
+                metricas.incrementar("retentativas_busca")
+                await asyncio.sleep(self.espera_retentativa * (tentativa - 1))
+            if self.limitador:
+                await self.limitador.aguardar_async()
+            try:
+                with metricas.cronometrar("busca"):
+                    async with self._sessao.get(url) as resposta:
+                        status = resposta.status
+                        if status == 200:
+                            html = await resposta.text()
+            except Exception as e:
+                logging.error(f"⚠️ Erro HTTP em {url} (tentativa {tentativa}): {e}")
+                status = None
+
+            if status == 200:
+                if self.limitador:
+                    self.limitador.registrar_sucesso()
+                return html
+            if status is not None:
+                logging.warning(f"⚠️ HTTP {status} em {url} (tentativa {tentativa})")
+            if self.limitador:
+                self.limitador.registrar_falha()
+            if status is not None and status not in STATUS_RETENTATIVA:
+                break
+
+        metricas.incrementar("falhas_busca")
+        return None
+
+    async def _buscar_todas(self, urls):
+        return await asyncio.gather(*(self._buscar(url) for url in urls))
+
+    def buscar_lote(self, urls):
+        self.iniciar()
+        htmls = self._loop.run_until_complete(self._buscar_todas(urls))
+
+        if self.fallback:
+            for i, (url, html) in enumerate(zip(urls, htmls)):
+                if html is None or pagina_tem_cards(html):
+                    continue
+                if not pagina_precisa_javascript(html):
+                    # Página válida e vazia: fim do catálogo, o resto da janela não importa
+                    break
+                logging.info(f"🌐 Listagem sem cards no HTML bruto de {url}. Tentando pelo navegador...")
+                htmls[i] = self.fallback.buscar_lote([url])[0]
+                if not pagina_tem_cards(htmls[i]):
+                    # Nem o navegador achou cards: fim do catálogo, o resto da janela não importa
+                    break
+        return htmls
@@ -0,0 +1,297 @@
+import glob
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+
+CAMINHO_HISTORICO = "data/historico/precos.sqlite"
+
+# Colunas gravadas a partir de cada produto do Schema VIP
+COLUNAS = (
+    "id_produto", "timestamp", "nome", "categoria", "loja", "canal_venda", "preco_base",
+    "preco_original", "preco_pix", "desconto_percentual", "parcelas_max", "valor_parcela"
+)
+
+
+def linha_historico(produto):
+    """
+    Extrai de um produto do Schema VIP a linha gravada no histórico de preços.
+
+    Args:
+        produto (dict): Produto no Schema VIP.
+    Returns:
+        tuple: Valores na ordem de `COLUNAS`.
+    """
+
+    preco = produto["preço"]
+    return (
+        produto["produto"]["id_site"],
+        produto["metadata"]["timestamp_coleta"],
+        produto["produto"]["nome"],
+        produto["produto"]["categoria"],
+        produto["vendedor"]["nome"],
+        produto["plataforma"]["canal_venda"],
+        preco["preco_base"],
+        preco["preco_original"],
+        preco["precos_por_metodo"]["pix"],
+        preco["descontos"]["percentual"],
+        preco["parcelamento"]["parcelas_max"],
+        preco["parcelamento"]["valor_parcela"]
+    )
+
+
+class HistoricoPrecos:
+    """
+    Histórico de preços append-only em SQLite (WAL), com consultas indexadas.
+
+    Cada observação (produto, timestamp da coleta) é uma linha; observações
+    repetidas são ignoradas, então reingerir uma coleta ou reimportar um arquivo não
+    duplica nada. Os índices em `(id_produto, timestamp)` e `(categoria, timestamp)`
+    mantêm as consultas por produto e por janela de tempo em milissegundos, sem
+    reabrir os arquivos de `data/raw`.
+
+    Timestamps seguem o formato da coleta ("AAAA-MM-DD HH:MM:SS") e podem ser
+    comparados como texto; datas sem hora ("AAAA-MM-DD") também servem de limite.
+    """
+
+    def __init__(self, caminho=CAMINHO_HISTORICO):
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS precos ("
+            " id_produto TEXT NOT NULL,"
+            " timestamp TEXT NOT NULL,"
+            " nome TEXT,"
+            " categoria TEXT,"
+            " loja TEXT,"
+            " canal_venda TEXT,"
+            " preco_base REAL,"
+            " preco_original REAL,"
+            " preco_pix REAL,"
+            " desconto_percentual REAL,"
+            " parcelas_max INTEGER,"
+            " valor_parcela REAL,"
+            " PRIMARY KEY (id_produto, timestamp))"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_precos_categoria ON precos (categoria, timestamp)")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_precos_timestamp ON precos (timestamp)")
+        self._conexao.execute("CREATE TABLE IF NOT EXISTS arquivos_importados (caminho TEXT PRIMARY KEY)")
+        self._conexao.commit()
+
+    def ingerir(self, produtos):
+        """
+        Grava em lote as observações de preço de vários produtos.
+
+        Registros de produtos desaparecidos do modo delta (`alteracao` = "REMOVIDO")
+        não são observações de preço e ficam de fora.
+
+        Args:
+            produtos (Iterable[dict]): Produtos no Schema VIP.
+        Returns:
+            int: Quantidade de observações novas gravadas.
+        """
+
+        linhas = [linha_historico(p) for p in produtos if p.get("alteracao") != "REMOVIDO"]
+        if not linhas:
+            return 0
+        marcadores = ",".join("?" * len(COLUNAS))
+        with self._lock:
+            antes = self._conexao.total_changes
+            self._conexao.executemany(
+                f"INSERT OR IGNORE INTO precos ({', '.join(COLUNAS)}) VALUES ({marcadores})", linhas
+            )
+            self._conexao.commit()
+            return self._conexao.total_changes - antes
+
+    def importar_arquivo(self, caminho):
+        """
+        Importa um arquivo bruto de `data/raw` (JSON indentado antigo ou JSON Lines).
+
+        Arquivos já importados são pulados.
+
+        Args:
+            caminho (str): Arquivo `.json` ou `.jsonl`.
+        Returns:
+            int: Quantidade de observações novas gravadas.
+        """
+
+        chave = os.path.abspath(caminho)
+        with self._lock:
+            if self._conexao.execute("SELECT 1 FROM arquivos_importados WHERE caminho = ?", (chave,)).fetchone():
+                return 0
+
+        with open(caminho, encoding='utf-8') as f:
+            if caminho.endswith(".jsonl"):
+                novos = 0
+                lote = []
+                for linha in f:
+                    if linha.strip():
+                        lote.append(json.loads(linha))
+                    if len(lote) >= 5000:
+                        novos += self.ingerir(lote)
+                        lote = []
+                novos += self.ingerir(lote)
+            else:
+                novos = self.ingerir(json.load(f))
+
+        with self._lock:
+            self._conexao.execute("INSERT OR IGNORE INTO arquivos_importados (caminho) VALUES (?)", (chave,))
+            self._conexao.commit()
+        return novos
+
+    def importar_pasta(self, pasta="data/raw"):
+        """
+        Importação única de todos os arquivos brutos já coletados.
+
+        Args:
+            pasta (str): Pasta com os arquivos `produtos_magalu_*.json(l)`.
+        Returns:
+            int: Quantidade de observações novas gravadas.
+        """
+
+        arquivos = sorted(glob.glob(os.path.join(pasta, "*.json")) + glob.glob(os.path.join(pasta, "*.jsonl")))
+        total = 0
+        for caminho in arquivos:
+            try:
+                novos = self.importar_arquivo(caminho)
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"⚠️ Erro ao importar {caminho}: {e}")
+                continue
+            total += novos
+            logging.info(f"📥 {caminho}: {novos} observações importadas.")
+        return total
+
+    def ultimo_preco(self, id_produto):
+        """
+        Última observação de um produto.
+
+        Returns:
+            dict | None: Linha completa da observação mais recente, ou None.
+        """
+
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT * FROM precos WHERE id_produto = ? ORDER BY timestamp DESC LIMIT 1", (id_produto,)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def minimo_maximo(self, id_produto, inicio=None, fim=None):
+        """
+        Menor e maior `preco_base` de um produto em uma janela.
+
+        Args:
+            id_produto (str): Produto.
+            inicio (str, optional): Limite inferior (inclusivo) do timestamp.
+            fim (str, optional): Limite superior (exclusivo) do timestamp.
+        Returns:
+            dict: `minimo`, `maximo` e `observacoes` (None/0 se não há dados na janela).
+        """
+
+        filtro, parametros = self._janela(inicio, fim)
+        with self._lock:
+            linha = self._conexao.execute(
+                f"SELECT MIN(preco_base), MAX(preco_base), COUNT(*) FROM precos WHERE id_produto = ?{filtro}",
+                (id_produto, *parametros)
+            ).fetchone()
+        return {"minimo": linha[0], "maximo": linha[1], "observacoes": linha[2]}
+
+    def maiores_descontos(self, inicio=None, fim=None, categoria=None, limite=20):
+        """
+        Produtos com os maiores `descontos.percentual` na janela (última observação de cada um).
+
+        Args:
+            inicio (str, optional): Limite inferior (inclusivo) do timestamp.
+            fim (str, optional): Limite superior (exclusivo) do timestamp.
+            categoria (str, optional): Restringe a uma categoria.
+            limite (int): Quantidade máxima de produtos.
+        Returns:
+            list[dict]: Observações ordenadas do maior para o menor desconto.
+        """
+
+        filtro, parametros = self._janela(inicio, fim)
+        if categoria is not None:
+            filtro += " AND categoria = ?"
+            parametros.append(categoria)
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT p.* FROM precos p JOIN ("
+                f" SELECT id_produto, MAX(timestamp) AS timestamp FROM precos WHERE 1 = 1{filtro} GROUP BY id_produto"
+                ") u USING (id_produto, timestamp)"
+                " ORDER BY p.desconto_percentual DESC, p.id_produto LIMIT ?",
+                (*parametros, limite)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def quedas_de_preco(self, inicio, fim=None, percentual_minimo=10.0, categoria=None, limite=100):
+        """
+        Produtos cujo preço atual na janela caiu pelo menos `percentual_minimo` em
+        relação ao maior preço observado na mesma janela ("o que caiu mais de 10%
+        nesta semana").
+
+        Args:
+            inicio (str): Limite inferior (inclusivo) do timestamp.
+            fim (str, optional): Limite superior (exclusivo) do timestamp.
+            percentual_minimo (float): Queda mínima, em %.
+            categoria (str, optional): Restringe a uma categoria.
+            limite (int): Quantidade máxima de produtos.
+        Returns:
+            list[dict]: `id_produto`, `nome`, `categoria`, `preco_maximo`, `preco_atual`
+                e `queda_percentual`, da maior para a menor queda.
+        """
+
+        filtro, parametros = self._janela(inicio, fim)
+        if categoria is not None:
+            filtro += " AND categoria = ?"
+            parametros.append(categoria)
+        with self._lock:
+            linhas = self._conexao.execute(
+                "WITH janela AS ("
+                f" SELECT * FROM precos WHERE preco_base > 0{filtro}"
+                "), resumo AS ("
+                " SELECT id_produto, MAX(preco_base) AS preco_maximo, MAX(timestamp) AS timestamp"
+                " FROM janela GROUP BY id_produto"
+                ")"
+                " SELECT j.id_produto, j.nome, j.categoria, r.preco_maximo, j.preco_base AS preco_atual,"
+                " ROUND((r.preco_maximo - j.preco_base) * 100.0 / r.preco_maximo, 2) AS queda_percentual"
+                " FROM resumo r JOIN janela j USING (id_produto, timestamp)"
+                " WHERE (r.preco_maximo - j.preco_base) * 100.0 / r.preco_maximo >= ?"
+                " ORDER BY queda_percentual DESC, j.id_produto LIMIT ?",
+                (*parametros, percentual_minimo, limite)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def fechar(self):
+        """Fecha a conexão com o arquivo do histórico."""
+        with self._lock:
+            self._conexao.close()
+
+    @staticmethod
+    def _janela(inicio, fim):
+        filtro = ""
+        parametros = []
+        if inicio is not None:
+            filtro += " AND timestamp >= ?"
+            parametros.append(inicio)
+        if fim is not None:
+            filtro += " AND timestamp < ?"
+            parametros.append(fim)
+        return filtro, parametros
+
+
+if __name__ == "__main__":
+    # Importação única dos arquivos brutos existentes: python -m src.historico [pasta]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    historico = HistoricoPrecos()
+    total = historico.importar_pasta(sys.argv[1] if len(sys.argv) > 1 else "data/raw")
+    historico.fechar()
+    print(f"📚 {total} observações importadas para {CAMINHO_HISTORICO}")
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import threading
+import time
+
+
+class LimitadorAdaptativo:
+    """
+    Token bucket de cortesia com taxa adaptativa.
+
+    Cada requisição consome um token; os tokens são repostos a `taxa` por segundo,
+    até `capacidade`. Respostas saudáveis aumentam a taxa aos poucos (até
+    `taxa_maxima`) e erros ou páginas vazias a reduzem pela metade (até
+    `taxa_minima`), espaçando as requisições quando o site começa a reclamar.
+    """
+
+    def __init__(self, taxa=0.5, capacidade=1, taxa_minima=0.1, taxa_maxima=2.0,
+                 fator_aumento=1.1, fator_reducao=0.5):
+        """
+        Args:
+            taxa (float): Requisições por segundo iniciais.
+            capacidade (int): Rajada máxima (tokens acumulados).
+            taxa_minima (float): Piso da taxa após sucessivos erros.
+            taxa_maxima (float): Teto da taxa após sucessivos sucessos.
+            fator_aumento (float): Multiplicador da taxa a cada sucesso.
+            fator_reducao (float): Multiplicador da taxa a cada erro.
+        """
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima
+        self.fator_aumento = fator_aumento
+        self.fator_reducao = fator_reducao
+
+        self._tokens = capacidade
+        self._ultima_reposicao = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reservar(self):
+        """Consome um token e retorna quantos segundos ainda é preciso esperar por ele."""
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ultima_reposicao) * self.taxa)
+            self._ultima_reposicao = agora
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.taxa
+
+    def aguardar(self):
+        """Bloqueia até a próxima requisição estar liberada."""
+        espera = self._reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+    async def aguardar_async(self):
+        """Versão para corrotinas de `aguardar`."""
+        espera = self._reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def registrar_sucesso(self):
+        """Resposta saudável: acelera um pouco."""
+        with self._lock:
+            self.taxa = min(self.taxa_maxima, self.taxa * self.fator_aumento)
+
+    def registrar_falha(self):
+        """Erro ou página vazia: recua."""
+        with self._lock:
+            self.taxa = max(self.taxa_minima, self.taxa * self.fator_reducao)
+        logging.info(f"🐢 Limitador recuou para {self.taxa:.2f} req/s")
@@ -0,0 +1,229 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PASTA_METRICAS = "data/metricas"
+ARQUIVO_PROMETHEUS = os.path.join(PASTA_METRICAS, "magalu_scraper.prom")
+
+# Prefixo das séries no textfile do Prometheus
+PREFIXO = "magalu_scraper"
+
+
+def percentil(valores, p):
+    """
+    Percentil pelo método do posto mais próximo.
+
+    Args:
+        valores (list[float]): Amostras já ordenadas.
+        p (float): Percentil entre 0 e 100.
+    Returns:
+        float | None: Valor do percentil (None sem amostras).
+    """
+
+    if not valores:
+        return None
+    posto = max(1, math.ceil(p / 100 * len(valores)))
+    return valores[posto - 1]
+
+
+def _resumir(valores):
+    ordenados = sorted(valores)
+    return {
+        "contagem": len(ordenados),
+        "soma": sum(ordenados),
+        "p50": percentil(ordenados, 50),
+        "p95": percentil(ordenados, 95),
+        "max": ordenados[-1] if ordenados else None
+    }
+
+
+class Metricas:
+    """
+    Contadores e histogramas de uma execução, seguros entre threads.
+
+    - `cronometrar(estagio)`: duração de cada passagem por um estágio (busca,
+      parse, regras, ia, montagem, gravacao);
+    - `observar(nome, valor)`: distribuição de um valor (ex.: cards por página);
+    - `incrementar(nome)`: contadores (páginas, cards, títulos enviados à IA, acertos
+      do cache...).
+
+    O custo por medição é um `perf_counter` e um append sob lock; os pontos
+    medidos são por página ou por lote, não por card.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Zera tudo e marca o início de uma nova execução."""
+        with self._lock:
+            self.inicio = time.time()
+            self.duracoes = {}
+            self.histogramas = {}
+            self.contadores = {}
+
+    @contextmanager
+    def cronometrar(self, estagio):
+        """Mede o bloco `with` como uma passagem por `estagio`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            with self._lock:
+                self.duracoes.setdefault(estagio, []).append(duracao)
+
+    def observar(self, nome, valor):
+        """Registra uma amostra do histograma `nome`."""
+        with self._lock:
+            self.histogramas.setdefault(nome, []).append(valor)
+
+    def incrementar(self, nome, valor=1):
+        """Soma `valor` ao contador `nome`."""
+        if not valor:
+            return
+        with self._lock:
+            self.contadores[nome] = self.contadores.get(nome, 0) + valor
+
+    def resumo(self):
+        """
+        Resumo da execução até aqui.
+
+        Returns:
+            dict: `duracao_s`, `estagios` (contagem, total e p50/p95/máximo em ms),
+                `histogramas` (contagem, média, p50/p95/máximo), `contadores` e
+                `taxas` (fallback de IA por card e acerto do cache de classificação).
+        """
+
+        with self._lock:
+            duracoes = {nome: list(v) for nome, v in self.duracoes.items()}
+            histogramas = {nome: list(v) for nome, v in self.histogramas.items()}
+            contadores = dict(self.contadores)
+            inicio = self.inicio
+
+        estagios = {}
+        for nome, valores in sorted(duracoes.items()):
+            r = _resumir(valores)
+            estagios[nome] = {
+                "contagem": r["contagem"],
+                "total_s": round(r["soma"], 3),
+                "p50_ms": round(r["p50"] * 1000, 2),
+                "p95_ms": round(r["p95"] * 1000, 2),
+                "max_ms": round(r["max"] * 1000, 2)
+            }
+
+        resumo_histogramas = {}
+        for nome, valores in sorted(histogramas.items()):
+            r = _resumir(valores)
+            resumo_histogramas[nome] = {
+                "contagem": r["contagem"],
+                "media": round(r["soma"] / r["contagem"], 2),
+                "p50": r["p50"],
+                "p95": r["p95"],
+                "max": r["max"]
+            }
+
+        cards = contadores.get("cards", 0)
+        consultas_cache = contadores.get("cache_ia_acertos", 0) + contadores.get("cache_ia_falhas", 0)
+        return {
+            "inicio": datetime.fromtimestamp(inicio).strftime("%Y-%m-%d %H:%M:%S"),
+            "duracao_s": round(time.time() - inicio, 3),
+            "estagios": estagios,
+            "histogramas": resumo_histogramas,
+            "contadores": dict(sorted(contadores.items())),
+            "taxas": {
+                "fallback_ia": round(contadores.get("ia_titulos", 0) / cards, 4) if cards else 0.0,
+                "acerto_cache_ia": round(contadores.get("cache_ia_acertos", 0) / consultas_cache, 4) if consultas_cache else 0.0
+            }
+        }
+
+    def texto_prometheus(self, resumo=None):
+        """
+        Resumo no formato texto do Prometheus (coletor textfile do node_exporter).
+
+        Estágios e histogramas viram `summary` com quantis 0.5/0.95; contadores
+        viram `counter` com sufixo `_total`; taxas e duração, `gauge`.
+        """
+
+        resumo = resumo or self.resumo()
+        with self._lock:
+            duracoes = {nome: sorted(v) for nome, v in self.duracoes.items()}
+            histogramas = {nome: sorted(v) for nome, v in self.histogramas.items()}
+
+        linhas = [
+            f"# HELP {PREFIXO}_estagio_duracao_segundos Duração de cada passagem por um estágio da coleta.",
+            f"# TYPE {PREFIXO}_estagio_duracao_segundos summary"
+        ]
+        for estagio, valores in sorted(duracoes.items()):
+            rotulo = f'estagio="{estagio}"'
+            for quantil in (50, 95):
+                linhas.append(f'{PREFIXO}_estagio_duracao_segundos{{{rotulo},quantile="{quantil / 100}"}} '
+                              f'{percentil(valores, quantil):.6f}')
+            linhas.append(f"{PREFIXO}_estagio_duracao_segundos_sum{{{rotulo}}} {sum(valores):.6f}")
+            linhas.append(f"{PREFIXO}_estagio_duracao_segundos_count{{{rotulo}}} {len(valores)}")
+
+        for nome, valores in sorted(histogramas.items()):
+            linhas.append(f"# TYPE {PREFIXO}_{nome} summary")
+            for quantil in (50, 95):
+                linhas.append(f'{PREFIXO}_{nome}{{quantile="{quantil / 100}"}} {percentil(valores, quantil)}')
+            linhas.append(f"{PREFIXO}_{nome}_sum {sum(valores)}")
+            linhas.append(f"{PREFIXO}_{nome}_count {len(valores)}")
+
+        for nome, valor in resumo["contadores"].items():
+            linhas.append(f"# TYPE {PREFIXO}_{nome}_total counter")
+            linhas.append(f"{PREFIXO}_{nome}_total {valor}")
+
+        for nome, valor in resumo["taxas"].items():
+            linhas.append(f"# TYPE {PREFIXO}_taxa_{nome} gauge")
+            linhas.append(f"{PREFIXO}_taxa_{nome} {valor}")
+
+        linhas.append(f"# TYPE {PREFIXO}_execucao_duracao_segundos gauge")
+        linhas.append(f"{PREFIXO}_execucao_duracao_segundos {resumo['duracao_s']}")
+        linhas.append(f"# TYPE {PREFIXO}_execucao_fim_timestamp_segundos gauge")
+        linhas.append(f"{PREFIXO}_execucao_fim_timestamp_segundos {time.time():.0f}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, pasta=PASTA_METRICAS, caminho_prometheus=ARQUIVO_PROMETHEUS):
+        """
+        Grava o resumo da execução em JSON (um arquivo por execução) e o textfile do
+        Prometheus (sobrescrito a cada execução, de forma atômica).
+
+        Args:
+            pasta (str): Pasta dos resumos JSON.
+            caminho_prometheus (str, optional): Arquivo `.prom`; None não grava.
+        Returns:
+            str: Caminho do resumo JSON.
+        """
+
+        resumo = self.resumo()
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f"metricas_{datetime.fromtimestamp(self.inicio).strftime('%Y%m%d_%H%M%S')}.json")
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=4)
+
+        if caminho_prometheus:
+            pasta_prometheus = os.path.dirname(caminho_prometheus)
+            if pasta_prometheus:
+                os.makedirs(pasta_prometheus, exist_ok=True)
+            # O node_exporter pode ler o arquivo a qualquer momento: nunca pela metade
+            temporario = caminho_prometheus + ".tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(self.texto_prometheus(resumo))
+            os.replace(temporario, caminho_prometheus)
+
+        estagios = ", ".join(f"{nome} p50={e['p50_ms']:.0f}ms p95={e['p95_ms']:.0f}ms"
+                             for nome, e in resumo["estagios"].items())
+        logging.info(f"📊 Métricas em {caminho}: {estagios or 'nenhum estágio medido'} | "
+                     f"fallback de IA {resumo['taxas']['fallback_ia']:.1%}.")
+        return caminho
+
+
+# Registro único do processo, alimentado pelos fetchers, parsers, classificador e
+# gravação; `main.executar` zera no início e grava ao final de cada execução
+metricas = Metricas()
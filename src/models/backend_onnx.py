@@ -0,0 +1,316 @@
+"""
+Backend ONNX Runtime (int8) do classificador zero-shot.
+
+Uso:
+    python -m src.models.backend_onnx exportar                # exporta e quantiza o mDeBERTa em data/modelos/
+    python -m src.models.backend_onnx exportar --verificar    # idem, e já roda a paridade
+    python -m src.models.backend_onnx paridade                # compara scores e decisões com o PyTorch
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+CAMINHO_ONNX = "data/modelos/mdeberta-onnx-int8"
+ARQUIVO_ONNX = "model_quantized.onnx"
+
+# Títulos que as regras não resolvem (vão para a IA), usados na checagem de paridade
+TITULOS_PARIDADE = (
+    "Fone de Ouvido Bluetooth JBL Tune 520BT Sem Fio",
+    "Cartão de Memória MicroSD 128GB Classe 10",
+    "Caixa de Som Portátil JBL Go 3 Azul",
+    "Headset Gamer Redragon Zeus X RGB",
+    "Teclado Bluetooth Logitech K380 Multi-Device",
+    "Mouse Sem Fio Logitech M170",
+    "Pendrive Sandisk Ultra 64GB USB 3.0",
+    "Webcam Full HD Logitech C920",
+    "Hub USB-C 7 em 1 Baseus",
+    "Microfone de Lapela Sem Fio Boya",
+    "Leitor de Cartão USB-C Multiportas",
+    "Caneta Touch Universal Stylus",
+    "Mini Ventilador Portátil USB",
+    "Lente Olho de Peixe Clip Universal",
+    "Luva Gamer Dedeira Antissuor Para Jogos Mobile",
+    "Lanterna Tática LED Recarregável",
+)
+
+
+def indice_entailment(label2id):
+    """
+    Índice da classe "entailment" na saída do modelo NLI (mesma busca do
+    pipeline zero-shot do transformers).
+
+    Returns:
+        int: Índice da classe, ou -1 se nenhum rótulo começa com "entail".
+    """
+    for rotulo, indice in label2id.items():
+        if rotulo.lower().startswith("entail"):
+            return indice
+    return -1
+
+
+def resultado_zero_shot(sequencia, rotulos, logits, entailment, multi_label=False):
+    """
+    Converte os logits NLI de um título (um par por rótulo) no resultado do
+    pipeline zero-shot: rótulos e scores em ordem decrescente de score.
+
+    Args:
+        sequencia (str): Título classificado.
+        rotulos (list[str]): Rótulos candidatos.
+        logits (np.ndarray): Logits de formato (rótulos, classes NLI).
+        entailment (int): Índice da classe "entailment".
+        multi_label (bool): Cada rótulo avaliado de forma independente (softmax
+            entre contradição e entailment); senão, softmax do entailment entre rótulos.
+    Returns:
+        dict: `sequence`, `labels` e `scores`, como no transformers.
+    """
+
+    logits = np.asarray(logits, dtype=np.float64)
+    if multi_label or len(rotulos) == 1:
+        contradicao = -1 if entailment == 0 else 0
+        pares = logits[:, [contradicao, entailment]]
+        exp = np.exp(pares - pares.max(axis=1, keepdims=True))
+        scores = exp[:, 1] / exp.sum(axis=1)
+    else:
+        entail = logits[:, entailment]
+        exp = np.exp(entail - entail.max())
+        scores = exp / exp.sum()
+
+    ordem = list(reversed(scores.argsort()))
+    return {
+        "sequence": sequencia,
+        "labels": [rotulos[i] for i in ordem],
+        "scores": [float(scores[i]) for i in ordem]
+    }
+
+
+class PipelineOnnx:
+    """
+    Substituto do `pipeline("zero-shot-classification")` do transformers que roda
+    o mDeBERTa exportado e quantizado (int8) no ONNX Runtime, só em CPU.
+
+    Aceita os mesmos argumentos e devolve o mesmo formato (dict para um título,
+    lista de dicts para vários), então a regra de decisão do `ProductClassifier`
+    não muda.
+    """
+
+    def __init__(self, caminho=CAMINHO_ONNX, threads=None, tokenizer=None, label2id=None):
+        """
+        Args:
+            caminho (str): Pasta gerada por `exportar` (modelo int8, tokenizer e config).
+            threads (int, optional): Threads intra-op do ONNX Runtime (padrão: núcleos físicos).
+            tokenizer (Callable, optional): Tokenizer de pares (premissa, hipótese) com
+                `return_tensors="np"`; o salvo em `caminho` por padrão (testes injetam um leve).
+            label2id (dict, optional): Classes NLI do modelo; as do config em `caminho` por padrão.
+        """
+        import onnxruntime as ort
+
+        arquivo = os.path.join(caminho, ARQUIVO_ONNX)
+        if not os.path.exists(arquivo):
+            raise FileNotFoundError(f"{arquivo} não existe. Gere com: python -m src.models.backend_onnx exportar")
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opcoes.inter_op_num_threads = 1
+        if threads:
+            opcoes.intra_op_num_threads = threads
+
+        self.sessao = ort.InferenceSession(arquivo, sess_options=opcoes, providers=["CPUExecutionProvider"])
+        self.entradas = [entrada.name for entrada in self.sessao.get_inputs()]
+        if tokenizer is None or label2id is None:
+            from transformers import AutoConfig, AutoTokenizer
+
+            tokenizer = tokenizer or AutoTokenizer.from_pretrained(caminho)
+            label2id = label2id or AutoConfig.from_pretrained(caminho).label2id
+        self.tokenizer = tokenizer
+        self.entailment = indice_entailment(label2id)
+
+    def __call__(self, sequencias, candidate_labels, hypothesis_template="This example is {}.",
+                 multi_label=False, batch_size=16):
+        unica = isinstance(sequencias, str)
+        if unica:
+            sequencias = [sequencias]
+        rotulos = list(candidate_labels)
+        hipoteses = [hypothesis_template.format(rotulo) for rotulo in rotulos]
+        pares = [(sequencia, hipotese) for sequencia in sequencias for hipotese in hipoteses]
+
+        blocos = []
+        for inicio in range(0, len(pares), batch_size):
+            bloco = pares[inicio:inicio + batch_size]
+            codificado = self.tokenizer(
+                [premissa for premissa, _ in bloco], [hipotese for _, hipotese in bloco],
+                padding=True, truncation="only_first", return_tensors="np"
+            )
+            blocos.append(self.sessao.run(None, {nome: codificado[nome].astype(np.int64) for nome in self.entradas})[0])
+        logits = np.concatenate(blocos).reshape(len(sequencias), len(rotulos), -1)
+
+        resultados = [resultado_zero_shot(sequencia, rotulos, logits[i], self.entailment, multi_label)
+                      for i, sequencia in enumerate(sequencias)]
+        return resultados[0] if unica else resultados
+
+
+def exportar(destino=CAMINHO_ONNX, modelo=None, opset=17):
+    """
+    Exporta o modelo NLI para ONNX e quantiza os pesos para int8 (quantização
+    dinâmica). Grava também tokenizer e config, tudo o que o `PipelineOnnx` precisa.
+
+    Requer torch, transformers, onnx e onnxruntime (só na exportação).
+
+    Args:
+        destino (str): Pasta de saída.
+        modelo (str, optional): Modelo do Hugging Face (padrão: `ProductClassifier.MODELO`).
+        opset (int): Versão do opset ONNX.
+    Returns:
+        str: Caminho do modelo quantizado.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    from src.models.classifier import ProductClassifier
+
+    modelo = modelo or ProductClassifier.MODELO
+    os.makedirs(destino, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(modelo)
+    rede = AutoModelForSequenceClassification.from_pretrained(modelo).eval()
+
+    exemplo = tokenizer(["Capa iPhone 15"], ["Este produto é um Tablet"], return_tensors="pt")
+    caminho_fp32 = os.path.join(destino, "model.onnx")
+    logging.info(f"📦 Exportando {modelo} para ONNX...")
+    with torch.no_grad():
+        torch.onnx.export(
+            rede, (exemplo["input_ids"], exemplo["attention_mask"]), caminho_fp32,
+            input_names=["input_ids", "attention_mask"], output_names=["logits"],
+            dynamic_axes={"input_ids": {0: "lote", 1: "sequencia"}, "attention_mask": {0: "lote", 1: "sequencia"},
+                          "logits": {0: "lote"}},
+            opset_version=opset, dynamo=False
+        )
+
+    caminho_int8 = os.path.join(destino, ARQUIVO_ONNX)
+    logging.info("🗜️ Quantizando os pesos para int8...")
+    quantize_dynamic(caminho_fp32, caminho_int8, weight_type=QuantType.QInt8)
+    os.remove(caminho_fp32)
+
+    tokenizer.save_pretrained(destino)
+    rede.config.save_pretrained(destino)
+    logging.info(f"✅ Modelo int8 salvo em {caminho_int8} ({os.path.getsize(caminho_int8) / 2**20:.0f} MiB).")
+    return caminho_int8
+
+
+def _medir_backend(classificador, titulos):
+    classificador.classifier  # carga fora da medição de latência
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:  # Windows
+        rss = float("nan")
+    inicio = time.perf_counter()
+    resultados = [classificador.classifier(t, classificador.categorias_alvo,
+                                           hypothesis_template=classificador.TEMPLATE_HIPOTESE, multi_label=True)
+                  for t in titulos]
+    ms_por_titulo = (time.perf_counter() - inicio) / len(titulos) * 1000
+    return resultados, ms_por_titulo, rss
+
+
+def verificar_paridade(titulos=TITULOS_PARIDADE, caminho=CAMINHO_ONNX, threads=None,
+                       tolerancia_score=0.05, concordancia_minima=0.9):
+    """
+    Compara o backend ONNX int8 com o PyTorch nos mesmos títulos: diferença dos
+    scores por rótulo e concordância da categoria final (mesma `_decidir`).
+
+    O ONNX é carregado primeiro, então o pico de memória (RSS) medido depois dele
+    é só dele; o do PyTorch inclui os dois.
+
+    Args:
+        titulos (Iterable[str]): Títulos avaliados.
+        caminho (str): Pasta do modelo exportado.
+        threads (int, optional): Threads intra-op do ONNX Runtime.
+        tolerancia_score (float): Maior diferença absoluta de score aceita.
+        concordancia_minima (float): Fração mínima de títulos com a mesma categoria.
+    Returns:
+        dict: Relatório com diferenças, concordância, divergências, latência por
+            título (ms) e pico de RSS (MiB) de cada backend, e `aprovado`.
+    """
+    from src.models.classifier import ProductClassifier
+
+    titulos = list(titulos)
+    onnx = ProductClassifier(backend="onnx", caminho_onnx=caminho, threads=threads)
+    resultados_onnx, ms_onnx, rss_onnx = _medir_backend(onnx, titulos)
+    pytorch = ProductClassifier(backend="pytorch")
+    resultados_pytorch, ms_pytorch, rss_total = _medir_backend(pytorch, titulos)
+
+    relatorio = comparar_resultados(titulos, resultados_onnx, resultados_pytorch, onnx._decidir,
+                                    tolerancia_score=tolerancia_score, concordancia_minima=concordancia_minima)
+    relatorio["ms_por_titulo"] = {"pytorch": round(ms_pytorch, 1), "onnx": round(ms_onnx, 1)}
+    relatorio["pico_rss_mib"] = {"onnx": round(rss_onnx), "pytorch_mais_onnx": round(rss_total)}
+    return relatorio
+
+
+def comparar_resultados(titulos, resultados_onnx, resultados_pytorch, decidir,
+                        tolerancia_score=0.05, concordancia_minima=0.9):
+    """
+    Parte da paridade que independe dos modelos: diferença dos scores por rótulo e
+    concordância da categoria final entre os resultados zero-shot dos dois backends.
+
+    Args:
+        titulos (list[str]): Títulos avaliados.
+        resultados_onnx (list[dict]): Resultados do backend ONNX, um por título.
+        resultados_pytorch (list[dict]): Resultados de referência (PyTorch).
+        decidir (Callable[[dict], str]): Regra de decisão (`ProductClassifier._decidir`).
+        tolerancia_score (float): Maior diferença absoluta de score aceita.
+        concordancia_minima (float): Fração mínima de títulos com a mesma categoria.
+    Returns:
+        dict: `titulos`, `diferenca_maxima`, `diferenca_media`, `concordancia`,
+            `divergencias` e `aprovado`.
+    """
+
+    diferencas = []
+    divergencias = []
+    for titulo, r_onnx, r_pytorch in zip(titulos, resultados_onnx, resultados_pytorch):
+        scores_onnx = dict(zip(r_onnx["labels"], r_onnx["scores"]))
+        diferencas.extend(abs(scores_onnx[rotulo] - score) for rotulo, score in zip(r_pytorch["labels"], r_pytorch["scores"]))
+        categoria_onnx, categoria_pytorch = decidir(r_onnx), decidir(r_pytorch)
+        if categoria_onnx != categoria_pytorch:
+            divergencias.append({"titulo": titulo, "pytorch": categoria_pytorch, "onnx": categoria_onnx})
+
+    concordancia = 1 - len(divergencias) / len(titulos)
+    return {
+        "titulos": len(titulos),
+        "diferenca_maxima": round(max(diferencas), 4),
+        "diferenca_media": round(float(np.mean(diferencas)), 4),
+        "concordancia": round(concordancia, 4),
+        "divergencias": divergencias,
+        "aprovado": max(diferencas) <= tolerancia_score and concordancia >= concordancia_minima
+    }
+
+
+def executar(argv=None):
+    parser = argparse.ArgumentParser(description="Backend ONNX int8 do classificador zero-shot.")
+    parser.add_argument("comando", choices=("exportar", "paridade"))
+    parser.add_argument("--caminho", default=CAMINHO_ONNX, help="pasta do modelo ONNX")
+    parser.add_argument("--threads", type=int, default=None, help="threads intra-op do ONNX Runtime")
+    parser.add_argument("--verificar", action="store_true",
+                        help="após exportar, roda a paridade (carrega também o PyTorch)")
+    argumentos = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if argumentos.comando == "exportar":
+        exportar(argumentos.caminho)
+        if not argumentos.verificar:
+            return 0
+
+    relatorio = verificar_paridade(caminho=argumentos.caminho, threads=argumentos.threads)
+    print(f"🔬 Paridade em {relatorio['titulos']} títulos: diferença máxima de score {relatorio['diferenca_maxima']}, "
+          f"média {relatorio['diferenca_media']}, concordância {relatorio['concordancia']:.0%}")
+    print(f"⏱️ ms/título: PyTorch {relatorio['ms_por_titulo']['pytorch']} | ONNX int8 {relatorio['ms_por_titulo']['onnx']}")
+    print(f"🧠 Pico de RSS: ONNX {relatorio['pico_rss_mib']['onnx']} MiB | ONNX + PyTorch {relatorio['pico_rss_mib']['pytorch_mais_onnx']} MiB")
+    for divergencia in relatorio["divergencias"]:
+        print(f"   ≠ {divergencia['titulo']}: PyTorch={divergencia['pytorch']} ONNX={divergencia['onnx']}")
+    print("✅ Paridade aprovada." if relatorio["aprovado"] else "❌ Paridade reprovada.")
+    return 0 if relatorio["aprovado"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(executar())
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+
+
+def normalizar_titulo(titulo):
+    """
+    Normaliza o título usado como chave do cache.
+
+    Caixa, espaços duplicados e o espaço invisível (\xa0) não mudam a categoria,
+    então variações do mesmo anúncio apontam para a mesma entrada.
+
+    Args:
+        titulo (str): Título bruto do produto.
+    Returns:
+        str: Título em minúsculas com espaços colapsados.
+    """
+
+    return " ".join(titulo.replace('\xa0', ' ').lower().split())
+
+
+class CacheClassificacao:
+    """
+    Cache persistente (SQLite) das categorias devolvidas pela IA.
+
+    A chave é o hash do título normalizado combinado com a `assinatura` do
+    classificador (modelo, categorias e thresholds). Se a assinatura gravada no
+    arquivo for diferente da atual, o cache é esvaziado na abertura, então trocar
+    o modelo ou `categorias_alvo` invalida tudo automaticamente.
+
+    A remoção é LRU: cada leitura atualiza o relógio lógico da entrada e, ao
+    passar de `max_itens`, as entradas menos usadas recentemente são descartadas.
+    """
+
+    def __init__(self, caminho="data/cache/classificacoes.sqlite", assinatura="", max_itens=100_000):
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+
+        self.caminho = caminho
+        self.assinatura = assinatura
+        self.max_itens = max_itens
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS classificacoes ("
+            " chave TEXT PRIMARY KEY,"
+            " categoria TEXT NOT NULL,"
+            " acesso INTEGER NOT NULL)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_classificacoes_acesso ON classificacoes (acesso)")
+        self._conexao.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+
+        linha = self._conexao.execute("SELECT valor FROM meta WHERE chave = 'assinatura'").fetchone()
+        if linha is None or linha[0] != assinatura:
+            if linha is not None:
+                logging.info("♻️ Assinatura do classificador mudou. Invalidando cache de classificação.")
+            self._conexao.execute("DELETE FROM classificacoes")
+            self._conexao.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('assinatura', ?)", (assinatura,))
+        self._conexao.commit()
+
+        self._relogio = self._conexao.execute("SELECT COALESCE(MAX(acesso), 0) FROM classificacoes").fetchone()[0]
+
+    def _chave(self, titulo):
+        return hashlib.sha1(f"{self.assinatura}\x1f{normalizar_titulo(titulo)}".encode('utf-8')).hexdigest()
+
+    def obter(self, titulo):
+        """Retorna a categoria em cache para o título, ou None em caso de miss."""
+        return self.obter_varios([titulo]).get(titulo)
+
+    def obter_varios(self, titulos):
+        """
+        Consulta vários títulos de uma vez.
+
+        Args:
+            titulos (list[str]): Títulos a consultar.
+        Returns:
+            dict[str, str]: Apenas os títulos encontrados (hits), mapeados para a categoria.
+        """
+
+        chaves = {}
+        for titulo in titulos:
+            chaves.setdefault(self._chave(titulo), []).append(titulo)
+
+        encontrados = {}
+        with self._lock:
+            lista = list(chaves)
+            # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+            for inicio in range(0, len(lista), 500):
+                bloco = lista[inicio:inicio + 500]
+                marcadores = ",".join("?" * len(bloco))
+                for chave, categoria in self._conexao.execute(
+                    f"SELECT chave, categoria FROM classificacoes WHERE chave IN ({marcadores})", bloco
+                ):
+                    for titulo in chaves[chave]:
+                        encontrados[titulo] = categoria
+
+            if encontrados:
+                self._relogio += 1
+                acessadas = [(self._relogio, self._chave(t)) for t in encontrados]
+                self._conexao.executemany("UPDATE classificacoes SET acesso = ? WHERE chave = ?", acessadas)
+                self._conexao.commit()
+
+            self.hits += sum(1 for t in titulos if t in encontrados)
+            self.misses += sum(1 for t in titulos if t not in encontrados)
+        return encontrados
+
+    def salvar(self, titulo, categoria):
+        """Grava a categoria de um título."""
+        self.salvar_varios([(titulo, categoria)])
+
+    def salvar_varios(self, pares):
+        """
+        Grava vários pares (título, categoria) e aplica a remoção LRU se necessário.
+
+        Args:
+            pares (list[tuple[str, str]]): Títulos e categorias decididas pela IA.
+        """
+
+        if not pares:
+            return
+        with self._lock:
+            self._relogio += 1
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO classificacoes (chave, categoria, acesso) VALUES (?, ?, ?)",
+                [(self._chave(titulo), categoria, self._relogio) for titulo, categoria in pares]
+            )
+            total = self._conexao.execute("SELECT COUNT(*) FROM classificacoes").fetchone()[0]
+            excedente = total - self.max_itens
+            if excedente > 0:
+                self._conexao.execute(
+                    "DELETE FROM classificacoes WHERE chave IN "
+                    "(SELECT chave FROM classificacoes ORDER BY acesso ASC LIMIT ?)",
+                    (excedente,)
+                )
+            self._conexao.commit()
+
+    def estatisticas(self):
+        """Retorna hits, misses, taxa de acerto e tamanho atual do cache."""
+        with self._lock:
+            itens = self._conexao.execute("SELECT COUNT(*) FROM classificacoes").fetchone()[0]
+        consultas = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": round(self.hits / consultas, 4) if consultas else 0.0,
+            "itens": itens
+        }
+
+    def fechar(self):
+        """Fecha a conexão com o arquivo do cache."""
+        with self._lock:
+            self._conexao.close()
@@ -0,0 +1,362 @@
+"""
+Classificador rápido da cascata: TF-IDF de n-gramas de caracteres com uma
+regressão logística multinomial, treinado nos títulos já rotulados pelas regras
+e pelo mDeBERTa nas coletas anteriores (`data/raw`).
+
+Fica na frente do zero-shot: responde em microssegundos e só escala para o
+mDeBERTa quando a probabilidade da classe vencedora fica abaixo do limiar.
+
+    python -m src.models.cascata treinar     # treina (ou atualiza) e mostra a concordância
+    python -m src.models.cascata relatorio   # concordância do modelo salvo com a IA
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import numpy as np
+from src.models.cache import normalizar_titulo
+from src.parsers import categorizar_por_regras
+
+CAMINHO_CASCATA = "data/modelos/cascata_tfidf.npz"
+
+# Probabilidade mínima para a cascata responder sem o mDeBERTa
+LIMIAR_CASCATA = 0.9
+
+TAMANHOS_NGRAMA = (2, 3, 4)
+
+# Limiares avaliados no relatório de concordância
+LIMIARES_RELATORIO = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+def ngramas(titulo, tamanhos=TAMANHOS_NGRAMA):
+    """
+    N-gramas de caracteres do título normalizado, com um espaço em cada ponta
+    para que início e fim de título virem n-gramas próprios.
+
+    Args:
+        titulo (str): Título bruto do produto.
+        tamanhos (tuple[int]): Tamanhos dos n-gramas.
+    Returns:
+        list[str]: N-gramas na ordem em que aparecem (com repetições).
+    """
+
+    texto = f" {normalizar_titulo(titulo)} "
+    return [texto[i:i + n] for n in tamanhos for i in range(len(texto) - n + 1)]
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class ClassificadorRapido:
+    """
+    TF-IDF de n-gramas de caracteres + regressão logística, só com numpy.
+
+    Os títulos viram uma matriz esparsa em formato de coordenadas (linha, coluna,
+    valor), com TF-IDF normalizado (L2) por título. Como cada título tem poucas
+    dezenas de n-gramas, os logits e o gradiente saem com `np.bincount` por
+    classe, sem montar a matriz densa do vocabulário inteiro.
+    """
+
+    def __init__(self, vocabulario, idf, pesos, vieses, classes, relatorio=None):
+        self.vocabulario = vocabulario
+        self.idf = idf
+        self.pesos = pesos
+        self.vieses = vieses
+        self.classes = list(classes)
+        self.relatorio = relatorio or {}
+
+    @classmethod
+    def treinar(cls, titulos, categorias, min_df=2, max_ngramas=50_000, epocas=200, taxa=0.05, l2=1e-5):
+        """
+        Ajusta o vocabulário, o IDF e a regressão logística (Adam, lote completo).
+
+        Args:
+            titulos (list[str]): Títulos de treino.
+            categorias (list[str]): Categoria de cada título.
+            min_df (int): Títulos mínimos em que um n-grama aparece para entrar no vocabulário.
+            max_ngramas (int): Tamanho máximo do vocabulário (os mais frequentes).
+            epocas (int): Passos de otimização.
+            taxa (float): Taxa de aprendizado do Adam.
+            l2 (float): Regularização L2 dos pesos.
+        Returns:
+            ClassificadorRapido: Modelo treinado.
+        """
+
+        if not titulos:
+            raise ValueError("Nenhum título rotulado para treinar a cascata.")
+
+        frequencias = {}
+        for titulo in titulos:
+            for ngrama in set(ngramas(titulo)):
+                frequencias[ngrama] = frequencias.get(ngrama, 0) + 1
+        selecionados = sorted((f for f in frequencias.items() if f[1] >= min_df), key=lambda f: (-f[1], f[0]))
+        selecionados = selecionados[:max_ngramas]
+        vocabulario = {ngrama: i for i, (ngrama, _) in enumerate(selecionados)}
+        documentos = np.array([df for _, df in selecionados], dtype=np.float64)
+        idf = np.log((1 + len(titulos)) / (1 + documentos)) + 1
+
+        classes = sorted(set(categorias))
+        indice_classe = {c: i for i, c in enumerate(classes)}
+        alvo = np.zeros((len(titulos), len(classes)))
+        alvo[np.arange(len(titulos)), [indice_classe[c] for c in categorias]] = 1
+
+        modelo = cls(vocabulario, idf, np.zeros((len(vocabulario), len(classes))), np.zeros(len(classes)), classes)
+        linhas, colunas, valores = modelo._vetorizar(titulos)
+
+        parametros = [modelo.pesos, modelo.vieses]
+        momentos = [np.zeros_like(p) for p in parametros]
+        variancias = [np.zeros_like(p) for p in parametros]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        for passo in range(1, epocas + 1):
+            erro = (_softmax(modelo._logits(linhas, colunas, valores, len(titulos))) - alvo) / len(titulos)
+            gradiente_pesos = np.stack([
+                np.bincount(colunas, weights=valores * erro[linhas, k], minlength=len(vocabulario))
+                for k in range(len(classes))
+            ], axis=1) + l2 * modelo.pesos
+            gradientes = [gradiente_pesos, erro.sum(axis=0)]
+            for p, g, m, v in zip(parametros, gradientes, momentos, variancias):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= taxa * (m / (1 - beta1 ** passo)) / (np.sqrt(v / (1 - beta2 ** passo)) + eps)
+        return modelo
+
+    def _vetorizar(self, titulos):
+        linhas, colunas, valores = [], [], []
+        for linha, titulo in enumerate(titulos):
+            contagens = {}
+            for ngrama in ngramas(titulo):
+                coluna = self.vocabulario.get(ngrama)
+                if coluna is not None:
+                    contagens[coluna] = contagens.get(coluna, 0) + 1
+            if not contagens:
+                continue
+            cols = np.fromiter(contagens.keys(), dtype=np.int64, count=len(contagens))
+            vals = np.fromiter(contagens.values(), dtype=np.float64, count=len(contagens)) * self.idf[cols]
+            linhas.append(np.full(len(cols), linha, dtype=np.int64))
+            colunas.append(cols)
+            valores.append(vals / np.linalg.norm(vals))
+        if not linhas:
+            vazio = np.zeros(0, dtype=np.int64)
+            return vazio, vazio, np.zeros(0)
+        return np.concatenate(linhas), np.concatenate(colunas), np.concatenate(valores)
+
+    def _logits(self, linhas, colunas, valores, quantidade):
+        return np.stack([
+            np.bincount(linhas, weights=valores * self.pesos[colunas, k], minlength=quantidade)
+            for k in range(len(self.classes))
+        ], axis=1) + self.vieses
+
+    def probabilidades(self, titulos):
+        """
+        Returns:
+            np.ndarray: Matriz (títulos x classes) de probabilidades, na ordem de `classes`.
+        """
+        titulos = list(titulos)
+        return _softmax(self._logits(*self._vetorizar(titulos), len(titulos)))
+
+    def prever(self, titulos):
+        """
+        Args:
+            titulos (list[str]): Títulos a classificar.
+        Returns:
+            list[tuple[str, float]]: Categoria mais provável e sua probabilidade, por título.
+        """
+        titulos = list(titulos)
+        if not titulos:
+            return []
+        probabilidades = self.probabilidades(titulos)
+        vencedoras = probabilidades.argmax(axis=1)
+        return [(self.classes[k], float(probabilidades[i, k])) for i, k in enumerate(vencedoras)]
+
+    def salvar(self, caminho=CAMINHO_CASCATA):
+        """Grava o modelo (de forma atômica) em um `.npz`."""
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        ngramas_vocabulario = sorted(self.vocabulario, key=self.vocabulario.get)
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            np.savez_compressed(
+                f, ngramas=np.array(ngramas_vocabulario, dtype=str), idf=self.idf, pesos=self.pesos,
+                vieses=self.vieses, classes=np.array(self.classes, dtype=str),
+                relatorio=np.array(json.dumps(self.relatorio, ensure_ascii=False))
+            )
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho=CAMINHO_CASCATA):
+        """Lê um modelo gravado por `salvar`."""
+        with np.load(caminho) as dados:
+            vocabulario = {str(ngrama): i for i, ngrama in enumerate(dados["ngramas"])}
+            return cls(vocabulario, dados["idf"], dados["pesos"], dados["vieses"],
+                       [str(c) for c in dados["classes"]], json.loads(str(dados["relatorio"])))
+
+
+def _categoria_base(produto):
+    # Em bundles a categoria gravada é "base + Extra" (ver `montar_string_bundle`)
+    categoria = produto.get("categoria") or ""
+    return categoria.split(" + ")[0] if produto.get("is_bundle") else categoria
+
+
+def titulos_rotulados(pasta="data/raw"):
+    """
+    Títulos já classificados nas coletas gravadas em `pasta`.
+
+    A categoria base é a que as regras ou a IA decidiram (sem os extras do
+    bundle). A origem é recalculada com as regras atuais: títulos que nenhuma
+    regra resolve foram rotulados pelo mDeBERTa. Títulos repetidos ficam com o
+    rótulo mais recente.
+
+    Args:
+        pasta (str): Pasta com os arquivos `produtos_magalu_*.json(l)`.
+    Returns:
+        list[tuple[str, str, str]]: (título, categoria base, "regras" ou "ia").
+    """
+
+    por_titulo = {}
+    arquivos = sorted(glob.glob(os.path.join(pasta, "*.json")) + glob.glob(os.path.join(pasta, "*.jsonl")))
+    for caminho in arquivos:
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                registros = [json.loads(l) for l in f if l.strip()] if caminho.endswith(".jsonl") else json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"⚠️ Erro ao ler {caminho}: {e}")
+            continue
+        for registro in registros:
+            produto = registro.get("produto") or {}
+            titulo = produto.get("nome")
+            categoria = _categoria_base(produto)
+            if not titulo or not categoria or registro.get("alteracao") == "REMOVIDO":
+                continue
+            por_titulo[normalizar_titulo(titulo)] = (titulo, categoria)
+
+    return [
+        (titulo, categoria, "regras" if categorizar_por_regras(titulo.lower()) is not None else "ia")
+        for titulo, categoria in por_titulo.values()
+    ]
+
+
+def relatorio_concordancia(modelo, titulos, categorias_ia, limiares=LIMIARES_RELATORIO):
+    """
+    Compara a cascata com as respostas do mDeBERTa em cada limiar.
+
+    Args:
+        modelo (ClassificadorRapido): Cascata avaliada.
+        titulos (list[str]): Títulos rotulados pela IA.
+        categorias_ia (list[str]): Categoria dada pelo mDeBERTa a cada título.
+        limiares (Iterable[float]): Limiares avaliados.
+    Returns:
+        dict: `titulos`, `concordancia_top1` (sem limiar) e, por limiar, a
+            `cobertura` (fração respondida sem o mDeBERTa), a `concordancia` nas
+            respondidas e a `concordancia_final` da cascata completa (as escaladas
+            recebem a resposta do próprio mDeBERTa).
+    """
+
+    previsoes = modelo.prever(titulos)
+    acertos = [categoria == esperada for (categoria, _), esperada in zip(previsoes, categorias_ia)]
+    total = len(titulos)
+    relatorio = {
+        "titulos": total,
+        "concordancia_top1": round(sum(acertos) / total, 4) if total else None,
+        "por_limiar": []
+    }
+    for limiar in limiares:
+        respondidos = [acerto for (_, confianca), acerto in zip(previsoes, acertos) if confianca >= limiar]
+        erros = len(respondidos) - sum(respondidos)
+        relatorio["por_limiar"].append({
+            "limiar": limiar,
+            "cobertura": round(len(respondidos) / total, 4) if total else None,
+            "concordancia": round(sum(respondidos) / len(respondidos), 4) if respondidos else None,
+            "concordancia_final": round(1 - erros / total, 4) if total else None
+        })
+    return relatorio
+
+
+def _validacao(titulo, fracao):
+    # Separação determinística: o mesmo título cai sempre do mesmo lado
+    balde = int(hashlib.sha1(normalizar_titulo(titulo).encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+    return balde < fracao
+
+
+def treinar_cascata(pasta="data/raw", caminho=CAMINHO_CASCATA, fracao_validacao=0.2, **parametros):
+    """
+    Treina (ou atualiza) a cascata com tudo o que já foi coletado.
+
+    Uma fração dos títulos rotulados pela IA fica de fora para medir a
+    concordância com o mDeBERTa; depois o modelo final é treinado com todos os
+    títulos e gravado junto com esse relatório.
+
+    Args:
+        pasta (str): Pasta dos arquivos brutos.
+        caminho (str): Arquivo `.npz` do modelo.
+        fracao_validacao (float): Fração dos títulos da IA usada na avaliação.
+        **parametros: Repassados a `ClassificadorRapido.treinar`.
+    Returns:
+        dict: Relatório de concordância (ver `relatorio_concordancia`), com a
+            contagem de títulos de treino por origem.
+    """
+
+    rotulados = titulos_rotulados(pasta)
+    validacao = [(t, c) for t, c, origem in rotulados if origem == "ia" and _validacao(t, fracao_validacao)]
+    separados = {t for t, _ in validacao}
+    treino = [(t, c) for t, c, _ in rotulados if t not in separados]
+    logging.info(f"🏋️ Treinando a cascata com {len(treino)} títulos ({len(validacao)} da IA reservados para avaliação).")
+
+    relatorio = {"titulos": 0, "concordancia_top1": None, "por_limiar": []}
+    if validacao and treino:
+        avaliado = ClassificadorRapido.treinar([t for t, _ in treino], [c for _, c in treino], **parametros)
+        relatorio = relatorio_concordancia(avaliado, [t for t, _ in validacao], [c for _, c in validacao])
+
+    relatorio["treino"] = {
+        "regras": sum(1 for _, _, origem in rotulados if origem == "regras"),
+        "ia": sum(1 for _, _, origem in rotulados if origem == "ia")
+    }
+    modelo = ClassificadorRapido.treinar([t for t, _, _ in rotulados], [c for _, c, _ in rotulados], **parametros)
+    modelo.relatorio = relatorio
+    modelo.salvar(caminho)
+    logging.info(f"💾 Cascata gravada em {caminho} ({len(modelo.classes)} categorias, {len(modelo.vocabulario)} n-gramas).")
+    return relatorio
+
+
+def _imprimir_relatorio(relatorio):
+    print(f"🔬 Concordância com o mDeBERTa em {relatorio['titulos']} títulos: top-1 {relatorio['concordancia_top1']}")
+    for linha in relatorio["por_limiar"]:
+        print(f"   limiar {linha['limiar']:.2f}: cobertura {linha['cobertura']:.1%} | "
+              f"concordância nas respondidas {linha['concordancia'] if linha['concordancia'] is not None else '-'} | "
+              f"concordância da cascata {linha['concordancia_final']}")
+
+
+def executar(argv=None):
+    parser = argparse.ArgumentParser(description="Cascata TF-IDF na frente do classificador zero-shot.")
+    parser.add_argument("comando", choices=("treinar", "relatorio"))
+    parser.add_argument("--pasta", default="data/raw", help="pasta dos arquivos brutos coletados")
+    parser.add_argument("--caminho", default=CAMINHO_CASCATA, help="arquivo .npz do modelo")
+    parser.add_argument("--validacao", type=float, default=0.2, help="fração dos títulos da IA reservada para avaliação")
+    argumentos = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if argumentos.comando == "treinar":
+        relatorio = treinar_cascata(argumentos.pasta, argumentos.caminho, fracao_validacao=argumentos.validacao)
+    else:
+        # Inclui títulos vistos no treino: serve para acompanhar as coletas novas desde o último treino
+        modelo = ClassificadorRapido.carregar(argumentos.caminho)
+        da_ia = [(t, c) for t, c, origem in titulos_rotulados(argumentos.pasta) if origem == "ia"]
+        relatorio = relatorio_concordancia(modelo, [t for t, _ in da_ia], [c for _, c in da_ia])
+    if not relatorio["titulos"]:
+        print("⚠ Nenhum título rotulado pela IA para avaliar.")
+        return 0 if argumentos.comando == "treinar" else 1
+    _imprimir_relatorio(relatorio)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(executar())
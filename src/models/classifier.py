@@ -1,16 +1,56 @@
+import hashlib
+import json
 import logging
-from transformers import pipeline
+import os
+import threading
+from src.metricas import metricas
+from src.models.backend_onnx import CAMINHO_ONNX, PipelineOnnx
+from src.models.cache import CacheClassificacao
+from src.models.cascata import LIMIAR_CASCATA, ClassificadorRapido
+from src.models.embeddings import MODELO_EMBEDDINGS, PipelineEmbeddings, descricao, ler_calibracao
+
+# A configuração dos logs (handlers, nível) é de quem executa: `configurar_logs`.
+# O detalhe por título sai em DEBUG, com argumentos formatados só se o registro for gravado.
 
-# Configuração básica de log para aparecer no console (Stream)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 class ProductClassifier:
-    def __init__(self):
-        logging.info("Iniciando carregamento do modelo mDeBERTa-v3 🤖...")
-        self.classifier = pipeline("zero-shot-classification", 
-                                    model="MoritzLaurer/mDeBERTa-v3-base-mnli-xnli")
+    MODELO = "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli"
+    TEMPLATE_HIPOTESE = "Este produto é um {}"
+
+    # Thresholds da regra de decisão (ver `_decidir`)
+    LIMIAR_CONFIANCA = 0.95
+    LIMIAR_DOMINANCIA = 0.999
+    MARGEM_DOMINANCIA = 0.01
+    LIMIAR_MINIMO = 0.70
+
+    BACKENDS = ("pytorch", "onnx", "embeddings")
+
+    def __init__(self, caminho_cache=None, backend="pytorch", caminho_onnx=CAMINHO_ONNX, threads=None,
+                 caminho_cascata=None, limiar_cascata=LIMIAR_CASCATA):
+        """
+        O modelo não é carregado aqui: o `pipeline` só é criado no primeiro uso
+        real da IA (ver `classifier`), então instanciar a classe é barato.
+
+        Args:
+            caminho_cache (str, optional): Arquivo SQLite do cache persistente de
+                classificações. Se None, toda chamada passa pelo modelo.
+            backend (str): "pytorch" (transformers, padrão) ou "onnx" (mesmo modelo
+                exportado e quantizado em int8, no ONNX Runtime; ver `src.models.backend_onnx`)
+                ou "embeddings" (similaridade de cosseno com um modelo de sentenças, um
+                encode por título; ver `src.models.embeddings`).
+            caminho_onnx (str): Pasta do modelo ONNX exportado.
+            threads (int, optional): Threads intra-op do ONNX Runtime / do PyTorch no modo embeddings.
+            caminho_cascata (str, optional): Modelo TF-IDF da cascata (ver
+                `src.models.cascata`). Se existir, responde os títulos em que tem
+                confiança e só os demais vão ao mDeBERTa.
+            limiar_cascata (float): Probabilidade mínima para a cascata responder.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend de IA desconhecido: {backend}")
+        self.backend = backend
+        self.caminho_onnx = caminho_onnx
+        self.threads = threads
+        self._pipeline = None
+        self._lock_carga = threading.Lock()
         
         self.categorias_alvo = [
             "Smartphone e Celular", 
@@ -26,62 +66,276 @@ class ProductClassifier:
             "Bateria",
             "Console"
         ]
-        logging.info("Modelo carregado com sucesso.")
+
+        self.cache = CacheClassificacao(caminho_cache, assinatura=self.assinatura()) if caminho_cache else None
+
+        self.limiar_cascata = limiar_cascata
+        self.cascata = None
+        if caminho_cascata and os.path.exists(caminho_cascata):
+            try:
+                self.cascata = ClassificadorRapido.carregar(caminho_cascata)
+                logging.info(f"⚡ Cascata carregada de {caminho_cascata} (limiar {limiar_cascata}).")
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"⚠️ Erro ao carregar a cascata, seguindo só com o mDeBERTa: {e}")
+
+    @property
+    def classifier(self):
+        """Pipeline zero-shot do mDeBERTa, carregado sob demanda na primeira chamada."""
+        if self._pipeline is None:
+            with self._lock_carga:
+                if self._pipeline is None:
+                    if self.backend == "embeddings":
+                        logging.info(f"Iniciando carregamento do modelo de sentenças {MODELO_EMBEDDINGS} 🤖...")
+                        self._pipeline = PipelineEmbeddings(threads=self.threads)
+                    elif self.backend == "onnx":
+                        logging.info(f"Iniciando carregamento do modelo mDeBERTa-v3 ({self.backend}) 🤖...")
+                        self._pipeline = PipelineOnnx(self.caminho_onnx, threads=self.threads)
+                    else:
+                        logging.info(f"Iniciando carregamento do modelo mDeBERTa-v3 ({self.backend}) 🤖...")
+                        from transformers import pipeline
+
+                        self._pipeline = pipeline("zero-shot-classification", 
+                                                  model=self.MODELO)
+                    logging.info("Modelo carregado com sucesso.")
+        return self._pipeline
+
+    @property
+    def carregado(self):
+        """Indica se o modelo já foi carregado em memória."""
+        return self._pipeline is not None
+
+    def assinatura(self):
+        """Hash da configuração (modelo, categorias e thresholds) que define as respostas da IA."""
+        configuracao = {
+            "modelo": self.MODELO,
+            "template": self.TEMPLATE_HIPOTESE,
+            "categorias": self.categorias_alvo,
+            "limiares": [self.LIMIAR_CONFIANCA, self.LIMIAR_DOMINANCIA, self.MARGEM_DOMINANCIA, self.LIMIAR_MINIMO]
+        }
+        # O int8 pode decidir diferente do fp32 em títulos limítrofes: cache próprio.
+        # O PyTorch fica fora do hash para não invalidar os caches já existentes.
+        if self.backend != "pytorch":
+            configuracao["backend"] = self.backend
+        # No modo embeddings as respostas dependem do modelo de sentenças, das descrições e da calibração
+        if self.backend == "embeddings":
+            calibracao = ler_calibracao()
+            configuracao["modelo"] = MODELO_EMBEDDINGS
+            configuracao["descricoes"] = [descricao(c) for c in self.categorias_alvo]
+            configuracao["calibracao"] = [calibracao["a"], calibracao["b"]]
+        return hashlib.sha1(json.dumps(configuracao, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
 
     def classificar(self, titulo):
-        logging.info(f"--- Nova Classificação iniciada (Threshold: 0.95) ---")
-        logging.info(f"Título: {titulo}")
+        metricas.incrementar("ia_titulos")
+        if self.cache:
+            em_cache = self.cache.obter(titulo)
+            if em_cache is not None:
+                metricas.incrementar("cache_ia_acertos")
+                return em_cache
+            metricas.incrementar("cache_ia_falhas")
+
+        rapida = self._responder_pela_cascata([titulo])
+        if titulo in rapida:
+            return rapida[titulo]
+
+        logging.debug("--- Nova Classificação iniciada (Threshold: %s) --- Título: %s", self.LIMIAR_CONFIANCA, titulo)
 
         try:
-            resultado = self.classifier(
-                titulo, 
-                self.categorias_alvo, 
-                hypothesis_template="Este produto é um {}",
-                multi_label=True 
-            )
-
-            logging.info("Scores calculados pela IA:")
-            for label, score in zip(resultado['labels'], resultado['scores']):
-                status = "✅" if score > 0.95 else "❌"
-                logging.info(f"  {status} {label}: {score:.4f}")
-
-            # Pegamos todos que passaram de 95%
-            labels_confiáveis = [
-                resultado['labels'][i] 
-                for i, score in enumerate(resultado['scores']) if score > 0.95
-            ]
-            
-            # --- NOVO BLOCO: LÓGICA DE DOMINÂNCIA ---
-            if len(labels_confiáveis) > 1:
-                melhor_score = resultado['scores'][0]
-                segundo_melhor_score = resultado['scores'][1]
-                
-                # Se o primeiro lugar é esmagador (ex: 0.9997) e a diferença para o 
-                # segundo é maior que 0.01 (1%), ignoramos o segundo para evitar o falso combo.
-                if melhor_score > 0.999 and (melhor_score - segundo_melhor_score) > 0.01:
-                    vencedor_absoluto = resultado['labels'][0]
-                    logging.info(f"Dominância detectada! Mantendo apenas: {vencedor_absoluto}")
-                    return vencedor_absoluto
-                
-                # Se não houver dominância clara, mantém o combo
-                res = "Combo: " + " & ".join(labels_confiáveis)
-                logging.info(f"Resultado Final: [BUNDLE ALTA CONFIANÇA] -> {res}")
-                return res
-            # ----------------------------------------
-            
-            if not labels_confiáveis:
-                top_label = resultado['labels'][0]
-                top_score = resultado['scores'][0]
-                if top_score > 0.70:
-                    logging.info(f"Aviso: Usando melhor opção disponível: {top_label}")
-                    return top_label
-                else:
-                    return "Outros"
-
-            final_label = labels_confiáveis[0]
-            logging.info(f"Resultado Final: {final_label}")
-            return final_label
+            metricas.incrementar("ia_inferencias")
+            with metricas.cronometrar("ia"):
+                resultado = self.classifier(
+                    titulo, 
+                    self.categorias_alvo, 
+                    hypothesis_template=self.TEMPLATE_HIPOTESE,
+                    multi_label=True 
+                )
+            categoria = self._decidir(resultado)
+            if self.cache:
+                self.cache.salvar(titulo, categoria)
+            return categoria
 
         except Exception as e:
             logging.error(f"Erro crítico na classificação da IA: {e}")
-            return "Outros"
\ No newline at end of file
+            return "Outros"
+
+    def classificar_lote(self, titulos, batch_size=16):
+        """
+        Classifica vários títulos em uma única chamada ao modelo.
+
+        Os pares (título, hipótese) são enviados ao pipeline em lotes com padding,
+        evitando pagar o custo completo do mDeBERTa título a título. A regra de
+        decisão (threshold, dominância e fallback) é a mesma de `classificar`.
+        Títulos já presentes no cache persistente não chegam ao modelo.
+
+        Args:
+            titulos (list[str]): Títulos que caíram no fallback de IA.
+            batch_size (int): Quantidade de pares enviados ao modelo por passo.
+        Returns:
+            list[str]: Categorias na mesma ordem dos títulos recebidos.
+        """
+
+        titulos = list(titulos)
+        if not titulos:
+            return []
+
+        conhecidas = self.cache.obter_varios(titulos) if self.cache else {}
+        # Títulos repetidos na mesma página vão ao modelo uma única vez
+        pendentes = list(dict.fromkeys(t for t in titulos if t not in conhecidas))
+
+        metricas.incrementar("ia_titulos", len(titulos))
+        if self.cache:
+            acertos = sum(1 for t in titulos if t in conhecidas)
+            metricas.incrementar("cache_ia_acertos", acertos)
+            metricas.incrementar("cache_ia_falhas", len(titulos) - acertos)
+
+        rapidas = self._responder_pela_cascata(pendentes)
+        conhecidas.update(rapidas)
+        pendentes = [t for t in pendentes if t not in rapidas]
+
+        if pendentes:
+            logging.info("--- Classificação em lote iniciada: %d títulos (batch_size=%d) ---", len(pendentes), batch_size)
+            try:
+                metricas.incrementar("ia_inferencias", len(pendentes))
+                with metricas.cronometrar("ia"):
+                    resultados = self.classifier(
+                        pendentes,
+                        self.categorias_alvo,
+                        hypothesis_template=self.TEMPLATE_HIPOTESE,
+                        multi_label=True,
+                        batch_size=batch_size
+                    )
+            except Exception as e:
+                logging.error(f"Erro crítico na classificação em lote da IA: {e}")
+                return [conhecidas.get(t, "Outros") for t in titulos]
+
+            # O pipeline devolve um dict (e não uma lista) quando recebe um único título
+            if isinstance(resultados, dict):
+                resultados = [resultados]
+
+            novas = []
+            for titulo, resultado in zip(pendentes, resultados):
+                logging.debug("Título: %s", titulo)
+                try:
+                    novas.append((titulo, self._decidir(resultado)))
+                except Exception as e:
+                    logging.error(f"Erro crítico na classificação da IA: {e}")
+                    conhecidas[titulo] = "Outros"
+            conhecidas.update(novas)
+            if self.cache:
+                self.cache.salvar_varios(novas)
+
+        return [conhecidas[t] for t in titulos]
+
+    def _responder_pela_cascata(self, titulos):
+        """
+        Categorias dos títulos em que a cascata passou do limiar de confiança.
+
+        As respostas da cascata não entram no cache persistente: ele guarda só
+        decisões do mDeBERTa, com a assinatura dele.
+
+        Returns:
+            dict[str, str]: Título -> categoria, só para os títulos respondidos.
+        """
+
+        if self.cascata is None or not titulos:
+            return {}
+        with metricas.cronometrar("cascata"):
+            previsoes = self.cascata.prever(titulos)
+        respondidas = {
+            titulo: categoria for titulo, (categoria, confianca) in zip(titulos, previsoes)
+            if confianca >= self.limiar_cascata
+        }
+        metricas.incrementar("cascata_respostas", len(respondidas))
+        metricas.incrementar("cascata_escalonados", len(titulos) - len(respondidas))
+        return respondidas
+
+    def _decidir(self, resultado):
+        """Aplica threshold, dominância e fallback sobre os scores de um título."""
+
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug("Scores calculados pela IA: %s", " | ".join(
+                f"{'✅' if score > self.LIMIAR_CONFIANCA else '❌'} {label}: {score:.4f}"
+                for label, score in zip(resultado['labels'], resultado['scores'])
+            ))
+
+        # Pegamos todos que passaram de 95%
+        labels_confiáveis = [
+            resultado['labels'][i] 
+            for i, score in enumerate(resultado['scores']) if score > self.LIMIAR_CONFIANCA
+        ]
+        
+        # --- NOVO BLOCO: LÓGICA DE DOMINÂNCIA ---
+        if len(labels_confiáveis) > 1:
+            melhor_score = resultado['scores'][0]
+            segundo_melhor_score = resultado['scores'][1]
+            
+            # Se o primeiro lugar é esmagador (ex: 0.9997) e a diferença para o 
+            # segundo é maior que 0.01 (1%), ignoramos o segundo para evitar o falso combo.
+            if melhor_score > self.LIMIAR_DOMINANCIA and (melhor_score - segundo_melhor_score) > self.MARGEM_DOMINANCIA:
+                vencedor_absoluto = resultado['labels'][0]
+                logging.debug("Dominância detectada! Mantendo apenas: %s", vencedor_absoluto)
+                return vencedor_absoluto
+            
+            # Se não houver dominância clara, mantém o combo
+            res = "Combo: " + " & ".join(labels_confiáveis)
+            logging.debug("Resultado Final: [BUNDLE ALTA CONFIANÇA] -> %s", res)
+            return res
+        # ----------------------------------------
+        
+        if not labels_confiáveis:
+            top_label = resultado['labels'][0]
+            top_score = resultado['scores'][0]
+            if top_score > self.LIMIAR_MINIMO:
+                logging.debug("Aviso: Usando melhor opção disponível: %s", top_label)
+                return top_label
+            else:
+                return "Outros"
+
+        final_label = labels_confiáveis[0]
+        logging.debug("Resultado Final: %s", final_label)
+        return final_label
+
+
+# Instâncias compartilhadas do processo, uma por configuração
+_instancias = {}
+_lock_instancia = threading.Lock()
+
+def obter_classificador(caminho_cache=None, backend="pytorch", threads=None, caminho_cascata=None,
+                        limiar_cascata=LIMIAR_CASCATA):
+    """
+    Retorna o classificador compartilhado pelo processo para a configuração pedida.
+
+    A primeira chamada com uma configuração cria a instância (sem carregar o
+    modelo); as seguintes com a mesma configuração devolvem o mesmo objeto,
+    garantindo uma única cópia do mDeBERTa em memória para o scraper, os testes e
+    qualquer outro consumidor. Uma configuração diferente (outro backend, cache ou
+    cascata) ganha a sua própria instância, nunca a de outra configuração: a
+    assinatura do delta e as chaves do cache descrevem sempre o modelo que de fato
+    responde. Como isso pode significar um segundo modelo em memória, o caso é
+    avisado no log.
+
+    Args:
+        caminho_cache (str, optional): Cache persistente de classificações.
+        backend (str): Backend de inferência ("pytorch", "onnx" ou "embeddings").
+        threads (int, optional): Threads intra-op do backend ONNX.
+        caminho_cascata (str, optional): Modelo da cascata TF-IDF.
+        limiar_cascata (float): Confiança mínima da cascata.
+    Returns:
+        ProductClassifier: Instância do processo para essa configuração.
+    """
+
+    chave = (
+        os.path.abspath(caminho_cache) if caminho_cache else None, backend, threads,
+        os.path.abspath(caminho_cascata) if caminho_cascata else None, limiar_cascata
+    )
+    instancia = _instancias.get(chave)
+    if instancia is None:
+        with _lock_instancia:
+            instancia = _instancias.get(chave)
+            if instancia is None:
+                if _instancias:
+                    logging.warning(f"⚠️ Classificador com outra configuração (backend {backend}, cache {caminho_cache}, "
+                                    f"cascata {caminho_cascata}): nova instância, com o seu próprio modelo.")
+                instancia = ProductClassifier(caminho_cache=caminho_cache, backend=backend, threads=threads,
+                                              caminho_cascata=caminho_cascata, limiar_cascata=limiar_cascata)
+                _instancias[chave] = instancia
+    return instancia
@@ -0,0 +1,281 @@
+"""
+Modo de similaridade de embeddings do classificador.
+
+Em vez de um passe do cross-encoder NLI por par (título, hipótese) — 12 por
+título —, cada título é codificado uma única vez por um modelo de sentenças e
+comparado por similaridade de cosseno com as descrições das categorias, cujos
+embeddings são calculados uma vez e guardados em disco. A similaridade vira um
+score calibrado (regressão logística de Platt) para que a mesma regra de
+decisão do `ProductClassifier` (0.95 / dominância / 0.70) continue valendo.
+
+Uso:
+    python -m src.models.embeddings calibrar   # ajusta a calibração com os rótulos da IA em data/raw
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+MODELO_EMBEDDINGS = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+CAMINHO_EMBEDDINGS_CATEGORIAS = "data/cache/embeddings_categorias.npz"
+CAMINHO_CALIBRACAO = "data/modelos/calibracao_embeddings.json"
+
+# Ponto de partida até a primeira calibração: cosseno 0.5 vira score 0.5 e 0.62 passa de 0.95
+CALIBRACAO_PADRAO = {"a": 25.0, "b": -12.5}
+
+# Texto embutido para cada categoria; rótulos fora daqui usam o próprio nome
+DESCRICOES_CATEGORIAS = {
+    "Smartphone e Celular": "smartphone, celular, aparelho telefone móvel android ou iphone",
+    "Fone de Ouvido e Áudio": "fone de ouvido, headset, earbuds, caixa de som e acessórios de áudio",
+    "Carregador e Cabo": "carregador de celular, fonte, cabo usb, cabo tipo c, power bank",
+    "Capa e Película": "capa, capinha, case e película protetora de tela para celular",
+    "Smartwatch e Wearable": "smartwatch, relógio inteligente, smartband e pulseira fitness",
+    "Tablet": "tablet, ipad, tela grande para estudo e entretenimento",
+    "Chip": "chip de operadora, cartão sim pré-pago ou controle",
+    "Suporte": "suporte veicular, tripé, pau de selfie, suporte de mesa para celular",
+    "Proteção": "protetor, capa protetora, película de vidro e proteção contra quedas",
+    "Bluetooth": "adaptador bluetooth, transmissor e dispositivo sem fio",
+    "Bateria": "bateria de reposição para celular e bateria externa",
+    "Console": "console de videogame, controle gamepad e joystick"
+}
+
+
+def descricao(rotulo):
+    """Texto usado no embedding do rótulo."""
+    return DESCRICOES_CATEGORIAS.get(rotulo, rotulo)
+
+
+def ler_calibracao(caminho=CAMINHO_CALIBRACAO):
+    """
+    Returns:
+        dict: `a` e `b` da calibração gravada por `calibrar`, ou `CALIBRACAO_PADRAO`.
+    """
+    if caminho and os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    return dict(CALIBRACAO_PADRAO)
+
+
+def _sigmoide(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def resultados_similaridade(sequencias, rotulos, similaridades, calibracao, multi_label=True):
+    """
+    Converte a matriz de cossenos (títulos x rótulos) nos resultados do pipeline
+    zero-shot: rótulos e scores em ordem decrescente.
+
+    Args:
+        sequencias (list[str]): Títulos.
+        rotulos (list[str]): Rótulos candidatos.
+        similaridades (np.ndarray): Cossenos de formato (títulos, rótulos).
+        calibracao (dict): `a` e `b` de score = sigmoide(a * cosseno + b).
+        multi_label (bool): Score independente por rótulo; senão, softmax entre rótulos.
+    Returns:
+        list[dict]: `sequence`, `labels` e `scores` de cada título.
+    """
+
+    logits = calibracao["a"] * np.asarray(similaridades, dtype=np.float64) + calibracao["b"]
+    if multi_label or len(rotulos) == 1:
+        scores = _sigmoide(logits)
+    else:
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        scores = exp / exp.sum(axis=1, keepdims=True)
+
+    ordens = np.argsort(-scores, axis=1, kind="stable")
+    return [
+        {
+            "sequence": sequencia,
+            "labels": [rotulos[j] for j in ordem],
+            "scores": [float(scores[i, j]) for j in ordem]
+        }
+        for i, (sequencia, ordem) in enumerate(zip(sequencias, ordens))
+    ]
+
+
+def embeddings_categorias(codificar, rotulos, caminho=CAMINHO_EMBEDDINGS_CATEGORIAS, modelo=MODELO_EMBEDDINGS):
+    """
+    Embeddings normalizados das descrições dos rótulos, calculados uma vez e
+    guardados em disco. Mudar o modelo, os rótulos ou as descrições gera uma
+    chave nova e o arquivo é refeito.
+
+    Args:
+        codificar (Callable[[list[str]], np.ndarray]): Codificador de frases.
+        rotulos (list[str]): Rótulos candidatos.
+        caminho (str, optional): Arquivo `.npz` do cache (None não grava).
+        modelo (str): Nome do modelo, parte da chave do cache.
+    Returns:
+        np.ndarray: Matriz (rótulos, dimensão).
+    """
+
+    textos = [descricao(rotulo) for rotulo in rotulos]
+    chave = hashlib.sha1(json.dumps([modelo, list(rotulos), textos], ensure_ascii=False).encode("utf-8")).hexdigest()
+    if caminho and os.path.exists(caminho):
+        with np.load(caminho) as dados:
+            if str(dados["chave"]) == chave:
+                return dados["embeddings"]
+
+    embeddings = np.asarray(codificar(textos), dtype=np.float32)
+    if caminho:
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            np.savez(f, chave=np.array(chave), embeddings=embeddings)
+        os.replace(temporario, caminho)
+        logging.info(f"💾 Embeddings das categorias gravados em {caminho}.")
+    return embeddings
+
+
+class CodificadorFrases:
+    """Modelo de sentenças (mean pooling + normalização L2) sobre o transformers."""
+
+    def __init__(self, modelo=MODELO_EMBEDDINGS, threads=None):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self._torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(modelo)
+        self.rede = AutoModel.from_pretrained(modelo).eval()
+
+    def __call__(self, textos, batch_size=64):
+        blocos = []
+        with self._torch.inference_mode():
+            for inicio in range(0, len(textos), batch_size):
+                codificado = self.tokenizer(textos[inicio:inicio + batch_size], padding=True, truncation=True,
+                                            max_length=128, return_tensors="pt")
+                saida = self.rede(**codificado).last_hidden_state
+                mascara = codificado["attention_mask"].unsqueeze(-1).to(saida.dtype)
+                media = (saida * mascara).sum(dim=1) / mascara.sum(dim=1).clamp(min=1e-9)
+                blocos.append(self._torch.nn.functional.normalize(media, dim=1).numpy())
+        return np.concatenate(blocos) if blocos else np.zeros((0, 0), dtype=np.float32)
+
+
+class PipelineEmbeddings:
+    """
+    Substituto do `pipeline("zero-shot-classification")` por similaridade de
+    embeddings. Aceita os mesmos argumentos e devolve o mesmo formato; o
+    `hypothesis_template` é ignorado (as categorias usam `DESCRICOES_CATEGORIAS`).
+    """
+
+    def __init__(self, modelo=MODELO_EMBEDDINGS, caminho_categorias=CAMINHO_EMBEDDINGS_CATEGORIAS,
+                 calibracao=None, threads=None, codificador=None):
+        """
+        Args:
+            modelo (str): Modelo de sentenças do Hugging Face.
+            caminho_categorias (str): Cache em disco dos embeddings das categorias.
+            calibracao (dict, optional): `a` e `b` (padrão: `ler_calibracao()`).
+            threads (int, optional): Threads do PyTorch.
+            codificador (Callable, optional): Codificador já carregado.
+        """
+        self.modelo = modelo
+        self.caminho_categorias = caminho_categorias
+        self.calibracao = calibracao or ler_calibracao()
+        self.codificar = codificador or CodificadorFrases(modelo, threads=threads)
+        self._categorias = {}
+
+    def similaridades(self, sequencias, rotulos, batch_size=64):
+        """Matriz de cossenos (títulos x rótulos), com um único encode por título."""
+        chave = tuple(rotulos)
+        if chave not in self._categorias:
+            self._categorias[chave] = embeddings_categorias(self.codificar, rotulos, self.caminho_categorias, self.modelo)
+        titulos = np.asarray(self.codificar(list(sequencias), batch_size=batch_size), dtype=np.float32)
+        return titulos @ self._categorias[chave].T
+
+    def __call__(self, sequencias, candidate_labels, hypothesis_template=None, multi_label=False, batch_size=64):
+        unica = isinstance(sequencias, str)
+        if unica:
+            sequencias = [sequencias]
+        rotulos = list(candidate_labels)
+        resultados = resultados_similaridade(sequencias, rotulos, self.similaridades(sequencias, rotulos, batch_size),
+                                             self.calibracao, multi_label)
+        return resultados[0] if unica else resultados
+
+
+def ajustar_calibracao(similaridades, positivos, epocas=500, taxa=0.5):
+    """
+    Regressão logística de uma variável (Platt): P(rótulo correto) = sigmoide(a * cosseno + b).
+
+    Args:
+        similaridades (np.ndarray): Cossenos de cada par (título, rótulo).
+        positivos (np.ndarray): 1 se o rótulo é a categoria do título, 0 se não.
+    Returns:
+        dict: `a` e `b`.
+    """
+
+    x = np.asarray(similaridades, dtype=np.float64).ravel()
+    y = np.asarray(positivos, dtype=np.float64).ravel()
+    # Padroniza para o gradiente convergir com passo fixo e volta para a escala original
+    media, desvio = x.mean(), x.std() or 1.0
+    z = (x - media) / desvio
+    a, b = 1.0, 0.0
+    for _ in range(epocas):
+        erro = _sigmoide(a * z + b) - y
+        a -= taxa * float((erro * z).mean())
+        b -= taxa * float(erro.mean())
+    return {"a": round(a / desvio, 6), "b": round(b - a * media / desvio, 6)}
+
+
+def calibrar(pasta="data/raw", caminho=CAMINHO_CALIBRACAO, modelo=MODELO_EMBEDDINGS, threads=None):
+    """
+    Ajusta a calibração com os títulos que o mDeBERTa já rotulou em `pasta` e
+    mede a concordância das decisões com ele e o custo por título.
+
+    Returns:
+        dict: Calibração, títulos usados, concordância e ms por título.
+    """
+    from src.models.cascata import titulos_rotulados
+    from src.models.classifier import ProductClassifier
+
+    classificador = ProductClassifier(backend="embeddings")
+    rotulos = classificador.categorias_alvo
+    da_ia = [(t, c) for t, c, origem in titulos_rotulados(pasta) if origem == "ia" and c in rotulos]
+    if not da_ia:
+        raise ValueError(f"Nenhum título rotulado pela IA com uma categoria única em {pasta}.")
+
+    pipeline = PipelineEmbeddings(modelo, calibracao=CALIBRACAO_PADRAO, threads=threads)
+    titulos = [t for t, _ in da_ia]
+    pipeline.similaridades(titulos[:1], rotulos)  # carga e embeddings das categorias fora da medição
+    inicio = time.perf_counter()
+    similaridades = pipeline.similaridades(titulos, rotulos)
+    ms_por_titulo = (time.perf_counter() - inicio) / len(titulos) * 1000
+
+    positivos = np.array([[rotulo == categoria for rotulo in rotulos] for _, categoria in da_ia])
+    calibracao = ajustar_calibracao(similaridades, positivos)
+    decisoes = [classificador._decidir(r) for r in resultados_similaridade(titulos, rotulos, similaridades, calibracao)]
+    concordancia = sum(d == c for d, (_, c) in zip(decisoes, da_ia)) / len(da_ia)
+
+    pasta_calibracao = os.path.dirname(caminho)
+    if pasta_calibracao and not os.path.exists(pasta_calibracao):
+        os.makedirs(pasta_calibracao)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({**calibracao, "modelo": modelo, "titulos": len(da_ia)}, f, ensure_ascii=False, indent=2)
+    return {"calibracao": calibracao, "titulos": len(da_ia), "concordancia": round(concordancia, 4),
+            "ms_por_titulo": round(ms_por_titulo, 2)}
+
+
+def executar(argv=None):
+    parser = argparse.ArgumentParser(description="Modo de similaridade de embeddings do classificador.")
+    parser.add_argument("comando", choices=("calibrar",))
+    parser.add_argument("--pasta", default="data/raw", help="pasta dos arquivos brutos coletados")
+    parser.add_argument("--caminho", default=CAMINHO_CALIBRACAO, help="arquivo JSON da calibração")
+    parser.add_argument("--threads", type=int, default=None, help="threads do PyTorch")
+    argumentos = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    relatorio = calibrar(argumentos.pasta, argumentos.caminho, threads=argumentos.threads)
+    print(f"📐 Calibração em {relatorio['titulos']} títulos: a={relatorio['calibracao']['a']} b={relatorio['calibracao']['b']}")
+    print(f"🔬 Concordância com o mDeBERTa: {relatorio['concordancia']:.0%} | ⏱️ {relatorio['ms_por_titulo']} ms/título")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(executar())
@@ -1,10 +1,50 @@
 import re
 import logging
-
-def montar_objeto_produto(dados_brutos, contexto, classificador_ai=None):
+from functools import lru_cache
+import numpy as np
+from bs4 import BeautifulSoup, SoupStrainer
+from src.metricas import metricas
+
+# lxml (C) é bem mais rápido que o html.parser (Python puro); sem ele a
+# extração continua funcionando, só mais devagar.
+try:
+    import lxml  # noqa: F401
+    PARSER_HTML = "lxml"
+except ImportError:
+    PARSER_HTML = "html.parser"
+
+# --- PADRÕES COMPILADOS (usados nas funções escalares e nas versões em lote) ---
+PADRAO_PARCELAS = re.compile(r'(\d+)x')
+PADRAO_NUMEROS = re.compile(r'\d+')
+PADRAO_VALOR = re.compile(r"[-+]?\d*\.\d+|\d+")
+
+# Escudo de especificações técnicas do `detectar_bundle`, aplicado nesta ordem
+PADROES_SPECS = (
+    re.compile(r'\d+\s*[+&]\s*\d+\s*(gb|ram|virtual)'),        # RAM: "4+4gb", "8gb+16gb"
+    re.compile(r'ram\s*[+&]\s*boost'),                          # "ram+boost"
+    re.compile(r'\+\s*\d+\s*gb'),                                 # "+ 8gb ram"
+    re.compile(r'(fhd|hd|qhd|amoled|oled|ips)\s*\+'),             # Tela: "fhd+", "hd+"
+    re.compile(r'\+\s*(selfie|frontal|cam|câm|traseira)'),        # Câmeras: "+ selfie"
+)
+PADRAO_ACESSORIOS = re.compile(r'\d+\s*(pulseiras|fones|películas|peliculas|capas|case|tiras)')
+SINAIS_BUNDLE = ('+', '&', ' c/')
+ITENS_ADICIONAIS = ('brinde', 'kit', 'combo', 'fone bluetooth', 'cabo', 'fonte')
+TERMOS_SPECS = ('br', 'nfc', 'nf', 'gb', 'mb', '5g', '4g', 'dual', 'sim', 'mah', 'bateria', 'biometria', 'nfe', 'camera', 'samsung xiaomi', 'ganfast', 'mp')
+
+# '.' (milhar) some e ',' (decimal) vira '.', em uma única passada
+TABELA_VALOR = str.maketrans({'.': None, ',': '.', ' ': None})
+
+# Separador usado nas versões em lote para processar todos os textos em uma única
+# string; nenhum dos padrões acima casa com ele, então não há match entre itens.
+SEPARADOR_LOTE = '\x00'
+
+def montar_objeto_produto(dados_brutos, contexto, classificador_ai=None, categoria_base=None):
     """
     Transforma dados brutos em um objeto estruturado (Schema VIP).
     Mantém a integridade das chaves originais com lógica de classificação híbrida.
+
+    Se `categoria_base` já vier resolvida (ex.: classificação em lote feita por
+    `montar_objetos_lote`), a hierarquia de regras e a IA não são executadas.
     """
     # --- 1. EXTRAÇÃO E TIPAGEM ---
     p_original = dados_brutos.get('preco_antigo', 0)
@@ -15,111 +55,12 @@ def montar_objeto_produto(dados_brutos, contexto, classificador_ai=None):
     titulo_low = titulo_raw.lower()
     is_bundle_final = detectar_bundle(titulo_raw)
 
-    logging.info(f"--- Processando: {titulo_raw[:50]}... ---")
-
-    # --- NOVO: BLOCO 0 - FILTRO DE INSUMOS E REPARO (Ajustado) ---
-    if any(k in titulo_low for k in ['cola', 'adesivo', 'resina', 'ferramenta', 'limpeza', 'reparo']):
-        categoria_base = "Outros"
-    
-    else:
-        # MUDANÇA 1: Expandimos a lista para capturar a posição de Relógios também
-        termos_hardware_geral = [
-            'iphone', 'smartphone', 'galaxy', 'motorola', 'redmi', 'poco', 'xiaomi',
-            'relógio', 'relogio', 'watch', 'smartwatch', 'hw5', 'w28', 's10', 'fitband'
-        ]
-        
-        pos_hw = -1
-        for k in termos_hardware_geral:
-            p = titulo_low.find(k)
-            if p != -1 and (pos_hw == -1 or p < pos_hw):
-                pos_hw = p
-
-        # --- 2. HIERARQUIA DE CATEGORIZAÇÃO ---
-        
-        # 1.1 Suportes e Estabilizadores
-        if any(k in titulo_low for k in ['suporte', 'tripe', 'tripé', 'bastão', 'pau de selfie', 'estabilizador', 'ring light']):
-            termos_sup = ['suporte', 'tripe', 'tripé', 'bastão', 'pau de selfie', 'estabilizador', 'ring light']
-            pos_acc = min([titulo_low.find(k) for k in termos_sup if titulo_low.find(k) != -1])
-            
-            if pos_hw == -1 or pos_acc < pos_hw:
-                categoria_base = "Suporte"
-            else:
-                if any(w in titulo_low for w in ['watch', 'relógio', 'relogio', 'hw5', 'w28']):
-                    categoria_base = "Smartwatch"
-                else:
-                    categoria_base = "Smartphone"
+    logging.debug("--- Processando: %.50s... ---", titulo_raw)
 
-        # 1.2 Energia
-        elif any(k in titulo_low for k in ['carregador', 'cabo', 'fonte', 'adaptador', 'power bank']):
-            pos_acc = min([titulo_low.find(k) for k in ['carregador', 'cabo', 'fonte', 'adaptador', 'power bank'] if titulo_low.find(k) != -1])
-            if pos_hw == -1 or pos_acc < pos_hw:
-                categoria_base = "Carregador"
-            else:
-                if any(w in titulo_low for w in ['watch', 'relógio', 'relogio', 'hw5', 'w28']):
-                    categoria_base = "Smartwatch"
-                else:
-                    categoria_base = "Smartphone"
-
-        # 1.3 Proteção e Estética
-        elif any(k in titulo_low for k in ['capa', 'capinha', 'película', 'pelicula', 'case', 'pulseira', 'smarttag', 'airtag', 'rastreador', 'localizador']):
-            pos_acc = min([titulo_low.find(k) for k in ['capa', 'capinha', 'película', 'pelicula', 'case', 'pulseira', 'smarttag', 'airtag', 'rastreador', 'localizador'] if titulo_low.find(k) != -1])
-            
-            if pos_hw == -1 or pos_acc < pos_hw:
-                categoria_base = "Acessório" if 'pulseira' in titulo_low else "Proteção"
-            else:
-                if any(w in titulo_low for w in ['watch', 'relógio', 'relogio', 'hw5', 'w28', 's10']):
-                    categoria_base = "Smartwatch"
-                else:
-                    categoria_base = "Smartphone"
-
-        # 1.4 Óculos Inteligente
-        elif any(k in titulo_low for k in ['óculos', 'oculos', 'vr', 'realidade virtual', 'óculos 3d', '3d']):
-            categoria_base = "Óculos Inteligente"
-
-        # 1.5 Videogame (físico)
-        elif any(k in titulo_low for k in ['gamepad', 'joystick', 'playstation', 'xbox', 'nintendo', 'pc gamer', 'ps']):
-            categoria_base = "Console"
-        
-        # 1.5 Celular Básico (apenas funções básicas)
-        elif any(k in titulo_low for k in ['celular', 'celular antigo', '2g']):
-            termos_sup = ['celular', 'celular antigo', '2g']
-            pos_acc = min([titulo_low.find(k) for k in termos_sup if titulo_low.find(k) != -1])
-            if pos_hw == -1 or pos_acc < pos_hw:
-                categoria_base = "Celular Básico"
-            else:
-                categoria_base = "Smartphone"
-        
-        # 1.6 Relógio Inteligente (contém várias funções)
-        elif any(k in titulo_low for k in ['relógio', 'relogio', 'watch', 'smartwatch', 'hw5', 'w28']):
-            categoria_base = "Smartwatch"
-
-        # 1.7 Smartband (contém funções básicas. smartband != smartwatch)
-        elif any(k in titulo_low for k in ['smartband', 'mi band', 'fitband', 'band', 'm3', 'm4', 'fit']):
-            termos_sup = ['smartband', 'mi band', 'fitband', 'band', 'm3', 'm4', 'fit']
-            pos_acc = min([titulo_low.find(k) for k in termos_sup if titulo_low.find(k) != -1])
-            if pos_hw == -1 or pos_acc < pos_hw:
-                categoria_base = "Smartband"
-            else:
-                categoria_base = "Smartphone"
-        
-        # 1.8 Chip
-        elif any(k in titulo_low for k in ['chip', 'pre-pago', 'pré-pago', 'pre pago', 'smart card', 'microchip', 'minichip', 'nanochip', 'cartão sim']):
-            termos_sup = ['chip', 'pre-pago', 'pré-pago', 'pre pago']
-            pos_acc = min([titulo_low.find(k) for k in termos_sup if titulo_low.find(k) != -1])
-            if pos_hw == -1 or pos_acc < pos_hw:
-                categoria_base = "Chip"
-            else:
-                categoria_base = "Smartphone"
-
-        # BLOCO 2: HARDWARE DIRETO
-        elif pos_hw != -1 or any(k in titulo_low for k in ['smartphone', 'smarphone', 'smart phone', 'not', 'x7', 'redmi note', 'realme', 'C61', 'lg k', 'motorola', '14 pro', '15 pro', '13 pro', '12 pro']):
-            if any(w in titulo_low for w in ['watch', 'relógio', 'relogio', 'hw5', 'w28']):
-                categoria_base = "Smartwatch"
-            else:
-                categoria_base = "Smartphone"
-
-        # BLOCO 3: IA
-        else:
+    # --- 2. CATEGORIA BASE (regras primeiro, IA como fallback) ---
+    if categoria_base is None:
+        categoria_base = categorizar_por_regras(titulo_low)
+        if categoria_base is None:
             if classificador_ai:
                 categoria_base = classificador_ai.classificar(titulo_raw)
             else:
@@ -139,7 +80,7 @@ def montar_objeto_produto(dados_brutos, contexto, classificador_ai=None):
         percentual_desc = round((valor_absoluto_desc / p_original) * 100, 2)
 
     txt_parc = dados_brutos.get('parcelamento_original', '')
-    match_parc = re.search(r'(\d+)x', txt_parc)
+    match_parc = PADRAO_PARCELAS.search(txt_parc)
     parcelas_max = int(match_parc.group(1)) if match_parc else 1
     valor_parcela = round(p_credito_avista / parcelas_max, 2) if parcelas_max > 0 else p_credito_avista
 
@@ -195,6 +136,269 @@ def montar_objeto_produto(dados_brutos, contexto, classificador_ai=None):
 
 # --- FUNÇÕES AUXILIARES ---
 
+# --- TABELAS DE PALAVRAS-CHAVE DA HIERARQUIA ---
+# Todas são compiladas em um único casador (ver `localizar_termos`), de modo que o
+# título é percorrido uma vez só, em vez de dezenas de `in`/`find` por bloco.
+
+TERMOS_INSUMOS = frozenset({'cola', 'adesivo', 'resina', 'ferramenta', 'limpeza', 'reparo'})
+
+# MUDANÇA 1: Expandimos a lista para capturar a posição de Relógios também
+TERMOS_HARDWARE_GERAL = frozenset({
+    'iphone', 'smartphone', 'galaxy', 'motorola', 'redmi', 'poco', 'xiaomi',
+    'relógio', 'relogio', 'watch', 'smartwatch', 'hw5', 'w28', 's10', 'fitband'
+})
+TERMOS_SUPORTE = frozenset({'suporte', 'tripe', 'tripé', 'bastão', 'pau de selfie', 'estabilizador', 'ring light'})
+TERMOS_ENERGIA = frozenset({'carregador', 'cabo', 'fonte', 'adaptador', 'power bank'})
+TERMOS_PROTECAO = frozenset({'capa', 'capinha', 'película', 'pelicula', 'case', 'pulseira', 'smarttag', 'airtag', 'rastreador', 'localizador'})
+TERMOS_OCULOS = frozenset({'óculos', 'oculos', 'vr', 'realidade virtual', 'óculos 3d', '3d'})
+TERMOS_CONSOLE = frozenset({'gamepad', 'joystick', 'playstation', 'xbox', 'nintendo', 'pc gamer', 'ps'})
+TERMOS_CELULAR_BASICO = frozenset({'celular', 'celular antigo', '2g'})
+TERMOS_RELOGIO = frozenset({'relógio', 'relogio', 'watch', 'smartwatch', 'hw5', 'w28'})
+TERMOS_SMARTBAND = frozenset({'smartband', 'mi band', 'fitband', 'band', 'm3', 'm4', 'fit'})
+TERMOS_CHIP = frozenset({'chip', 'pre-pago', 'pré-pago', 'pre pago', 'smart card', 'microchip', 'minichip', 'nanochip', 'cartão sim'})
+TERMOS_CHIP_POSICAO = frozenset({'chip', 'pre-pago', 'pré-pago', 'pre pago'})
+TERMOS_HARDWARE_DIRETO = frozenset({
+    'smartphone', 'smarphone', 'smart phone', 'not', 'x7', 'redmi note', 'realme', 'C61',
+    'lg k', 'motorola', '14 pro', '15 pro', '13 pro', '12 pro'
+})
+
+# Desempate quando o hardware aparece antes do acessório no título
+TERMOS_DESEMPATE_RELOGIO = frozenset({'watch', 'relógio', 'relogio', 'hw5', 'w28'})
+TERMOS_DESEMPATE_RELOGIO_PROTECAO = TERMOS_DESEMPATE_RELOGIO | {'s10'}
+
+def _compilar_casador(termos):
+    """
+    Compila os termos em uma regex de trie e nas tabelas de sobreposição.
+
+    A regex devolve, em cada posição, o termo MAIS LONGO que começa ali (o `?`
+    guloso tenta estender antes de aceitar o termo curto). Os outros termos que
+    começam na mesma posição são prefixos dele (`prefixos`). Termos que começam
+    DENTRO de um match (ex.: "watch" em "smartwatch") ficam em `contidos` quando
+    cabem inteiros no match, ou em `cruzados` quando podem ultrapassar o seu fim e
+    precisam ser conferidos no texto.
+    """
+
+    trie = {}
+    for termo in termos:
+        no = trie
+        for caractere in termo:
+            no = no.setdefault(caractere, {})
+        no[''] = True
+
+    def _para_regex(no):
+        filhos = [re.escape(c) + _para_regex(sub) for c, sub in sorted(no.items()) if c != '']
+        if not filhos:
+            return ''
+        corpo = filhos[0] if len(filhos) == 1 else '(?:' + '|'.join(filhos) + ')'
+        if '' in no:
+            corpo = '(?:' + corpo + ')?'
+        return corpo
+
+    padrao = re.compile(_para_regex(trie))
+    prefixos = {}
+    contidos = {}
+    cruzados = {}
+    for termo in termos:
+        prefixos[termo] = tuple(outro for outro in termos if outro != termo and termo.startswith(outro))
+        cruzados[termo] = tuple(
+            i for i in range(1, len(termo))
+            if any(len(outro) > len(termo) - i and outro.startswith(termo[i:]) for outro in termos)
+        )
+        contidos[termo] = tuple(
+            (i, outro) for i in range(1, len(termo)) if i not in cruzados[termo]
+            for outro in termos if termo.startswith(outro, i)
+        )
+    return padrao, prefixos, contidos, cruzados
+
+_TODOS_TERMOS = tuple(sorted(
+    TERMOS_INSUMOS | TERMOS_HARDWARE_GERAL | TERMOS_SUPORTE | TERMOS_ENERGIA | TERMOS_PROTECAO
+    | TERMOS_OCULOS | TERMOS_CONSOLE | TERMOS_CELULAR_BASICO | TERMOS_RELOGIO | TERMOS_SMARTBAND
+    | TERMOS_CHIP | TERMOS_HARDWARE_DIRETO | TERMOS_DESEMPATE_RELOGIO_PROTECAO
+))
+_PADRAO_TERMOS, _PREFIXOS, _CONTIDOS, _CRUZADOS = _compilar_casador(_TODOS_TERMOS)
+
+def localizar_termos(titulo_low):
+    """
+    Encontra, em uma única passada, todas as palavras-chave presentes no título.
+
+    Args:
+        titulo_low (str): Título do produto já convertido com `.lower()`.
+    Returns:
+        dict[str, int]: Cada termo encontrado mapeado para a sua primeira posição
+            (o mesmo valor que `titulo_low.find(termo)` devolveria).
+    """
+
+    posicoes = {}
+    for match in _PADRAO_TERMOS.finditer(titulo_low):
+        inicio = match.start()
+        termo = match.group()
+        if termo not in posicoes:
+            posicoes[termo] = inicio
+        for prefixo in _PREFIXOS[termo]:
+            if prefixo not in posicoes:
+                posicoes[prefixo] = inicio
+        for deslocamento, contido in _CONTIDOS[termo]:
+            if contido not in posicoes:
+                posicoes[contido] = inicio + deslocamento
+        for deslocamento in _CRUZADOS[termo]:
+            interno = _PADRAO_TERMOS.match(titulo_low, inicio + deslocamento)
+            if interno:
+                termo_interno = interno.group()
+                if termo_interno not in posicoes:
+                    posicoes[termo_interno] = inicio + deslocamento
+                for prefixo in _PREFIXOS[termo_interno]:
+                    if prefixo not in posicoes:
+                        posicoes[prefixo] = inicio + deslocamento
+    return posicoes
+
+def _primeira_posicao(posicoes, termos):
+    # Sem nenhum termo presente, `min` levanta ValueError (mesmo comportamento de antes)
+    return min([posicoes[k] for k in termos.intersection(posicoes)])
+
+# Os mesmos títulos reaparecem várias vezes na mesma coleta (patrocinados, destaques);
+# a hierarquia é determinística, então o resultado é memorizado em memória.
+@lru_cache(maxsize=65536)
+def categorizar_por_regras(titulo_low):
+    """
+    Aplica a hierarquia de palavras-chave (Blocos 0 a 2) sobre o título.
+
+    Args:
+        titulo_low (str): Título do produto já convertido com `.lower()`.
+    Returns:
+        str | None: Categoria base encontrada pelas regras, ou None quando o
+            título não casa com nenhuma regra e depende do fallback de IA.
+    """
+
+    posicoes = localizar_termos(titulo_low)
+
+    # --- NOVO: BLOCO 0 - FILTRO DE INSUMOS E REPARO (Ajustado) ---
+    if not TERMOS_INSUMOS.isdisjoint(posicoes):
+        return "Outros"
+
+    presentes_hw = TERMOS_HARDWARE_GERAL.intersection(posicoes)
+    pos_hw = min([posicoes[k] for k in presentes_hw]) if presentes_hw else -1
+
+    # --- 2. HIERARQUIA DE CATEGORIZAÇÃO ---
+
+    # 1.1 Suportes e Estabilizadores
+    if not TERMOS_SUPORTE.isdisjoint(posicoes):
+        pos_acc = _primeira_posicao(posicoes, TERMOS_SUPORTE)
+        if pos_hw == -1 or pos_acc < pos_hw:
+            return "Suporte"
+        return "Smartwatch" if not TERMOS_DESEMPATE_RELOGIO.isdisjoint(posicoes) else "Smartphone"
+
+    # 1.2 Energia
+    if not TERMOS_ENERGIA.isdisjoint(posicoes):
+        pos_acc = _primeira_posicao(posicoes, TERMOS_ENERGIA)
+        if pos_hw == -1 or pos_acc < pos_hw:
+            return "Carregador"
+        return "Smartwatch" if not TERMOS_DESEMPATE_RELOGIO.isdisjoint(posicoes) else "Smartphone"
+
+    # 1.3 Proteção e Estética
+    if not TERMOS_PROTECAO.isdisjoint(posicoes):
+        pos_acc = _primeira_posicao(posicoes, TERMOS_PROTECAO)
+        if pos_hw == -1 or pos_acc < pos_hw:
+            return "Acessório" if 'pulseira' in posicoes else "Proteção"
+        return "Smartwatch" if not TERMOS_DESEMPATE_RELOGIO_PROTECAO.isdisjoint(posicoes) else "Smartphone"
+
+    # 1.4 Óculos Inteligente
+    if not TERMOS_OCULOS.isdisjoint(posicoes):
+        return "Óculos Inteligente"
+
+    # 1.5 Videogame (físico)
+    if not TERMOS_CONSOLE.isdisjoint(posicoes):
+        return "Console"
+
+    # 1.5 Celular Básico (apenas funções básicas)
+    if not TERMOS_CELULAR_BASICO.isdisjoint(posicoes):
+        pos_acc = _primeira_posicao(posicoes, TERMOS_CELULAR_BASICO)
+        return "Celular Básico" if pos_hw == -1 or pos_acc < pos_hw else "Smartphone"
+
+    # 1.6 Relógio Inteligente (contém várias funções)
+    if not TERMOS_RELOGIO.isdisjoint(posicoes):
+        return "Smartwatch"
+
+    # 1.7 Smartband (contém funções básicas. smartband != smartwatch)
+    if not TERMOS_SMARTBAND.isdisjoint(posicoes):
+        pos_acc = _primeira_posicao(posicoes, TERMOS_SMARTBAND)
+        return "Smartband" if pos_hw == -1 or pos_acc < pos_hw else "Smartphone"
+
+    # 1.8 Chip
+    if not TERMOS_CHIP.isdisjoint(posicoes):
+        pos_acc = _primeira_posicao(posicoes, TERMOS_CHIP_POSICAO)
+        return "Chip" if pos_hw == -1 or pos_acc < pos_hw else "Smartphone"
+
+    # BLOCO 2: HARDWARE DIRETO
+    if pos_hw != -1 or not TERMOS_HARDWARE_DIRETO.isdisjoint(posicoes):
+        return "Smartwatch" if not TERMOS_DESEMPATE_RELOGIO.isdisjoint(posicoes) else "Smartphone"
+
+    # BLOCO 3: IA (fica a cargo de quem chamou)
+    return None
+
+def montar_objetos_lote(itens, classificador_ai=None, batch_size=16, categorias_conhecidas=None, bases=None):
+    """
+    Monta vários objetos Schema VIP, resolvendo o fallback de IA em uma única chamada.
+
+    Primeiro aplica as regras em todos os itens; os títulos que sobram para a IA
+    são enviados juntos para `classificador_ai.classificar_lote`, em vez de um
+    forward do modelo por card.
+
+    Args:
+        itens (list[tuple[dict, dict]]): Pares (dados_brutos, contexto), como os
+            recebidos por `montar_objeto_produto`.
+        classificador_ai (ProductClassifier, optional): Classificador usado no fallback.
+        batch_size (int): Tamanho do lote repassado ao modelo.
+        categorias_conhecidas (dict[str, str], optional): Título -> categoria base já
+            decidida em uma coleta anterior (modo delta); esses títulos não vão para a IA.
+        bases (list[str | None], optional): Categoria base já conhecida de cada item
+            (memória de produtos vistos); os itens com categoria não passam nem pelas
+            regras nem pela IA.
+    Returns:
+        list[dict]: Objetos estruturados na mesma ordem dos itens. Itens com erro
+            são registrados no log e descartados, como no loop de cards do scraper.
+    """
+
+    bases_conhecidas = bases or [None] * len(itens)
+    bases = []
+    pendentes = []
+    descartados = set()
+    with metricas.cronometrar("regras"):
+        for i, (dados_brutos, _) in enumerate(itens):
+            if bases_conhecidas[i] is not None:
+                bases.append(bases_conhecidas[i])
+                continue
+            try:
+                base = categorizar_por_regras(dados_brutos.get('titulo', 'N/A').lower())
+            except Exception as e:
+                logging.error(f"❌ Erro ao categorizar '{dados_brutos.get('titulo', 'N/A')}': {e}")
+                descartados.add(i)
+                bases.append(None)
+                continue
+            if base is None:
+                if categorias_conhecidas and dados_brutos.get('titulo') in categorias_conhecidas:
+                    base = categorias_conhecidas[dados_brutos['titulo']]
+                elif classificador_ai:
+                    pendentes.append(i)
+                else:
+                    base = "Outros"
+            bases.append(base)
+
+    if pendentes:
+        titulos = [itens[i][0].get('titulo', 'N/A') for i in pendentes]
+        for i, categoria in zip(pendentes, classificador_ai.classificar_lote(titulos, batch_size=batch_size)):
+            bases[i] = categoria
+
+    produtos = []
+    with metricas.cronometrar("montagem"):
+        for i, ((dados_brutos, contexto), base) in enumerate(zip(itens, bases)):
+            if i in descartados:
+                continue
+            try:
+                produtos.append(montar_objeto_produto(dados_brutos, contexto, categoria_base=base))
+            except Exception as e:
+                logging.error(f"❌ Erro ao montar produto '{dados_brutos.get('titulo', 'N/A')}': {e}")
+    return produtos
+
 def montar_string_bundle(base, titulo_low):
     componentes = [base]
     extras = {
@@ -214,35 +418,28 @@ def detectar_bundle(titulo):
     Detecta combos reais, limpando especificações de RAM, Tela (FHD+) 
     e Câmeras (+ Selfie) para evitar falsos positivos.
     """
-    titulo_low = titulo.lower()
+    return _avaliar_bundle(_limpar_specs(titulo.lower()))
 
+def _limpar_specs(titulo_low):
     # 1. LIMPEZA DE ESPECIFICAÇÕES TÉCNICAS (O Escudo)
-    # Limpa RAM: "4+4gb", "8gb+16gb", "ram+boost", "+ 8gb ram"
-    titulo_limpo = re.sub(r'\d+\s*[+&]\s*\d+\s*(gb|ram|virtual)', '', titulo_low)
-    titulo_limpo = re.sub(r'ram\s*[+&]\s*boost', '', titulo_limpo)
-    titulo_limpo = re.sub(r'\+\s*\d+\s*gb', '', titulo_limpo)
-    
-    # Limpa Tela: "fhd+", "hd+", "qhd+"
-    titulo_limpo = re.sub(r'(fhd|hd|qhd|amoled|oled|ips)\s*\+', '', titulo_limpo)
-    
-    # Limpa Câmeras: "+ selfie", "+ frontal", "+ cam"
-    titulo_limpo = re.sub(r'\+\s*(selfie|frontal|cam|câm|traseira)', '', titulo_limpo)
+    for padrao in PADROES_SPECS:
+        titulo_low = padrao.sub('', titulo_low)
+    return titulo_low
 
+def _avaliar_bundle(titulo_limpo):
     # 2. VERIFICAÇÃO NO TÍTULO LIMPO
-    tem_sinal = any(s in titulo_limpo for s in ['+', '&', ' c/'])
+    tem_sinal = any(s in titulo_limpo for s in SINAIS_BUNDLE)
     
     # Padrões de quantidade (Ex: 2 pulseiras)
-    match_acessorios = re.search(r'\d+\s*(pulseiras|fones|películas|peliculas|capas|case|tiras)', titulo_limpo)
+    match_acessorios = PADRAO_ACESSORIOS.search(titulo_limpo)
     
     # Palavras-chave de itens extras
-    itens_adicionais = ['brinde', 'kit', 'combo', 'fone bluetooth', 'cabo', 'fonte']
-    tem_item_extra = any(k in titulo_limpo for k in itens_adicionais)
+    tem_item_extra = any(k in titulo_limpo for k in ITENS_ADICIONAIS)
 
     # 3. FILTRO FINAL DE SEGURANÇA
     # Se ainda sobrou um sinal, mas o título é carregado de termos técnicos e não tem "kit/brinde"
     if tem_sinal and not tem_item_extra and not bool(match_acessorios):
-        termos_specs = ['br', 'nfc', 'nf', 'gb', 'mb', '5g', '4g', 'dual', 'sim', 'mah', 'bateria', 'biometria', 'nfe', 'camera', 'samsung xiaomi', 'ganfast', 'mp']
-        if any(t in titulo_limpo for t in termos_specs):
+        if any(t in titulo_limpo for t in TERMOS_SPECS):
             # Se só sobrou o sinal de + mas não detectamos um item claro, assumimos que é spec residual
             return False
 
@@ -284,8 +481,8 @@ def limpar_valor_simples_para_float(texto):
     if not texto or "N/A" in texto: return 0.0
     try:
         limpo = normalizar_texto(texto)
-        limpo = limpo.replace('R$', '').replace('ou', '').replace('.', '').replace(',', '.').replace(' ', '')
-        resultado = re.search(r"[-+]?\d*\.\d+|\d+", limpo)
+        limpo = limpo.replace('R$', '').replace('ou', '').translate(TABELA_VALOR)
+        resultado = PADRAO_VALOR.search(limpo)
         return float(resultado.group()) if resultado else 0.0
     except:
         return 0.0
@@ -319,7 +516,7 @@ def calcular_preco_total_parcelado(texto_parcela):
         return 0.0
     try:
         # Remove pontos para não confundir o regex
-        numeros = re.findall(r'\d+', texto_parcela.replace('.', ''))
+        numeros = PADRAO_NUMEROS.findall(texto_parcela.replace('.', ''))
         if len(numeros) >= 3:
             parcelas = int(numeros[0])
             valor_parcela = float(f"{numeros[1]}.{numeros[2]}")
@@ -327,4 +524,137 @@ def calcular_preco_total_parcelado(texto_parcela):
     except Exception as e:
         logging.error(f"Erro ao calcular parcelamento: {texto_parcela} -> {e}")
         return 0.0
-    return 0.0
\ No newline at end of file
+    return 0.0
+
+# VERSÕES EM LOTE (backfills e reprocessamentos)
+
+def _juntar_lote(textos):
+    """Junta os textos em uma única string, ou None se algum contiver o separador."""
+    if any(SEPARADOR_LOTE in t for t in textos):
+        return None
+    return SEPARADOR_LOTE.join(textos)
+
+def limpar_valores_lote(textos):
+
+    """
+    Versão em lote de `limpar_valor_simples_para_float`.
+
+    As substituições de limpeza rodam uma única vez sobre todos os textos
+    concatenados e a conversão para float é feita pelo NumPy, sem uma chamada
+    de função Python por preço.
+
+    Args:
+        textos (Iterable[str]): Textos monetários brutos (ex: "R$ 1.299,50").
+    Returns:
+        np.ndarray: Array float64 com um valor por texto (0.0 para inválidos/N/A).
+    """
+
+    textos = ["" if t is None else str(t) for t in textos]
+    bloco = _juntar_lote(textos)
+    if bloco is None:
+        return np.array([limpar_valor_simples_para_float(t) for t in textos], dtype=np.float64)
+
+    bloco = bloco.replace('\xa0', ' ').replace('R$', '').replace('ou', '').translate(TABELA_VALOR)
+    busca = PADRAO_VALOR.search
+    numeros = []
+    for original, limpo in zip(textos, bloco.split(SEPARADOR_LOTE)):
+        resultado = busca(limpo) if original and "N/A" not in original else None
+        numeros.append(resultado.group() if resultado else "0")
+    return np.array(numeros).astype(np.float64)
+
+def detectar_bundle_lote(titulos):
+
+    """
+    Versão em lote de `detectar_bundle`.
+
+    O escudo de especificações (as cinco substituições de regex) é aplicado uma
+    única vez sobre todos os títulos concatenados.
+
+    Args:
+        titulos (Iterable[str]): Títulos brutos dos produtos.
+    Returns:
+        np.ndarray: Array booleano, True onde o título é um combo.
+    """
+
+    titulos = [str(t) for t in titulos]
+    bloco = _juntar_lote(titulos)
+    if bloco is None:
+        return np.array([detectar_bundle(t) for t in titulos], dtype=bool)
+
+    limpos = _limpar_specs(bloco.lower()).split(SEPARADOR_LOTE)
+    return np.fromiter(map(_avaliar_bundle, limpos), dtype=bool, count=len(limpos))
+
+def calcular_parcelado_lote(textos):
+
+    """
+    Versão em lote de `calcular_preco_total_parcelado`.
+
+    Args:
+        textos (Iterable[str]): Textos de parcelamento (ex: "12x de R$ 150,00").
+    Returns:
+        np.ndarray: Array float64 com o total projetado (0.0 quando não há parcelamento).
+    """
+
+    textos = ["" if t is None else str(t) for t in textos]
+    bloco = _juntar_lote(textos)
+    if bloco is None:
+        return np.array([calcular_preco_total_parcelado(t) for t in textos], dtype=np.float64)
+
+    totais = np.zeros(len(textos), dtype=np.float64)
+    encontrar = PADRAO_NUMEROS.findall
+    for i, (original, limpo) in enumerate(zip(textos, bloco.replace('.', '').split(SEPARADOR_LOTE))):
+        if not original or "N/A" in original:
+            continue
+        numeros = encontrar(limpo)
+        if len(numeros) >= 3:
+            totais[i] = round(int(numeros[0]) * float(f"{numeros[1]}.{numeros[2]}"), 2)
+    return totais
+
+
+# --- EXTRAÇÃO DE CARDS ---
+
+# Só as subárvores dos cards são montadas; cabeçalho, scripts e o resto da
+# página são descartados ainda durante o parsing.
+FILTRO_CARDS = SoupStrainer('a', attrs={'data-testid': 'product-card-container'})
+
+# (tag, data-testid) de cada campo do card -> chave no dicionário extraído
+CAMPOS_CARD = {
+    ('h2', 'product-title'): 'titulo',
+    ('p', 'price-original'): 'preco_original',
+    ('p', 'installment'): 'parcelamento',
+    ('p', 'price-value'): 'preco_pix',
+}
+_TESTIDS_CAMPOS = [testid for _, testid in CAMPOS_CARD]
+
+def extrair_cards(html, parser=None):
+    """
+    Extrai os campos brutos de cada card de produto de uma página de listagem.
+
+    Usa um `SoupStrainer` para construir apenas os cards e percorre cada card uma
+    única vez, pegando a primeira ocorrência de cada campo (mesma semântica de
+    `card.find`). Os textos já saem normalizados, mas sem conversão de preço.
+
+    Args:
+        html (str): HTML da página de listagem.
+        parser (str, optional): Parser do BeautifulSoup; `PARSER_HTML` por padrão.
+    Returns:
+        list[dict]: Um dicionário por card com `titulo`, `preco_original`,
+            `parcelamento`, `preco_pix` (None quando o campo não existe) e `link`.
+            Cards sem título são descartados.
+    """
+
+    sopa = BeautifulSoup(html, parser or PARSER_HTML, parse_only=FILTRO_CARDS)
+
+    cards = []
+    for card in sopa.find_all('a', attrs={'data-testid': 'product-card-container'}):
+        campos = dict.fromkeys(CAMPOS_CARD.values())
+        for elem in card.find_all(['h2', 'p'], attrs={'data-testid': _TESTIDS_CAMPOS}):
+            chave = CAMPOS_CARD.get((elem.name, elem['data-testid']))
+            if chave and campos[chave] is None:
+                campos[chave] = normalizar_texto(elem.text)
+
+        if campos['titulo'] is None:
+            continue
+        campos['link'] = card.get('href', '')
+        cards.append(campos)
+    return cards
@@ -0,0 +1,143 @@
+import queue
+import threading
+
+# Itens em espera entre dois estágios; a fila cheia faz o estágio anterior esperar
+CAPACIDADE_FILAS = 2
+
+# Marca de fim da fonte, repassada de estágio em estágio até o consumidor
+_FIM = object()
+
+
+class ErroEstagio:
+    """
+    Falha de um estágio em um item.
+
+    Ocupa o lugar do valor do item: os estágios seguintes o repassam sem processar
+    e o consumidor decide o que fazer (logar e seguir, por exemplo). A falha fica
+    restrita àquele item; o pipeline continua com os próximos.
+    """
+
+    def __init__(self, estagio, erro):
+        self.estagio = estagio
+        self.erro = erro
+
+    def __repr__(self):
+        return f"ErroEstagio({self.estagio!r}, {self.erro!r})"
+
+
+class _FalhaFonte:
+    def __init__(self, erro):
+        self.erro = erro
+
+
+class PipelineEstagios:
+    """
+    Executa uma fonte e uma sequência de estágios em threads dedicadas, ligadas por
+    filas limitadas.
+
+    Enquanto um estágio trabalha em um item, o anterior já adianta o seguinte (ex.:
+    o navegador busca a página N+1 enquanto a IA classifica a página N), então a
+    duração total tende à do estágio mais lento, e não à soma de todos. Cada estágio
+    tem uma única thread e as filas são FIFO: os itens chegam ao consumidor na ordem
+    da fonte. Com as filas cheias, a fonte para de produzir (contrapressão) e nunca
+    se adianta mais que alguns itens do consumidor.
+
+    Uma exceção de um estágio vira um `ErroEstagio` no lugar do valor do item. Uma
+    exceção da própria fonte é relançada no consumidor e encerra o pipeline.
+    """
+
+    def __init__(self, fonte, estagios, capacidade=CAPACIDADE_FILAS):
+        """
+        Args:
+            fonte (Iterable[tuple]): Pares (chave, valor); se for um gerador, é
+                fechado na própria thread da fonte ao fim do pipeline.
+            estagios (list[tuple[str, Callable]]): Nome e função de cada estágio, na
+                ordem. A função recebe (chave, valor) e devolve o novo valor.
+            capacidade (int): Tamanho máximo de cada fila entre estágios.
+        """
+        self.fonte = fonte
+        self.estagios = list(estagios)
+        self._filas = [queue.Queue(maxsize=capacidade) for _ in range(len(self.estagios) + 1)]
+        self._parar = threading.Event()
+        self._threads = []
+
+    def __iter__(self):
+        """
+        Yields:
+            tuple: (chave, valor) na ordem da fonte; o valor é o retorno do último
+                estágio ou um `ErroEstagio`.
+        """
+        self._iniciar()
+        try:
+            while True:
+                item = self._filas[-1].get()
+                if item is _FIM:
+                    return
+                if isinstance(item, _FalhaFonte):
+                    raise item.erro
+                yield item
+        finally:
+            self.fechar()
+
+    def fechar(self):
+        """Interrompe os estágios e espera as threads terminarem (item em andamento incluso)."""
+        self._parar.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _iniciar(self):
+        self._threads = [threading.Thread(target=self._executar_fonte, name="pipeline-fonte", daemon=True)]
+        for i, (nome, funcao) in enumerate(self.estagios):
+            self._threads.append(threading.Thread(
+                target=self._executar_estagio, args=(nome, funcao, self._filas[i], self._filas[i + 1]),
+                name=f"pipeline-{nome}", daemon=True
+            ))
+        for thread in self._threads:
+            thread.start()
+
+    def _colocar(self, fila, item):
+        while not self._parar.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _retirar(self, fila):
+        while not self._parar.is_set():
+            try:
+                return fila.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _FIM
+
+    def _executar_fonte(self):
+        saida = self._filas[0]
+        try:
+            for item in self.fonte:
+                if not self._colocar(saida, item):
+                    return
+            self._colocar(saida, _FIM)
+        except Exception as e:
+            self._colocar(saida, _FalhaFonte(e))
+        finally:
+            fechar = getattr(self.fonte, "close", None)
+            if fechar:
+                fechar()
+
+    def _executar_estagio(self, nome, funcao, entrada, saida):
+        while True:
+            item = self._retirar(entrada)
+            if item is _FIM or isinstance(item, _FalhaFonte):
+                self._colocar(saida, item)
+                return
+
+            chave, valor = item
+            if not isinstance(valor, ErroEstagio):
+                try:
+                    valor = funcao(chave, valor)
+                except Exception as e:
+                    valor = ErroEstagio(nome, e)
+            if not self._colocar(saida, (chave, valor)):
+                return
@@ -0,0 +1,181 @@
+import logging
+import os
+from datetime import datetime
+
+# Raiz do dataset Parquet (camada Bronze); partições data_coleta=/categoria=
+CAMINHO_PARQUET = "data/bronze/produtos_magalu"
+COLUNAS_PARTICAO = ["data_coleta", "categoria"]
+
+# Colunas com poucos valores distintos que se repetem em todas as linhas
+# (loja, canal, categoria...): gravadas com dictionary encoding.
+COLUNAS_DICIONARIO = frozenset({
+    "plataforma", "scraper_name", "versao_pipeline", "ambiente", "tipo_coleta",
+    "categoria", "moeda", "vendedor_nome", "tipo_vendedor", "canal_venda", "alteracao", "alvo"
+})
+
+
+def achatar_produto(produto):
+    """
+    Achata um objeto do Schema VIP (`montar_objeto_produto`) em uma linha tabular.
+
+    Os blocos `metadata`, `produto`, `preço`, `vendedor`, `plataforma` e `origem`
+    viram colunas simples; `data_coleta` (AAAA-MM-DD) é derivada do timestamp da
+    coleta e serve de partição. `alteracao` só é preenchida no modo delta e
+    `alvo`, na coleta por plano (`src.agendador`); `visto_antes`, com o filtro de
+    vistos entre execuções.
+
+    Args:
+        produto (dict): Produto no Schema VIP.
+    Returns:
+        dict: Linha com as colunas de `esquema_parquet()`.
+    """
+
+    metadata = produto["metadata"]
+    item = produto["produto"]
+    preco = produto["preço"]
+    metodos = preco["precos_por_metodo"]
+    parcelamento = preco["parcelamento"]
+    timestamp = datetime.strptime(metadata["timestamp_coleta"], "%Y-%m-%d %H:%M:%S")
+
+    return {
+        "timestamp_coleta": timestamp,
+        "data_coleta": timestamp.strftime("%Y-%m-%d"),
+        "plataforma": metadata["plataforma"],
+        "scraper_name": metadata["scraper_name"],
+        "versao_pipeline": metadata["versao_pipeline"],
+        "ambiente": metadata["ambiente"],
+        "tipo_coleta": metadata["tipo_coleta"],
+        "id_site": item["id_site"],
+        "sku": item["sku"],
+        "nome": item["nome"],
+        "categoria": item["categoria"],
+        "is_bundle": item["is_bundle"],
+        "moeda": preco["moeda"],
+        "preco_base": preco["preco_base"],
+        "preco_original": preco["preco_original"],
+        "desconto_percentual": preco["descontos"]["percentual"],
+        "desconto_valor_absoluto": preco["descontos"]["valor_absoluto"],
+        "preco_pix": metodos["pix"],
+        "preco_boleto": metodos["boleto"],
+        "preco_credito_avista": metodos["credito_avista"],
+        "parcelas_max": parcelamento["parcelas_max"],
+        "valor_parcela": parcelamento["valor_parcela"],
+        "sem_juros": parcelamento["sem_juros"],
+        "vendedor_nome": produto["vendedor"]["nome"],
+        "tipo_vendedor": produto["vendedor"]["tipo_vendedor"],
+        "canal_venda": produto["plataforma"]["canal_venda"],
+        "url_completa": produto["origem"]["url_completa"],
+        "pagina_origem": produto["origem"]["pagina_origem"],
+        "alvo": produto["origem"].get("alvo"),
+        "visto_antes": produto["origem"].get("visto_antes"),
+        "alteracao": produto.get("alteracao")
+    }
+
+
+def esquema_parquet():
+    """Schema Arrow tipado da linha achatada (ver `achatar_produto`)."""
+    import pyarrow as pa
+
+    def texto(nome):
+        return nome, pa.dictionary(pa.int32(), pa.string()) if nome in COLUNAS_DICIONARIO else pa.string()
+
+    return pa.schema([
+        ("timestamp_coleta", pa.timestamp("s")),
+        texto("data_coleta"),
+        texto("plataforma"),
+        texto("scraper_name"),
+        texto("versao_pipeline"),
+        texto("ambiente"),
+        texto("tipo_coleta"),
+        texto("id_site"),
+        texto("sku"),
+        texto("nome"),
+        texto("categoria"),
+        ("is_bundle", pa.bool_()),
+        texto("moeda"),
+        ("preco_base", pa.float64()),
+        ("preco_original", pa.float64()),
+        ("desconto_percentual", pa.float64()),
+        ("desconto_valor_absoluto", pa.float64()),
+        ("preco_pix", pa.float64()),
+        ("preco_boleto", pa.float64()),
+        ("preco_credito_avista", pa.float64()),
+        ("parcelas_max", pa.int32()),
+        ("valor_parcela", pa.float64()),
+        ("sem_juros", pa.bool_()),
+        texto("vendedor_nome"),
+        texto("tipo_vendedor"),
+        texto("canal_venda"),
+        texto("url_completa"),
+        ("pagina_origem", pa.int32()),
+        texto("alvo"),
+        ("visto_antes", pa.bool_()),
+        texto("alteracao")
+    ])
+
+
+class EscritorParquet:
+    """
+    Grava os produtos em um dataset Parquet particionado por `data_coleta`/`categoria`.
+
+    As linhas são acumuladas até `linhas_por_lote` e então descarregadas como novos
+    arquivos nas partições correspondentes, então a memória fica limitada mesmo em
+    coletas longas. Os arquivos de cada execução levam o `id_execucao` no nome,
+    e execuções diferentes nunca sobrescrevem umas às outras.
+
+    Leitura típica (só as colunas e partições necessárias):
+        pq.read_table(CAMINHO_PARQUET, columns=["id_site", "preco_base"],
+                      filters=[("categoria", "=", "Smartphone")])
+    """
+
+    def __init__(self, caminho=CAMINHO_PARQUET, id_execucao=None, linhas_por_lote=50_000, primeira_escrita=0):
+        """
+        Args:
+            caminho (str): Raiz do dataset.
+            id_execucao (str, optional): Identificador da execução nos nomes dos arquivos
+                (timestamp atual por padrão).
+            linhas_por_lote (int): Linhas acumuladas antes de cada escrita.
+            primeira_escrita (int): Número da primeira escrita nos nomes dos arquivos
+                (ao retomar uma execução, continua a numeração dela).
+        """
+        import pyarrow  # noqa: F401  (falha cedo se o pyarrow não estiver instalado)
+
+        self.caminho = caminho
+        self.id_execucao = id_execucao or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.linhas_por_lote = linhas_por_lote
+        self.total = 0
+        self._linhas = []
+        self.escritas = primeira_escrita
+        self._esquema = esquema_parquet()
+
+    def adicionar(self, produtos):
+        """Acrescenta produtos do Schema VIP; descarrega quando o lote enche."""
+        self._linhas.extend(achatar_produto(p) for p in produtos)
+        if len(self._linhas) >= self.linhas_por_lote:
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava as linhas pendentes no dataset."""
+        if not self._linhas:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tabela = pa.Table.from_pylist(self._linhas, schema=self._esquema)
+        os.makedirs(self.caminho, exist_ok=True)
+        pq.write_to_dataset(
+            tabela,
+            self.caminho,
+            partition_cols=COLUNAS_PARTICAO,
+            basename_template=f"produtos_{self.id_execucao}_{self.escritas}_{{i}}.parquet",
+            use_dictionary=sorted(COLUNAS_DICIONARIO - set(COLUNAS_PARTICAO)),
+            compression="snappy"
+        )
+        self.total += len(self._linhas)
+        self.escritas += 1
+        logging.info(f"🧱 {len(self._linhas)} linhas gravadas em Parquet ({self.caminho}).")
+        self._linhas = []
+
+    def fechar(self):
+        """Descarrega o que faltar."""
+        self.descarregar()
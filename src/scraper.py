@@ -2,30 +2,109 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import re
-import time
-import random
 import logging
 import hashlib
-from src.models.classifier import ProductClassifier
+from src.models.classifier import obter_classificador
+from src.models.cascata import CAMINHO_CASCATA, LIMIAR_CASCATA
+from src.fetchers import FetcherHttp, FetcherPoolSelenium, FetcherSelenium, PADROES_BLOQUEADOS, USER_AGENT
+from src.limitador import LimitadorAdaptativo
+from src.estado import CAMINHO_ESTADO, IndiceEstado, categoria_base_de
+from src.arquivo_html import ArquivoHtml
+from src.deduplicacao import CAMINHO_VISTOS, MemoriaVistos, VistosExecucao, chave_produto
+from src.metricas import metricas
+from src.pipeline import ErroEstagio, PipelineEstagios
 
 # Importação de ferramentas internas
 from src.parsers import (
     limpar_valor_simples_para_float, 
     calcular_preco_total_parcelado, 
-    normalizar_texto,
-    montar_objeto_produto
+    extrair_cards,
+    montar_objetos_lote
 )
 from src.utils import obter_timestamp
 
-ia_instanciada = ProductClassifier()
+# Cache persistente das respostas da IA: títulos já vistos em coletas anteriores
+# não passam de novo pelo mDeBERTa.
+CAMINHO_CACHE_IA = "data/cache/classificacoes.sqlite"
+
+# Listagem monitorada; `{pagina}` é preenchido a cada página
+URL_LISTAGEM = "https://www.magazinevoce.com.br/magazineoficialweblu/celulares-e-smartphones/l/te/?page={pagina}"
 
 class MagaluScraper:
-    def __init__(self, ambiente="dev", versao="1.0"):
+    def __init__(self, ambiente="dev", versao="1.0", modo_fetch="selenium", concorrencia=8,
+                 url_listagem=URL_LISTAGEM, fallback_navegador=True, taxa_requisicoes=0.5,
+                 timeout_cards=15, delta=False, caminho_estado=CAMINHO_ESTADO, arquivar_html=False,
+                 backend_ia="pytorch", threads_ia=None, caminho_cascata=CAMINHO_CASCATA,
+                 limiar_cascata=LIMIAR_CASCATA, deduplicar=True, dedup_entre_execucoes=False,
+                 caminho_vistos=CAMINHO_VISTOS, navegador_enxuto=True, padroes_bloqueados=None):
+        """
+        Args:
+            ambiente (str): Ambiente de execução (dev/prod), vai para os metadados.
+            versao (str): Versão do pipeline, vai para os metadados.
+            modo_fetch (str): "selenium" (navegador, padrão), "pool" (K navegadores em
+                paralelo) ou "http" (asyncio com várias páginas em paralelo e o
+                navegador como fallback).
+            concorrencia (int): Páginas simultâneas no modo "http" / navegadores no modo "pool".
+            url_listagem (str): Modelo da URL da listagem, com `{pagina}`.
+            fallback_navegador (bool): No modo "http", refaz pelo navegador as páginas
+                cujo HTML bruto veio sem cards (listagem dependente de JavaScript).
+            taxa_requisicoes (float): Taxa inicial (req/s) do limitador adaptativo, por
+                navegador nos modos com Selenium e global no modo "http".
+            timeout_cards (float): Espera máxima (s) pelos cards de cada página no navegador.
+            delta (bool): Emite só produtos novos, alterados e desaparecidos desde a
+                última coleta, consultando o índice local em `caminho_estado`.
+            caminho_estado (str): Arquivo SQLite do índice do modo delta.
+            arquivar_html (bool): Guarda o HTML bruto de cada página em um arquivo
+                comprimido da execução (`data/html/`), para reprocessar depois sem
+                coletar de novo (`src.arquivo_html.reprocessar_arquivo`).
+            backend_ia (str): Backend da IA: "pytorch", "onnx" (mDeBERTa int8, ONNX Runtime) ou
+                "embeddings" (similaridade com um modelo de sentenças).
+            threads_ia (int, optional): Threads intra-op do backend ONNX.
+            caminho_cascata (str, optional): Modelo TF-IDF que responde os títulos
+                fáceis antes do mDeBERTa (usado só se o arquivo existir).
+            limiar_cascata (float): Confiança mínima da cascata para não escalar.
+            deduplicar (bool): Ignora, antes da normalização e da IA, os cards de
+                produtos que já apareceram em outra página da mesma coleta. Numa
+                retomada, os produtos das páginas já gravadas voltam do checkpoint
+                (`vistos_retomada` de `coletar_produtos_stream`).
+            dedup_entre_execucoes (bool): Lembra os produtos de coletas anteriores e a
+                categoria de cada um (`MemoriaVistos` em `caminho_vistos`). Um produto
+                já visto, com o mesmo título, sai com o preço da coleta atual e
+                `origem.visto_antes`, mas não passa pelas regras nem pela IA. Não
+                combina com `delta`, que tem o seu próprio índice.
+            caminho_vistos (str): Arquivo da memória de produtos vistos.
+            navegador_enxuto (bool): Chrome sem imagens, com carregamento "eager" (o
+                `get` volta no DOMContentLoaded; a prontidão vem dos cards) e sem as
+                requisições de `padroes_bloqueados`, contadas no log.
+            padroes_bloqueados (list[str], optional): Curingas de URL bloqueados no
+                navegador enxuto (padrão: `src.fetchers.PADROES_BLOQUEADOS`).
+        """
+        if delta and dedup_entre_execucoes:
+            raise ValueError("O modo delta não combina com a deduplicação entre execuções.")
         self.ambiente = ambiente
         self.versao = versao
         self.tipo_coleta = "web_scraping"
+        self.modo_fetch = modo_fetch
+        self.concorrencia = concorrencia
+        self.url_listagem = url_listagem
+        self.fallback_navegador = fallback_navegador
+        self.taxa_requisicoes = taxa_requisicoes
+        self.timeout_cards = timeout_cards
+        self.delta = delta
+        self.caminho_estado = caminho_estado
+        self.estado = None
+        self.arquivar_html = arquivar_html
+        self.deduplicar = deduplicar
+        self.dedup_entre_execucoes = dedup_entre_execucoes
+        self.caminho_vistos = caminho_vistos
+        self.navegador_enxuto = navegador_enxuto
+        self.padroes_bloqueados = list(PADROES_BLOQUEADOS if padroes_bloqueados is None else padroes_bloqueados)
+        # Só existem durante uma coleta (ver `coletar_produtos_stream`)
+        self.vistos = None
+        self.vistos_anteriores = None
+        # Id (ou URL) -> páginas em que o produto apareceu na última coleta
+        self.paginas_por_produto = {}
 
         # Configura a instância do Selenium com argumentos para evitar bloqueios.
         self.chrome_options = Options()
@@ -37,21 +116,76 @@ class MagaluScraper:
         self.chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         self.chrome_options.add_experimental_option('useAutomationExtension', False)
         
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
-        self.chrome_options.add_argument(f'user-agent={user_agent}')
+        self.chrome_options.add_argument(f'user-agent={USER_AGENT}')
+
+        if navegador_enxuto:
+            # O parser só lê o HTML: imagens, fontes, anúncios e rastreadores são banda e CPU perdidas
+            self.chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+            self.chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            self.chrome_options.page_load_strategy = "eager"
+            # Log de desempenho: de onde saem as contagens de bloqueios e bytes por página
+            self.chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
         
-        self.driver = None
-        self.classificador = ProductClassifier()
+        # Configuração do classificador; a instância é obtida no primeiro uso (ver `classificador`)
+        self._parametros_ia = {"caminho_cache": CAMINHO_CACHE_IA, "backend": backend_ia, "threads": threads_ia,
+                               "caminho_cascata": caminho_cascata, "limiar_cascata": limiar_cascata}
+        self._classificador = None
 
-    def iniciar_driver(self):
+    @property
+    def classificador(self):
+        """
+        Classificador compartilhado do processo (`obter_classificador`).
+
+        Obtido só no primeiro uso: quem apenas extrai cards (os processos do
+        reprocessamento) não abre o cache de classificação nem carrega a cascata.
+        O modelo em si continua carregado só no primeiro fallback de IA.
+        """
+        if self._classificador is None:
+            self._classificador = obter_classificador(**self._parametros_ia)
+        return self._classificador
+
+    def criar_driver(self):
         """Inicializa o Chrome via Selenium com gestão automática de drivers e opções de evasão."""
         servico = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=servico, options=self.chrome_options)
+        driver = webdriver.Chrome(service=servico, options=self.chrome_options)
+        if self.navegador_enxuto and self.padroes_bloqueados:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.padroes_bloqueados})
+        return driver
+
+    def criar_limitador(self):
+        """Novo limitador adaptativo com a taxa inicial configurada."""
+        return LimitadorAdaptativo(taxa=self.taxa_requisicoes)
 
-    def fechar_driver(self):
-        """Encerra a instância do navegador e libera os recursos de memória do sistema."""
-        if self.driver:
-            self.driver.quit()
+    def criar_fetcher(self, limitador=None):
+        """
+        Monta o fetcher conforme o `modo_fetch` configurado.
+
+        Args:
+            limitador (LimitadorAdaptativo, optional): Limitador compartilhado por todas
+                as requisições do fetcher, inclusive entre os navegadores do modo "pool"
+                (o plano de coleta passa o orçamento do host). Se None, cada navegador
+                tem o seu e o modo "http" ganha um novo.
+        """
+        if self.modo_fetch == "http":
+            fallback = self._criar_fetcher_selenium(limitador) if self.fallback_navegador else None
+            return FetcherHttp(concorrencia=self.concorrencia, fallback=fallback,
+                               limitador=limitador or self.criar_limitador())
+        if self.modo_fetch == "pool":
+            return FetcherPoolSelenium(self.criar_driver, trabalhadores=self.concorrencia,
+                                       criar_limitador=self.criar_limitador, timeout_cards=self.timeout_cards,
+                                       medir_rede=self.navegador_enxuto, limitador=limitador)
+        if self.modo_fetch == "selenium":
+            return self._criar_fetcher_selenium(limitador)
+        raise ValueError(f"Modo de fetch desconhecido: {self.modo_fetch}")
+
+    def _criar_fetcher_selenium(self, limitador=None):
+        return FetcherSelenium(self.criar_driver, limitador=limitador or self.criar_limitador(),
+                               timeout_cards=self.timeout_cards, medir_rede=self.navegador_enxuto)
+
+    def montar_url(self, pagina):
+        """Retorna a URL da página de listagem informada."""
+        return self.url_listagem.format(pagina=pagina)
 
     def coletar_produtos(self, max_paginas=None):
         """
@@ -62,13 +196,17 @@ class MagaluScraper:
         preço, identidade e marketplace.
 
         O processo segue as etapas:
-        1. **Navegação**: Gerencia o loop de páginas com delays aleatórios para evitar bloqueios.
-        2. **Extração (Parsing)**: Utiliza BeautifulSoup para localizar elementos DOM (títulos, preços, links).
+        1. **Navegação**: Percorre a paginação pelo fetcher configurado (navegador que espera
+           os cards renderizarem, ou HTTP assíncrono com várias páginas em paralelo), sempre
+           sob um limitador de taxa adaptativo.
+        2. **Extração (Parsing)**: `extrair_cards` monta só os cards de produto (BeautifulSoup + lxml) e lê títulos, preços e links.
         3. **Identificação de Marketplace**: Analisa parâmetros de URL (`seller_id`) para distinguir 
            entre 'Venda Direta' (Magazine Luiza) e vendedores terceiros.
         4. **Normalização**: Converte strings monetárias e textos Unicode em tipos primitivos (float/int).
         5. **Estruturação (Schema VIP)**: Consolida os dados no formato final para ingestão em Data Lake.
 
+        Acumula tudo em memória; para catálogos grandes prefira `coletar_produtos_stream`.
+
         Args:
             max_paginas (int, optional): Limite de páginas para a coleta. 
                 Se for None, o scraper percorrerá todas as páginas disponíveis.
@@ -81,124 +219,315 @@ class MagaluScraper:
             Exception: Captura e loga erros em nível de card ou página, garantindo que 
                 uma falha isolada não interrompa todo o pipeline (resiliência).
         """
-        self.iniciar_driver()
         buffer_produtos = [] # buffer
-        pagina = 1
-        
+        for _, produtos in self.coletar_produtos_stream(max_paginas=max_paginas):
+            buffer_produtos.extend(produtos)
+        return buffer_produtos
+
+    def coletar_produtos_stream(self, max_paginas=None, pagina_inicial=1, vistos_retomada=None):
+        """
+        Versão em streaming de `coletar_produtos`: entrega os produtos página a página.
+
+        Nada é acumulado entre páginas, então a memória fica estável qualquer que seja
+        o tamanho do catálogo; quem consome decide como persistir cada lote.
+
+        No modo delta, cada página traz só os produtos novos ou alterados (campo
+        `alteracao`) e, se o catálogo foi percorrido até o fim, um último lote com
+        página None traz os produtos que desapareceram.
+
+        Args:
+            max_paginas (int, optional): Limite de páginas para a coleta (None = todas).
+            pagina_inicial (int): Primeira página (> 1 ao retomar uma coleta interrompida).
+            vistos_retomada (dict[str, int], optional): Produtos já gravados pela coleta
+                interrompida (`vistos_ate`, guardado no checkpoint), para que não saiam de novo.
+        Yields:
+            tuple[int | None, list[dict]]: Número da página e seus produtos no Schema VIP.
+        """
+        fetcher = self.criar_fetcher()
+        total = 0
+        catalogo_completo = False
+        concluida = False
+        if self.delta:
+            self.estado = IndiceEstado(self.caminho_estado, assinatura=self.classificador.assinatura())
+        arquivo = ArquivoHtml() if self.arquivar_html else None
+        self._iniciar_deduplicacao(vistos_retomada)
+
+        def buscar():
+            paginas = fetcher.iterar_paginas(self.montar_url, pagina_inicial=pagina_inicial, max_paginas=max_paginas)
+            try:
+                for pagina, html in paginas:
+                    if html is None:
+                        html = ErroEstagio("busca", "HTML não foi obtido.")
+                    else:
+                        # A busca adianta várias páginas por vez; o log marca a entrega à extração
+                        logging.info("📡 Página %s buscada.", pagina)
+                    yield pagina, html
+            finally:
+                paginas.close()
+
+        # Páginas que a busca adiantou além do fim do catálogo não são arquivadas
+        fim_catalogo = []
+
+        def extrair(pagina, html):
+            if fim_catalogo:
+                return None
+            # Com o HTML arquivado, a página inteira leva o mesmo timestamp do
+            # arquivo, e o reprocessamento reproduz exatamente estes produtos
+            momento = None
+            if arquivo:
+                momento = obter_timestamp()
+                arquivo.gravar(pagina, self.montar_url(pagina), html, timestamp=momento)
+            itens = self.extrair_itens(html, pagina, timestamp=momento)
+            if itens is None:
+                fim_catalogo.append(pagina)
+            return itens
+
+        def classificar(pagina, itens):
+            return None if itens is None else self.classificar_itens(itens)
+
+        # Busca, extração e classificação em threads próprias: o navegador já busca
+        # as próximas páginas enquanto a IA trabalha na atual
+        pipeline = PipelineEstagios(buscar(), [("extração", extrair), ("classificação", classificar)])
+
         try:
-            while True:
-                if max_paginas and pagina > max_paginas:
-                    logging.info(f"🛑 Limite de {max_paginas} páginas atingido.")
+            for pagina, produtos in pipeline:
+                if isinstance(produtos, ErroEstagio):
+                    metricas.incrementar("paginas_com_erro")
+                    logging.error(f"⚠️ Erro crítico na página {pagina} ({produtos.estagio}): {produtos.erro}")
+                    continue
+
+                if produtos is None:
+                    logging.warning(f"🏁 Fim da linha na página {pagina}. Não há mais cards.")
+                    catalogo_completo = True
                     break
 
-                url = f"https://www.magazinevoce.com.br/magazineoficialweblu/celulares-e-smartphones/l/te/?page={pagina}"
-                logging.info(f"📡 Acessando Página {pagina}...")
+                if self.estado:
+                    produtos = self.estado.filtrar_alterados(produtos)
+
+                total += len(produtos)
+                metricas.incrementar("paginas")
+                metricas.incrementar("produtos", len(produtos))
+                logging.info("✅ Página %s finalizada. Total: %d itens.", pagina, total)
+                yield pagina, produtos
+            else:
+                if max_paginas:
+                    logging.info(f"🛑 Limite de {max_paginas} páginas atingido.")
+            pipeline.fechar()
+
+            if self.estado:
+                removidos = self.estado.finalizar(catalogo_completo)
+                if removidos:
+                    yield None, removidos
+            concluida = True
+
+        finally:
+            pipeline.fechar()
+            fetcher.fechar()
+            if arquivo:
+                arquivo.fechar()
+            if self.estado:
+                if not concluida:
+                    self.estado.descartar()
+                self.estado.fechar()
+                self.estado = None
+            self._encerrar_deduplicacao(concluida)
+            if self.classificador.cache:
+                logging.info(f"🗃️ Cache de classificação: {self.classificador.cache.estatisticas()}")
+            if not self.classificador.carregado:
+                logging.info("🤖 Nenhum título precisou do modelo nesta coleta (mDeBERTa não foi carregado).")
+
+    def _iniciar_deduplicacao(self, vistos_retomada=None):
+        """Zera os produtos vistos no início de uma coleta e carrega a memória das anteriores."""
+        if self.deduplicar or self.dedup_entre_execucoes:
+            self.vistos = VistosExecucao()
+            if vistos_retomada:
+                self.vistos.restaurar(vistos_retomada)
+        if self.dedup_entre_execucoes:
+            self.vistos_anteriores = MemoriaVistos.carregar(self.caminho_vistos, assinatura=self.classificador.assinatura())
+
+    def vistos_ate(self, pagina):
+        """
+        Produtos da coleta em andamento vistos pela primeira vez até a `pagina`
+        (chave -> página), para o checkpoint. Vazio sem deduplicação.
+        """
+        return self.vistos.ate_pagina(pagina) if self.vistos is not None else {}
+
+    def _encerrar_deduplicacao(self, concluida):
+        """Resume os cards repetidos e, se a coleta terminou, grava a memória de vistos."""
+        if self.vistos is not None:
+            self.paginas_por_produto = self.vistos.paginas
+            repetidos = self.vistos.repetidos()
+            if self.vistos.duplicados:
+                logging.info(f"🔁 {self.vistos.duplicados} cards repetidos ignorados "
+                             f"({len(repetidos)} produtos apareceram em mais de uma página).")
+        if self.vistos_anteriores is not None and concluida:
+            novos = self.vistos_anteriores.salvar(self.caminho_vistos)
+            logging.info(f"🧠 Memória de vistos: {novos} produtos novos ({self.vistos_anteriores.itens} no total).")
+        self.vistos = None
+        self.vistos_anteriores = None
+
+    def processar_pagina(self, html, pagina, timestamp=None):
+        """
+        Extrai e estrutura os produtos de uma página de listagem.
+
+        Independe de como o HTML foi obtido (navegador ou HTTP), então é o mesmo
+        código de parsing para todos os fetchers. Na coleta, as duas metades
+        (`extrair_itens` e `classificar_itens`) rodam em estágios separados.
+
+        Args:
+            html (str): HTML da página de listagem.
+            pagina (int): Número da página (vai para o campo `origem`).
+            timestamp (str, optional): Momento da coleta; por padrão, agora. O
+                reprocessamento de HTML arquivado passa o horário original.
+        Returns:
+            list[dict] | None: Produtos no Schema VIP, ou None se a página não tem
+                nenhum card (fim do catálogo).
+        """
+
+        itens = self.extrair_itens(html, pagina, timestamp=timestamp)
+        if itens is None:
+            return None
+        return self.classificar_itens(itens)
+
+    def extrair_itens(self, html, pagina, timestamp=None):
+        """
+        Lê os cards de uma página e normaliza preços, identidade e vendedor.
+
+        Args:
+            html (str): HTML da página de listagem.
+            pagina (int): Número da página.
+            timestamp (str, optional): Momento da coleta; por padrão, agora.
+        Returns:
+            list[tuple[dict, dict]] | None: Pares (dados_limpos, contexto) de cada
+                card, ou None se a página não tem nenhum card (fim do catálogo).
+        """
+
+        with metricas.cronometrar("parse"):
+            cards = extrair_cards(html)
+        if not cards:
+            return None
+        metricas.observar("cards_por_pagina", len(cards))
+        metricas.incrementar("cards", len(cards))
+
+        # Cards da página; a categorização (e o fallback de IA) é resolvida
+        # em lote ao final da página
+        itens_pagina = []
+        duplicados = 0
+        for card in cards:
+            try:
+                txt_titulo = card['titulo']
+                link_relativo = card['link']
+
+                # 1. Identidade e deduplicação: cards repetidos (patrocinados, destaques) param aqui
+                match_p = re.search(r'/p/(\d+)/', link_relativo)
+                if match_p:
+                    product_id = match_p.group(1)
+                else:
+                    product_id = hashlib.md5(txt_titulo.encode()).hexdigest()[:10]
+                url_produto = f"https://www.magazinevoce.com.br{link_relativo}"
+
+                if self.vistos is not None and not self.vistos.registrar(chave_produto(product_id, url_produto), pagina):
+                    duplicados += 1
+                    continue
+
+                # 2. Tratamento de Textos e Preços (campos já extraídos e normalizados)
+                txt_antigo = card['preco_original'] if card['preco_original'] is not None else "N/A"
+                txt_pix = card['preco_pix'] if card['preco_pix'] is not None else "N/A"
+                info_parcela = card['parcelamento'] if card['parcelamento'] is not None else "N/A"
+
+                num_antigo = limpar_valor_simples_para_float(txt_antigo)
+                num_pix = limpar_valor_simples_para_float(txt_pix)
+
+                # 3. Lógica do Preço de Venda
+                if info_parcela != "N/A" and "x" in info_parcela.lower():
+                    num_atual = calcular_preco_total_parcelado(info_parcela)
+                elif num_pix > 0:
+                    num_atual = num_pix
+                else:
+                    num_atual = num_antigo
+
+                # 4. VENDEDOR (Nova Lógica)
+                # --- BUSCA DO VENDEDOR NO LINK ---
+                # Tentamos encontrar 'seller_id=nome_da_loja'
+                vendedor_nome = "Magazine Luiza"
+                match_seller = re.search(r'seller_id=([^&/]+)', link_relativo)
                 
-                try:
-                    self.driver.get(url)
-                    time.sleep(random.uniform(4, 7))
+                if match_seller:
+                    raw_seller = match_seller.group(1).lower()
                     
-                    sopa = BeautifulSoup(self.driver.page_source, 'html.parser')
-                    cards = sopa.find_all(['a'], attrs={'data-testid': 'product-card-container'})
-
-                    if not cards:
-                        logging.warning(f"🏁 Fim da linha na página {pagina}. Não há mais cards.")
-                        break
-
-                    for card in cards:
-                        try:
-                            # 1. Busca de Elementos
-                            titulo_elem = card.find('h2', attrs={'data-testid': 'product-title'})
-                            if not titulo_elem: continue
-
-                            preco_original_elem = card.find('p', attrs={'data-testid': 'price-original'})
-                            texto_parcelamento_elem = card.find('p', attrs={'data-testid': 'installment'})
-                            preco_pix_elem = card.find('p', attrs={'data-testid': 'price-value'})
-
-                            # 2. Tratamento de Textos e Preços
-                            txt_titulo = normalizar_texto(titulo_elem.text)
-                            txt_antigo = normalizar_texto(preco_original_elem.text) if preco_original_elem else "N/A"
-                            txt_pix = normalizar_texto(preco_pix_elem.text) if preco_pix_elem else "N/A"
-                            info_parcela = normalizar_texto(texto_parcelamento_elem.text) if texto_parcelamento_elem else "N/A"
-
-                            num_antigo = limpar_valor_simples_para_float(txt_antigo)
-                            num_pix = limpar_valor_simples_para_float(txt_pix)
-
-                            # 3. Lógica do Preço de Venda
-                            if info_parcela != "N/A" and "x" in info_parcela.lower():
-                                num_atual = calcular_preco_total_parcelado(info_parcela)
-                            elif num_pix > 0:
-                                num_atual = num_pix
-                            else:
-                                num_atual = num_antigo
-
-                            # 4. Extração de ID, Link e VENDEDOR (Nova Lógica)
-                            link_relativo = card.get('href', '')
-                            
-                            # --- BUSCA DO VENDEDOR NO LINK ---
-                            # Tentamos encontrar 'seller_id=nome_da_loja'
-                            vendedor_nome = "Magazine Luiza"
-                            match_seller = re.search(r'seller_id=([^&/]+)', link_relativo)
-                            
-                            if match_seller:
-                                raw_seller = match_seller.group(1).lower()
-                                
-                                # Se o seller_id for diferente de magazineluiza, é Marketplace!
-                                if "magazineluiza" not in raw_seller:
-                                    vendedor_nome = raw_seller.replace('oficial', '').capitalize()
-                                    canal_venda = "MARKETPLACE"
-                                else:
-                                    # Caso tenha seller_id mas seja o do próprio Magalu
-                                    vendedor_nome = "Magazine Luiza"
-                                    canal_venda = "VENDA_DIRETA"
-                              
-                            # ---------------------------------
-
-                            product_id = "N/A"
-                            match_p = re.search(r'/p/(\d+)/', link_relativo)
-                            
-                            if match_p:
-                                product_id = match_p.group(1)
-                            else:
-                                product_id = hashlib.md5(txt_titulo.encode()).hexdigest()[:10]
-
-                            # 5. Organização dos dados para o Schema VIP
-                            dados_limpos = {
-                                "id_produto": product_id,
-                                "titulo": txt_titulo,
-                                "preco_antigo": num_antigo,
-                                "preco_pix": num_pix,
-                                "preco_atual": num_atual,
-                                "parcelamento_original": info_parcela
-                            }
-
-                            contexto = {
-                                "timestamp": obter_timestamp(),
-                                "ambiente": self.ambiente,
-                                "versao_pipeline": self.versao,
-                                "tipo_coleta": self.tipo_coleta,
-                                "url_produto": f"https://www.magazinevoce.com.br{link_relativo}",
-                                "canal_venda": canal_venda,
-                                "loja": vendedor_nome,
-                                "pagina": pagina
-                            }
-
-                            # 6. Montagem e Buffer
-                            produto_final = montar_objeto_produto(dados_limpos, contexto, classificador_ai=ia_instanciada)
-                            buffer_produtos.append(produto_final)
-
-                        except Exception as e:
-                            logging.error(f"❌ Erro ao processar card na página {pagina}: {e}")
-                            continue 
-
-                    logging.info(f"✅ Página {pagina} finalizada. Total: {len(buffer_produtos)} itens.")
-                    pagina += 1
-
-                except Exception as e:
-                    logging.error(f"⚠️ Erro crítico na página {pagina}: {e}")
-                    pagina += 1 
+                    # Se o seller_id for diferente de magazineluiza, é Marketplace!
+                    if "magazineluiza" not in raw_seller:
+                        vendedor_nome = raw_seller.replace('oficial', '').capitalize()
+                        canal_venda = "MARKETPLACE"
+                    else:
+                        # Caso tenha seller_id mas seja o do próprio Magalu
+                        vendedor_nome = "Magazine Luiza"
+                        canal_venda = "VENDA_DIRETA"
+                  
+                # ---------------------------------
 
-        finally:
-            self.fechar_driver()
-            
-        return buffer_produtos
\ No newline at end of file
+                # 5. Organização dos dados para o Schema VIP
+                dados_limpos = {
+                    "id_produto": product_id,
+                    "titulo": txt_titulo,
+                    "preco_antigo": num_antigo,
+                    "preco_pix": num_pix,
+                    "preco_atual": num_atual,
+                    "parcelamento_original": info_parcela
+                }
+
+                contexto = {
+                    "timestamp": timestamp or obter_timestamp(),
+                    "ambiente": self.ambiente,
+                    "versao_pipeline": self.versao,
+                    "tipo_coleta": self.tipo_coleta,
+                    "url_produto": url_produto,
+                    "canal_venda": canal_venda,
+                    "loja": vendedor_nome,
+                    "pagina": pagina
+                }
+
+                itens_pagina.append((dados_limpos, contexto))
+
+            except Exception as e:
+                logging.error(f"❌ Erro ao processar card na página {pagina}: {e}")
+                continue 
+
+        if duplicados:
+            metricas.incrementar("cards_duplicados", duplicados)
+        return itens_pagina
+
+    def classificar_itens(self, itens_pagina):
+        """
+        Categoriza os itens de uma página e monta os objetos do Schema VIP.
+
+        Args:
+            itens_pagina (list[tuple[dict, dict]]): Saída de `extrair_itens`.
+        Returns:
+            list[dict]: Produtos no Schema VIP.
+        """
+
+        # Página só com cards repetidos: nada a montar
+        if not itens_pagina:
+            return []
+
+        # 6. Montagem (IA em uma única chamada por página; no modo delta, títulos
+        # que não mudaram reaproveitam a categoria da coleta anterior, e com a memória
+        # de vistos, produtos de coletas anteriores nem passam pelas regras e pela IA)
+        conhecidas = self.estado.categorias_conhecidas(itens_pagina) if self.estado else None
+        if self.vistos_anteriores is None:
+            return montar_objetos_lote(itens_pagina, classificador_ai=self.classificador, categorias_conhecidas=conhecidas)
+
+        chaves = [chave_produto(dados["id_produto"], contexto["url_produto"]) for dados, contexto in itens_pagina]
+        pares = [(chave, dados["titulo"]) for chave, (dados, _) in zip(chaves, itens_pagina)]
+        bases = self.vistos_anteriores.consultar(pares)
+        vistos_antes = {chave for chave, base in zip(chaves, bases) if base is not None}
+        metricas.incrementar("cards_vistos_antes", len(vistos_antes))
+
+        produtos = montar_objetos_lote(itens_pagina, classificador_ai=self.classificador, bases=bases)
+        for produto in produtos:
+            chave = chave_produto(produto["produto"]["id_site"], produto["origem"]["url_completa"])
+            produto["origem"]["visto_antes"] = chave in vistos_antes
+            if chave not in vistos_antes:
+                self.vistos_anteriores.registrar(chave, produto["produto"]["nome"], categoria_base_de(produto))
+        return produtos
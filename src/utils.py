@@ -1,21 +1,116 @@
+import atexit
 import logging
+import queue
+import threading
 import time
 import os
+from logging.handlers import QueueHandler, QueueListener
+
+FORMATO_LOG = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Thread de escrita dos logs e parâmetros da última configuração (ver `reabrir_logs`)
+_ouvinte = None
+_handler_fila = None
+_configuracao = None
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Deixa passar todo registro INFO ou acima e só 1 a cada `intervalo` registros
+    DEBUG de uma mesma mensagem (mesmo logger e mesmo modelo de texto).
+
+    O detalhe por item (título, scores da IA, produto montado) fica disponível em
+    DEBUG sem que um lote grande gere milhares de linhas.
+    """
+
+    def __init__(self, intervalo=100):
+        super().__init__()
+        self.intervalo = max(1, int(intervalo))
+        self._contagens = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.intervalo == 1:
+            return True
+        chave = (record.name, record.msg)
+        with self._lock:
+            contagem = self._contagens.get(chave, 0)
+            self._contagens[chave] = contagem + 1
+        return contagem % self.intervalo == 0
+
+
+class _HandlerFila(QueueHandler):
+    # A fila é do próprio processo: o registro segue sem formatar e a mensagem só
+    # é montada (argumentos %s incluídos) na thread de escrita
+    def prepare(self, record):
+        return record
+
+
+def configurar_logs(nivel=logging.INFO, amostragem_debug=100):
+    """
+    Configura o sistema de logs e garante que a pasta de logs exista.
+
+    Quem loga só enfileira o registro; uma thread em segundo plano formata e grava
+    no arquivo `data/logs/scraping.log` e no console. Registros abaixo de `nivel`
+    são descartados antes de qualquer formatação.
+
+    Args:
+        nivel (int | str): Nível mínimo (ex.: logging.INFO, "DEBUG").
+        amostragem_debug (int): Em DEBUG, grava 1 a cada N registros de cada
+            mensagem por item (1 grava todos).
+    """
+    global _ouvinte, _handler_fila, _configuracao
 
-def configurar_logs():
-    """Configura o sistema de logs e garante que a pasta de logs exista"""
     if not os.path.exists('data/logs'):
         os.makedirs('data/logs')
-        
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("data/logs/scraping.log", encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+
+    encerrar_logs()
+    formatador = logging.Formatter(FORMATO_LOG)
+    handlers = [logging.FileHandler("data/logs/scraping.log", encoding='utf-8'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatador)
+
+    fila = queue.SimpleQueue()
+    _handler_fila = _HandlerFila(fila)
+    _handler_fila.addFilter(FiltroAmostragem(amostragem_debug))
+
+    raiz = logging.getLogger()
+    raiz.addHandler(_handler_fila)
+    raiz.setLevel(nivel)
+
+    _ouvinte = QueueListener(fila, *handlers)
+    _ouvinte.start()
+    if _configuracao is None:
+        atexit.register(encerrar_logs)
+    _configuracao = {"nivel": nivel, "amostragem_debug": amostragem_debug}
+
+
+def reabrir_logs():
+    """
+    Recria a thread de escrita em um processo filho criado por fork (a thread do
+    pai não existe no filho). Não faz nada se os logs nunca foram configurados.
+    """
+    global _ouvinte
+    if _configuracao is None:
+        return
+    # A fila herdada pode ter ficado com registros do pai pela metade: começa do zero
+    _ouvinte = None
+    configurar_logs(**_configuracao)
+
+
+def encerrar_logs():
+    """Esvazia a fila, grava o que faltou e remove o handler da fila."""
+    global _ouvinte, _handler_fila
+    if _ouvinte is not None:
+        _ouvinte.stop()
+        for handler in _ouvinte.handlers:
+            handler.close()
+        _ouvinte = None
+    if _handler_fila is not None:
+        logging.getLogger().removeHandler(_handler_fila)
+        _handler_fila = None
+
 
 def obter_timestamp():
     """Retorna o horário atual formatado para o JSON"""
-    return time.strftime("%Y-%m-%d %H:%M:%S")
\ No newline at end of file
+    return time.strftime("%Y-%m-%d %H:%M:%S")
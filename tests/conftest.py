@@ -0,0 +1,48 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+PASTA_FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def site_local():
+    """
+    Sobe um servidor HTTP local que imita a listagem do Magalu.
+
+    As páginas 1 e 2 devolvem o HTML salvo em `fixtures/listagem_magalu.html`;
+    da página 3 em diante, a listagem vazia (fim do catálogo). O servidor
+    registra os caminhos requisitados em `servidor.requisicoes`.
+    """
+
+    listagem = (PASTA_FIXTURES / "listagem_magalu.html").read_bytes()
+    vazia = (PASTA_FIXTURES / "listagem_vazia.html").read_bytes()
+    requisicoes = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            requisicoes.append(self.path)
+            pagina = int(parse_qs(urlparse(self.path).query).get("page", ["1"])[0])
+            corpo = listagem if pagina <= 2 else vazia
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    servidor.requisicoes = requisicoes
+    servidor.url_base = f"http://127.0.0.1:{servidor.server_address[1]}"
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
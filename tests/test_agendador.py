@@ -0,0 +1,126 @@
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from src.fetchers import MARCADOR_CARD
+
+from src.agendador import AgendadorColeta, ler_plano
+
+def test_plano_yaml_e_toml_com_validacao(tmp_path):
+    """Valida a leitura do plano em YAML e em TOML, os padrões e a recusa de planos inválidos."""
+    yaml = tmp_path / "plano.yaml"
+    yaml.write_text("alvos:\n  - nome: celulares\n    url: http://site/celulares?page={pagina}\n    prioridade: 2\n",
+                    encoding="utf-8")
+    toml = tmp_path / "plano.toml"
+    toml.write_text('concorrencia = 4\n[[alvos]]\nnome = "tv"\nurl = "http://site/tv?page={pagina}"\nmax_paginas = 3\n',
+                    encoding="utf-8")
+
+    assert ler_plano(str(yaml)) == {
+        "concorrencia": 8, "requisicoes_por_segundo_por_host": 0.5,
+        "alvos": [{"nome": "celulares", "url": "http://site/celulares?page={pagina}", "max_paginas": None, "prioridade": 2}]
+    }
+    assert ler_plano(str(toml))["alvos"][0]["max_paginas"] == 3
+
+    yaml.write_text("alvos:\n  - nome: tv\n    url: http://site/tv\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        ler_plano(str(yaml))
+
+def test_agendador_intercala_alvos_contra_site_local(site_local, tmp_path, monkeypatch):
+    """Valida a intercalação por prioridade, o teto de páginas, um fetcher por host, o classificador único e a marcação por alvo."""
+    monkeypatch.chdir(tmp_path)
+    porta = site_local.url_base.rsplit(":", 1)[1]
+    plano = {
+        "concorrencia": 3,
+        "requisicoes_por_segundo_por_host": 100,
+        "alvos": [
+            {"nome": "informatica", "url": site_local.url_base + "/informatica/?page={pagina}", "max_paginas": 1, "prioridade": 1},
+            {"nome": "celulares", "url": site_local.url_base + "/celulares/?page={pagina}", "max_paginas": None, "prioridade": 2},
+            # Mesmo servidor por outro nome: outro host, com o seu próprio fetcher e orçamento
+            {"nome": "tv", "url": f"http://localhost:{porta}/tv/?page={{pagina}}", "max_paginas": None, "prioridade": 1},
+        ]
+    }
+    agendador = AgendadorColeta(plano, modo_fetch="http", fallback_navegador=False)
+    lotes = list(agendador.coletar_stream())
+
+    # Rodadas de 3 páginas; celulares (prioridade 2) ganha duas vagas na segunda
+    assert [chave for chave, _ in lotes] == [("celulares", 1), ("informatica", 1), ("tv", 1), ("celulares", 2), ("tv", 2)]
+    assert sorted(site_local.requisicoes) == sorted([
+        "/celulares/?page=1", "/informatica/?page=1", "/tv/?page=1",
+        "/celulares/?page=2", "/celulares/?page=3", "/tv/?page=2",
+        "/tv/?page=3", "/tv/?page=4", "/tv/?page=5"  # só a tv sobrou: a última rodada é toda dela
+    ])
+
+    produtos = [p for _, lote in lotes for p in lote]
+    por_alvo = {}
+    for produto in produtos:
+        por_alvo[produto["origem"]["alvo"]] = por_alvo.get(produto["origem"]["alvo"], 0) + 1
+    assert por_alvo == {"celulares": 3, "informatica": 3, "tv": 3}  # a página 2 repete os cards da 1
+
+    classificadores = {id(scraper.classificador) for scraper in agendador.scrapers.values()}
+    assert len(classificadores) == 1
+
+class NavegadorLocal:
+    """Imita o WebDriver buscando a página por HTTP; conta os navegadores abertos e as buscas simultâneas."""
+
+    trava = threading.Lock()
+
+    def __init__(self, registro):
+        self.registro = registro
+        self.page_source = None
+        with self.trava:
+            registro["abertos"] += 1
+
+    def get(self, url):
+        with self.trava:
+            self.registro["em_voo"] += 1
+            self.registro["pico"] = max(self.registro["pico"], self.registro["em_voo"])
+        try:
+            with urllib.request.urlopen(url) as resposta:
+                self.page_source = resposta.read().decode("utf-8")
+            time.sleep(0.1)  # renderização: dá tempo de as buscas do pool se sobreporem
+        finally:
+            with self.trava:
+                self.registro["em_voo"] -= 1
+
+    def find_elements(self, por, seletor):
+        return [object()] * self.page_source.count(MARCADOR_CARD)
+
+    def execute_script(self, script):
+        return "complete"
+
+    def quit(self):
+        with self.trava:
+            self.registro["fechados"] += 1
+
+def test_agendador_modo_pool_reaproveita_navegadores_entre_rodadas(site_local, tmp_path, monkeypatch):
+    """Valida o modo pool no plano: um pool por host que dura o plano inteiro, em paralelo e com limitador único."""
+    monkeypatch.chdir(tmp_path)
+    plano = {
+        "concorrencia": 2,
+        "requisicoes_por_segundo_por_host": 100,
+        "alvos": [
+            {"nome": "celulares", "url": site_local.url_base + "/celulares/?page={pagina}", "max_paginas": 4, "prioridade": 1},
+            {"nome": "tv", "url": site_local.url_base + "/tv/?page={pagina}", "max_paginas": 4, "prioridade": 1},
+        ]
+    }
+    registro = {"abertos": 0, "fechados": 0, "em_voo": 0, "pico": 0}
+    agendador = AgendadorColeta(plano, modo_fetch="pool", timeout_cards=0.5, deduplicar=False)
+    for scraper in agendador.scrapers.values():
+        scraper.criar_driver = lambda: NavegadorLocal(registro)
+
+    limitadores = []
+    criar_fetcher = agendador.scrapers["celulares"].criar_fetcher
+    def criar_fetcher_registrando(limitador=None):
+        limitadores.append(limitador)
+        return criar_fetcher(limitador=limitador)
+    agendador.scrapers["celulares"].criar_fetcher = criar_fetcher_registrando
+
+    lotes = list(agendador.coletar_stream())
+
+    assert [chave for chave, _ in lotes] == [("celulares", 1), ("tv", 1), ("celulares", 2), ("tv", 2)]
+    assert len(site_local.requisicoes) == 6  # rodadas 1 e 2, e a 3 encontra o fim dos dois alvos
+    assert registro["abertos"] == 2 == registro["fechados"]  # 2 navegadores para as 3 rodadas
+    assert registro["pico"] == 2
+    assert len(limitadores) == 1 and limitadores[0] is not None
@@ -1,13 +1,13 @@
 import pytest
 from src.parsers import montar_objeto_produto
-from src.models.classifier import ProductClassifier
+from src.models.classifier import obter_classificador
 
 # Criamos uma "Fixture" para carregar a IA apenas uma vez para todos os testes
 # O Pytest carrega a IA uma única vez quando o arquivo de teste começa, guarda ela na memória, e "empresta" o mesmo objeto para todos os testes daquele arquivo.
 @pytest.fixture(scope="module")
 def ia():
     """Inicializa o classificador de IA uma única vez para o módulo de testes."""
-    return ProductClassifier()
+    return obter_classificador()
 
 @pytest.fixture
 def contexto_padrao():
@@ -0,0 +1,35 @@
+from src.arquivo_html import ArquivoHtml, ler_indice, ler_pagina, reprocessar_arquivo
+from src.scraper import MagaluScraper
+
+def test_arquivo_html_le_qualquer_pagina_pela_posicao(tmp_path):
+    """Valida o arquivo comprimido: cada página volta íntegra direto pelo índice."""
+    arquivo = ArquivoHtml(str(tmp_path), id_execucao="execucao")
+    paginas = {1: "<html>" + "a" * 5000 + "</html>", 2: "<html>Página ção</html>", 3: "<html></html>"}
+    for numero, html in paginas.items():
+        arquivo.gravar(numero, f"http://site/?page={numero}", html)
+    arquivo.fechar()
+
+    caminho = str(tmp_path / "execucao")
+    indice = ler_indice(caminho)
+    assert [e["pagina"] for e in indice] == [1, 2, 3]
+    assert all(ler_pagina(caminho, e) == paginas[e["pagina"]] for e in reversed(indice))
+    assert arquivo.bytes_comprimidos < arquivo.bytes_html
+
+def test_reprocessamento_reproduz_a_coleta_sem_navegador(site_local, tmp_path, monkeypatch):
+    """Valida o record-and-replay: o HTML arquivado na coleta gera os mesmos produtos offline, em paralelo."""
+    monkeypatch.chdir(tmp_path)
+    bot = MagaluScraper(modo_fetch="http", concorrencia=2, url_listagem=site_local.url_base + "/lista/?page={pagina}",
+                        fallback_navegador=False, taxa_requisicoes=100, arquivar_html=True)
+    coletados = bot.coletar_produtos()
+
+    execucao = next((tmp_path / "data/html").iterdir())
+    assert [e["pagina"] for e in ler_indice(str(execucao))] == [1, 2, 3]  # a página 3 é o fim do catálogo
+
+    reprocessados = [p for _, produtos in reprocessar_arquivo(str(execucao), trabalhadores=2) for p in produtos]
+
+    assert reprocessados == coletados
+
+    # Os processos só extraem: quem não categoriza nunca abre o classificador (nem o cache)
+    extrator = MagaluScraper()
+    assert extrator.extrair_itens(ler_pagina(str(execucao), ler_indice(str(execucao))[0]), 1)
+    assert extrator._classificador is None
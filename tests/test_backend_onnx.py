@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.models.backend_onnx import (ARQUIVO_ONNX, TITULOS_PARIDADE, PipelineOnnx, comparar_resultados, indice_entailment,
+                                     resultado_zero_shot)
+from src.models.classifier import ProductClassifier
+from src.parsers import categorizar_por_regras
+
+# Config do mDeBERTa-v3-base-mnli-xnli: entailment é a classe 0
+LABEL2ID = {"entailment": 0, "neutral": 1, "contradiction": 2}
+
+def _sigmoide(x):
+    return 1 / (1 + math.exp(-x))
+
+def test_scores_zero_shot_seguem_o_pipeline_do_transformers():
+    """Valida a conversão de logits NLI em scores: multi_label por rótulo e softmax entre rótulos."""
+    entailment = indice_entailment(LABEL2ID)
+    assert entailment == 0
+    assert indice_entailment({"LABEL_0": 0, "LABEL_1": 1}) == -1
+
+    rotulos = ["Tablet", "Chip", "Suporte"]
+    logits = [[4.0, 0.0, -2.0], [-1.0, 0.0, 1.0], [0.5, 0.0, 0.5]]
+
+    resultado = resultado_zero_shot("Suporte Veicular", rotulos, logits, entailment, multi_label=True)
+    # multi_label: softmax entre [contradição, entailment] de cada par = sigmoide(entail - contradição)
+    assert resultado["labels"] == ["Tablet", "Suporte", "Chip"]
+    assert resultado["scores"] == pytest.approx([_sigmoide(6.0), 0.5, _sigmoide(-2.0)])
+
+    unico = resultado_zero_shot("Suporte Veicular", rotulos, logits, entailment, multi_label=False)
+    soma = math.exp(4.0) + math.exp(-1.0) + math.exp(0.5)
+    assert unico["scores"] == pytest.approx([math.exp(4.0) / soma, math.exp(0.5) / soma, math.exp(-1.0) / soma])
+
+def test_backend_onnx_tem_cache_proprio_e_backend_invalido_falha():
+    """Valida que o backend int8 não reaproveita respostas do fp32 e que backends desconhecidos são recusados."""
+    pytorch = ProductClassifier()
+    onnx = ProductClassifier(backend="onnx")
+
+    assert not onnx.carregado  # nada é carregado na construção
+    assert onnx.assinatura() != pytorch.assinatura()
+    with pytest.raises(ValueError):
+        ProductClassifier(backend="tensorflow")
+
+def _modelo_nli_minimo(caminho):
+    """Grafo ONNX com as entradas do mDeBERTa exportado: logits = [s, 0, -s], s = soma dos ids mascarados."""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+
+    grafo = helper.make_graph(
+        [
+            helper.make_node("Cast", ["input_ids"], ["ids"], to=TensorProto.FLOAT),
+            helper.make_node("Cast", ["attention_mask"], ["mascara"], to=TensorProto.FLOAT),
+            helper.make_node("Mul", ["ids", "mascara"], ["mascarados"]),
+            helper.make_node("ReduceSum", ["mascarados", "eixo"], ["soma"], keepdims=1),
+            helper.make_node("MatMul", ["soma", "pesos"], ["logits"]),
+        ],
+        "nli_minimo",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["lote", "sequencia"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["lote", "sequencia"])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["lote", 3])],
+        [numpy_helper.from_array(np.array([1], dtype=np.int64), "eixo"),
+         numpy_helper.from_array(np.array([[1.0, 0.0, -1.0]], dtype=np.float32), "pesos")]
+    )
+    modelo = helper.make_model(grafo, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+    onnx.save(modelo, str(caminho / ARQUIVO_ONNX))
+
+class TokenizerPares:
+    """Tokenizer de mentira: um id por palavra da hipótese (3 para "Tablet", -1 para as demais), com padding."""
+
+    def __call__(self, premissas, hipoteses, padding=True, truncation=None, return_tensors="np"):
+        ids = [[3 if palavra == "Tablet" else -1 for palavra in h.split()] for h in hipoteses]
+        largura = max(map(len, ids))
+        return {
+            "input_ids": np.array([i + [0] * (largura - len(i)) for i in ids]),
+            "attention_mask": np.array([[1] * len(i) + [0] * (largura - len(i)) for i in ids])
+        }
+
+def test_titulos_de_paridade_chegam_ao_modelo():
+    """Valida que nenhum título da checagem de paridade é resolvido pelas regras antes da IA."""
+    assert len(set(TITULOS_PARIDADE)) == len(TITULOS_PARIDADE)
+    assert [t for t in TITULOS_PARIDADE if categorizar_por_regras(t.lower()) is not None] == []
+
+def test_pipeline_onnx_e_paridade_contra_um_modelo_minimo(tmp_path):
+    """Valida o PipelineOnnx de ponta a ponta (sessão real do ONNX Runtime, lotes e formato zero-shot) e a comparação da paridade."""
+    _modelo_nli_minimo(tmp_path)
+    pipeline = PipelineOnnx(str(tmp_path), threads=1, tokenizer=TokenizerPares(), label2id=LABEL2ID)
+    rotulos = ["Tablet", "Chip", "Suporte"]
+    titulos = ["Tablet Positivo Twist", "Chip Vivo Pré-Pago"]
+
+    # 6 pares em lotes de 4: o último lote é menor e tem outra largura de padding
+    resultados = pipeline(titulos, rotulos, hypothesis_template="Este produto é um {}", multi_label=True, batch_size=4)
+    assert [r["sequence"] for r in resultados] == titulos
+    assert resultados[0]["labels"][0] == "Tablet"
+    # hipótese "Este produto é um Tablet": s = 4 * -1 + 3 = -1; demais rótulos: s = -5
+    assert resultados[0]["scores"] == pytest.approx([_sigmoide(-2.0), _sigmoide(-10.0), _sigmoide(-10.0)], abs=1e-6)
+    assert pipeline("Tablet", rotulos, hypothesis_template="Este produto é um {}")["sequence"] == "Tablet"
+
+    decidir = ProductClassifier()._decidir
+    referencia = [resultado_zero_shot(t, rotulos, [[-1.0, 0.0, 1.0], [-5.0, 0.0, 5.0], [-5.0, 0.0, 5.0]], 0, True)
+                  for t in titulos]
+    relatorio = comparar_resultados(titulos, resultados, referencia, decidir)
+    assert relatorio["aprovado"] and relatorio["diferenca_maxima"] == 0 and relatorio["concordancia"] == 1
+
+    divergente = [resultado_zero_shot(t, rotulos, [[5.0, 0.0, -5.0], [-5.0, 0.0, 5.0], [-5.0, 0.0, 5.0]], 0, True)
+                  for t in titulos]
+    relatorio = comparar_resultados(titulos, resultados, divergente, decidir)
+    assert not relatorio["aprovado"] and relatorio["divergencias"][0]["pytorch"] == "Tablet"
@@ -0,0 +1,36 @@
+import json
+
+from benchmarks.corpus import gerar_listagem, gerar_titulos
+from benchmarks.executar import cenarios_classificador, comparar, executar
+from src.parsers import extrair_cards
+
+def test_corpus_sintetico_e_deterministico():
+    """Valida que o corpus é o mesmo para a mesma semente (baseline comparável entre execuções)."""
+    assert gerar_titulos(50) == gerar_titulos(50)
+    assert gerar_titulos(50) != gerar_titulos(50, semente=7)
+    assert len(extrair_cards(gerar_listagem(60))) == 60
+
+def test_comparar_aponta_regressao_alem_da_tolerancia():
+    """Valida a comparação com a baseline: só conta como regressão a queda acima da tolerância."""
+    resultados = {"a": {"itens_por_s": 70.0}, "b": {"itens_por_s": 90.0}, "novo": {"itens_por_s": 1.0}}
+    baseline = {"a": {"itens_por_s": 100.0}, "b": {"itens_por_s": 100.0}}
+
+    assert comparar(resultados, baseline, tolerancia=0.2) == ["a"]
+    assert resultados["b"]["vs_baseline"] == 0.9
+    assert resultados["novo"]["vs_baseline"] is None
+
+def test_suite_roda_e_grava_relatorio(tmp_path):
+    """Valida uma rodada curta do suite com baseline própria (sem os cenários do classificador, que carregam o modelo)."""
+    baseline = tmp_path / "baseline.json"
+    saida = tmp_path / "resultado.json"
+    curta = ["--quantidade", "200", "--repeticoes", "1", "--sem-classificador", "--baseline", str(baseline)]
+
+    assert executar(curta + ["--salvar-baseline"]) == 0
+    assert executar(curta + ["--saida", str(saida)]) == 0
+
+    resultados = json.loads(saida.read_text(encoding="utf-8"))["resultados"]
+    assert {"montar_objeto_produto", "detectar_bundle", "limpar_valor_simples_para_float",
+            "calcular_preco_total_parcelado", "extrair_cards"} <= set(resultados)
+    assert all(r["itens_por_s"] > 0 and r["vs_baseline"] for r in resultados.values())
+    assert not any(nome.startswith("classificador") for nome in resultados)
+    assert cenarios_classificador(0) == {}
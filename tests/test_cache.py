@@ -0,0 +1,52 @@
+from src.models.cache import CacheClassificacao, normalizar_titulo
+from src.models.classifier import obter_classificador
+
+def test_normalizar_titulo():
+    """Valida que caixa e espaços extras não geram chaves diferentes"""
+    assert normalizar_titulo("  Caneta\xa0Touch   Universal ") == "caneta touch universal"
+
+def test_hit_e_miss(tmp_path):
+    """Valida a gravação, a leitura e os contadores de hit/miss"""
+    cache = CacheClassificacao(str(tmp_path / "cache.sqlite"), assinatura="v1")
+    assert cache.obter("Caneta Touch") is None
+
+    cache.salvar("Caneta Touch", "Acessório")
+    assert cache.obter("caneta  touch") == "Acessório"
+
+    estatisticas = cache.estatisticas()
+    assert estatisticas["hits"] == 1
+    assert estatisticas["misses"] == 1
+    assert estatisticas["itens"] == 1
+
+def test_persistencia_e_invalidacao_por_assinatura(tmp_path):
+    """Valida que o cache sobrevive entre execuções e é limpo quando o modelo/categorias mudam"""
+    caminho = str(tmp_path / "cache.sqlite")
+    cache = CacheClassificacao(caminho, assinatura="v1")
+    cache.salvar("Caneta Touch", "Acessório")
+    cache.fechar()
+
+    assert CacheClassificacao(caminho, assinatura="v1").obter("Caneta Touch") == "Acessório"
+    assert CacheClassificacao(caminho, assinatura="v2").obter("Caneta Touch") is None
+
+def test_remocao_lru(tmp_path):
+    """Valida que, ao estourar o limite, sai a entrada usada há mais tempo"""
+    cache = CacheClassificacao(str(tmp_path / "cache.sqlite"), assinatura="v1", max_itens=2)
+    cache.salvar("A", "Tablet")
+    cache.salvar("B", "Chip")
+    cache.obter("A")
+    cache.salvar("C", "Console")
+
+    assert cache.obter("A") == "Tablet"
+    assert cache.obter("B") is None
+    assert cache.obter("C") == "Console"
+
+def test_classificador_compartilhado_por_configuracao(tmp_path):
+    """Valida que a instância do processo é reaproveitada só para a mesma configuração (nunca a de outro backend ou cache)."""
+    caminho = str(tmp_path / "cache.sqlite")
+    padrao = obter_classificador(caminho_cache=caminho)
+    assert obter_classificador(caminho_cache=caminho) is padrao
+
+    onnx = obter_classificador(caminho_cache=caminho, backend="onnx")
+    assert onnx is not padrao and onnx.backend == "onnx"
+    assert onnx.assinatura() != padrao.assinatura()
+    assert obter_classificador(caminho_cache=str(tmp_path / "outro.sqlite")).cache.caminho.endswith("outro.sqlite")
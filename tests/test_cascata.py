@@ -0,0 +1,69 @@
+import json
+
+from src.models.cascata import ClassificadorRapido, titulos_rotulados, treinar_cascata
+from src.models.classifier import ProductClassifier
+
+# Títulos que nenhuma regra resolve (rotulados pelo mDeBERTa) e um resolvido pelas regras
+TITULOS_IA = {
+    "Fone de Ouvido e Áudio": ["Fone JBL Tune {}", "Headset Gamer Redragon {}", "Caixa de Som JBL Go {}"],
+    "Tablet": ["Tablet Multilaser Ultra {}", "iPad Apple {}a Geração", "Tablet Positivo Twist {}"],
+}
+
+def _gravar_coleta(pasta):
+    linhas = []
+    for categoria, modelos in TITULOS_IA.items():
+        for modelo in modelos:
+            for i in range(1, 11):
+                linhas.append({"produto": {"nome": modelo.format(i), "categoria": categoria, "is_bundle": False}})
+    linhas.append({"produto": {"nome": "Carregador Turbo 25W + Cabo", "categoria": "Carregador + Cabo", "is_bundle": True}})
+    pasta.mkdir()
+    (pasta / "produtos_magalu_20260101_000000.jsonl").write_text(
+        "\n".join(json.dumps(linha, ensure_ascii=False) for linha in linhas), encoding="utf-8")
+
+class PipelineContador:
+    """Pipeline zero-shot de mentira que conta os títulos recebidos."""
+
+    def __init__(self):
+        self.titulos = []
+
+    def __call__(self, titulos, rotulos, **kwargs):
+        self.titulos.extend(titulos)
+        return [{"labels": ["Chip"] + [r for r in rotulos if r != "Chip"], "scores": [0.99] + [0.01] * (len(rotulos) - 1)}
+                for _ in titulos]
+
+def test_treino_da_cascata_a_partir_das_coletas(tmp_path):
+    """Valida rótulos e origens lidos de data/raw, o relatório de concordância e a gravação do modelo."""
+    pasta = tmp_path / "raw"
+    _gravar_coleta(pasta)
+
+    rotulados = {titulo: (categoria, origem) for titulo, categoria, origem in titulos_rotulados(str(pasta))}
+    assert rotulados["Carregador Turbo 25W + Cabo"] == ("Carregador", "regras")  # sem o extra do bundle
+    assert rotulados["Tablet Multilaser Ultra 3"] == ("Tablet", "ia")
+
+    caminho = str(tmp_path / "cascata.npz")
+    relatorio = treinar_cascata(str(pasta), caminho, fracao_validacao=0.3)
+    assert relatorio["treino"] == {"regras": 1, "ia": 60}
+    assert relatorio["titulos"] > 0
+    assert relatorio["concordancia_top1"] >= 0.9
+    coberturas = [linha["cobertura"] for linha in relatorio["por_limiar"]]
+    assert coberturas == sorted(coberturas, reverse=True)  # limiar maior, menos respostas sem o mDeBERTa
+
+    modelo = ClassificadorRapido.carregar(caminho)
+    assert modelo.relatorio == relatorio
+    assert [categoria for categoria, _ in modelo.prever(["Fone JBL Tune 770NC", "Tablet Multilaser Ultra 11"])] == \
+        ["Fone de Ouvido e Áudio", "Tablet"]
+
+def test_cascata_so_escala_titulos_sem_confianca(tmp_path):
+    """Valida que só os títulos abaixo do limiar chegam ao mDeBERTa."""
+    titulos = [m.format(i) for modelos in TITULOS_IA.values() for m in modelos for i in range(1, 11)]
+    categorias = [c for c, modelos in TITULOS_IA.items() for _ in modelos for _ in range(10)]
+    caminho = str(tmp_path / "cascata.npz")
+    ClassificadorRapido.treinar(titulos, categorias).salvar(caminho)
+
+    classificador = ProductClassifier(caminho_cascata=caminho, limiar_cascata=0.8)
+    classificador._pipeline = PipelineContador()
+
+    categorias_lote = classificador.classificar_lote(["Fone JBL Tune 12", "Tablet Multilaser Ultra 12", "Caneta Touch Universal"])
+    assert categorias_lote[:2] == ["Fone de Ouvido e Áudio", "Tablet"]
+    assert classificador._pipeline.titulos == ["Caneta Touch Universal"]
+    assert categorias_lote[2] == "Chip"
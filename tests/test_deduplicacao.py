@@ -0,0 +1,87 @@
+import pytest
+
+from src import parsers
+from src.deduplicacao import MemoriaVistos, VistosExecucao
+from src.metricas import metricas
+from src.scraper import MagaluScraper
+
+def _bot(site_local, **parametros):
+    return MagaluScraper(modo_fetch="http", concorrencia=2, url_listagem=site_local.url_base + "/lista/?page={pagina}",
+                         fallback_navegador=False, taxa_requisicoes=100, **parametros)
+
+def test_cards_repetidos_entre_paginas_saem_uma_vez(site_local, tmp_path, monkeypatch):
+    """Valida que os cards repetidos da página 2 não chegam às regras/IA nem à saída, e as páginas de cada produto."""
+    monkeypatch.chdir(tmp_path)
+    bot = _bot(site_local)
+
+    metricas.reiniciar()
+    produtos = bot.coletar_produtos()
+
+    assert [p["origem"]["pagina_origem"] for p in produtos] == [1, 1, 1]
+    assert len({p["produto"]["id_site"] for p in produtos}) == 3
+    assert metricas.resumo()["contadores"]["cards_duplicados"] == 3
+    assert metricas.resumo()["estagios"]["regras"]["contagem"] == 1  # a página 2 chega vazia à montagem
+    assert sorted(bot.paginas_por_produto.values()) == [[1, 2]] * 3
+
+def test_memoria_de_vistos_entre_execucoes(site_local, tmp_path, monkeypatch):
+    """Valida que a segunda coleta mantém os preços dos produtos já vistos, os marca e não os recategoriza."""
+    monkeypatch.chdir(tmp_path)
+    caminho = str(tmp_path / "vistos.npz")
+
+    primeira = _bot(site_local, dedup_entre_execucoes=True, caminho_vistos=caminho).coletar_produtos()
+    assert [p["origem"]["visto_antes"] for p in primeira] == [False] * 3
+    bot = _bot(site_local, dedup_entre_execucoes=True, caminho_vistos=caminho)
+    assert MemoriaVistos.carregar(caminho, assinatura=bot.classificador.assinatura()).itens == 3
+
+    def sem_regras(titulo):
+        raise AssertionError(f"produto já visto passou pelas regras: {titulo}")
+    monkeypatch.setattr(parsers, "categorizar_por_regras", sem_regras)
+    metricas.reiniciar()
+    segunda = bot.coletar_produtos()
+    assert [p["origem"]["visto_antes"] for p in segunda] == [True] * 3
+    assert [p["preço"] for p in segunda] == [p["preço"] for p in primeira]
+    assert [p["produto"]["categoria"] for p in segunda] == [p["produto"]["categoria"] for p in primeira]
+    assert metricas.resumo()["contadores"]["cards_vistos_antes"] == 3
+    with pytest.raises(ValueError):
+        _bot(site_local, dedup_entre_execucoes=True, delta=True)
+
+def test_memoria_de_vistos_persistente_e_por_assinatura(tmp_path):
+    """Valida a consulta antes e depois de gravar, a troca de título e a invalidação por outro classificador."""
+    memoria = MemoriaVistos(assinatura="a")
+    for i in range(5000):
+        memoria.registrar(f"id-{i}", f"Produto {i}", "Celular" if i % 2 else "Tablet")
+    assert memoria.consultar([("id-1", "Produto 1"), ("id-9", "Outro título")]) == ["Celular", None]
+
+    caminho = str(tmp_path / "vistos.npz")
+    assert memoria.salvar(caminho) == 5000
+    lida = MemoriaVistos.carregar(caminho, assinatura="a")
+    assert lida.itens == 5000
+    assert lida.consultar([(f"id-{i}", f"Produto {i}") for i in range(4)]) == ["Tablet", "Celular"] * 2
+    assert lida.consultar([(f"outro-{i}", "Produto") for i in range(1000)]) == [None] * 1000
+
+    lida.registrar("id-0", "Produto 0", "Notebook")  # reclassificado: fica a categoria mais recente
+    assert lida.salvar(caminho) == 0
+    assert MemoriaVistos.carregar(caminho, assinatura="a").consultar([("id-0", "Produto 0")]) == ["Notebook"]
+    assert MemoriaVistos.carregar(caminho, assinatura="b").itens == 0
+
+def test_retomada_restaura_os_vistos_das_paginas_gravadas(site_local, tmp_path, monkeypatch):
+    """Valida que só as páginas já gravadas entram no checkpoint e que a retomada não repete esses produtos."""
+    vistos = VistosExecucao()
+    vistos.registrar("a", 1)
+    vistos.registrar("b", 2)
+    vistos.registrar("a", 2)
+    assert vistos.ate_pagina(1) == {"a": 1}
+
+    monkeypatch.chdir(tmp_path)
+    bot = _bot(site_local)
+    for pagina, primeira in bot.coletar_produtos_stream(max_paginas=2):
+        if pagina == 1:  # o que o checkpoint grava depois de salvar a página 1
+            retomada = bot.vistos_ate(1)
+            break
+    assert len(retomada) == 3
+
+    metricas.reiniciar()
+    restante = [p for _, lote in _bot(site_local).coletar_produtos_stream(pagina_inicial=2, vistos_retomada=retomada)
+                for p in lote]
+    assert len(primeira) == 3 and restante == []
+    assert metricas.resumo()["contadores"]["cards_duplicados"] == 3
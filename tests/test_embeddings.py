@@ -0,0 +1,57 @@
+import numpy as np
+
+from src.models.classifier import ProductClassifier
+from src.models.embeddings import PipelineEmbeddings, ajustar_calibracao, embeddings_categorias, resultados_similaridade
+
+class CodificadorContador:
+    """Codificador de frases de mentira: um vetor fixo por texto, contando os textos recebidos."""
+
+    def __init__(self):
+        self.textos = []
+
+    def __call__(self, textos, batch_size=64):
+        self.textos.extend(textos)
+        vetores = np.array([[len(t) % 7 + 1, t.count("a") + 1, 1.0] for t in textos], dtype=np.float32)
+        return vetores / np.linalg.norm(vetores, axis=1, keepdims=True)
+
+def test_calibracao_leva_cossenos_para_a_regra_de_decisao():
+    """Valida que a calibração de Platt faz o rótulo certo passar dos limiares do zero-shot e os demais não."""
+    rotulos = ["Tablet", "Chip", "Suporte"]
+    rng = np.random.default_rng(0)
+    similaridades = rng.uniform(0.05, 0.35, size=(300, 3))
+    corretos = rng.integers(0, 3, size=300)
+    similaridades[np.arange(300), corretos] = rng.uniform(0.65, 0.9, size=300)
+    positivos = np.zeros((300, 3))
+    positivos[np.arange(300), corretos] = 1
+
+    calibracao = ajustar_calibracao(similaridades, positivos)
+    assert calibracao["a"] > 0
+
+    resultado = resultados_similaridade(["Tablet Positivo Twist"], rotulos, [[0.8, 0.2, 0.1]], calibracao)[0]
+    assert resultado["labels"] == ["Tablet", "Chip", "Suporte"]
+    assert resultado["scores"] == sorted(resultado["scores"], reverse=True)
+    assert resultado["scores"][0] > ProductClassifier.LIMIAR_CONFIANCA > resultado["scores"][1]
+    assert ProductClassifier()._decidir(resultado) == "Tablet"
+
+def test_embeddings_das_categorias_em_disco_e_um_encode_por_titulo(tmp_path):
+    """Valida o cache em disco das categorias e que cada título é codificado uma única vez por lote."""
+    caminho = str(tmp_path / "categorias.npz")
+    rotulos = ["Tablet", "Chip", "Suporte"]
+
+    codificador = CodificadorContador()
+    primeiro = embeddings_categorias(codificador, rotulos, caminho)
+    assert len(codificador.textos) == 3
+    assert np.array_equal(embeddings_categorias(codificador, rotulos, caminho), primeiro)
+    assert len(codificador.textos) == 3  # lido do disco
+    embeddings_categorias(codificador, rotulos + ["Console"], caminho)
+    assert len(codificador.textos) == 7  # rótulos mudaram: recalcula
+
+    codificador = CodificadorContador()
+    pipeline = PipelineEmbeddings(caminho_categorias=caminho, calibracao={"a": 10.0, "b": -5.0}, codificador=codificador)
+    resultados = pipeline(["Tablet Positivo Twist", "Chip Vivo Pré-Pago"], rotulos, multi_label=True)
+    # 3 descrições (o arquivo agora é do conjunto com Console) + cada título uma única vez
+    assert codificador.textos[3:] == ["Tablet Positivo Twist", "Chip Vivo Pré-Pago"]
+    assert [sorted(r["labels"]) for r in resultados] == [sorted(rotulos)] * 2
+    assert pipeline("Tablet", rotulos)["sequence"] == "Tablet"
+
+    assert ProductClassifier(backend="embeddings").assinatura() != ProductClassifier().assinatura()
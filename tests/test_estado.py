@@ -0,0 +1,97 @@
+from src.estado import IndiceEstado
+from src.parsers import montar_objeto_produto, montar_objetos_lote
+from src.scraper import MagaluScraper
+
+CONTEXTO = {
+    "timestamp": "2026-10-18 09:30:00", "versao_pipeline": "1.0", "ambiente": "dev", "tipo_coleta": "teste",
+    "loja": "Teste", "canal_venda": "PLATAFORMA", "url_produto": "http://teste", "pagina": 1
+}
+
+def _dados(id_produto, titulo, preco):
+    return {"id_produto": id_produto, "titulo": titulo, "preco_antigo": 0, "preco_pix": preco,
+            "preco_atual": preco, "parcelamento_original": "N/A"}
+
+def _produto(id_produto, titulo, preco):
+    return montar_objeto_produto(_dados(id_produto, titulo, preco), CONTEXTO)
+
+class ClassificadorFalso:
+    """Dublê do ProductClassifier que registra os títulos enviados à IA."""
+
+    def __init__(self):
+        self.titulos = []
+
+    def classificar_lote(self, titulos, batch_size=16):
+        self.titulos.extend(titulos)
+        return ["Tablet"] * len(titulos)
+
+def test_indice_emite_novos_alterados_e_removidos(tmp_path):
+    """Valida o delta entre duas coletas completas: novo, alterado, inalterado e desaparecido."""
+    caminho = str(tmp_path / "estado.sqlite")
+
+    estado = IndiceEstado(caminho)
+    primeira = estado.filtrar_alterados([_produto("1", "Capa iPhone 15", 29.9), _produto("2", "Cabo USB-C", 19.9),
+                                         _produto("3", "Suporte Veicular", 39.9)])
+    assert [p["alteracao"] for p in primeira] == ["NOVO", "NOVO", "NOVO"]
+    assert estado.finalizar(catalogo_completo=True) == []
+    estado.fechar()
+
+    estado = IndiceEstado(caminho)
+    segunda = estado.filtrar_alterados([_produto("1", "Capa iPhone 15", 29.9), _produto("2", "Cabo USB-C", 17.9),
+                                        _produto("4", "Película iPhone 15", 9.9)])
+    removidos = estado.finalizar(catalogo_completo=True)
+    estado.fechar()
+
+    assert [(p["produto"]["id_site"], p["alteracao"]) for p in segunda] == [("2", "ALTERADO"), ("4", "NOVO")]
+    assert [(p["produto"]["id_site"], p["alteracao"]) for p in removidos] == [("3", "REMOVIDO")]
+    assert removidos[0]["preço"]["preco_base"] == 39.9
+
+def test_indice_coleta_interrompida_nao_e_confirmada(tmp_path):
+    """Valida que uma coleta descartada não altera o índice nem conta como execução."""
+    caminho = str(tmp_path / "estado.sqlite")
+    estado = IndiceEstado(caminho)
+    estado.filtrar_alterados([_produto("1", "Capa iPhone 15", 29.9)])
+    estado.descartar()
+    estado.fechar()
+
+    estado = IndiceEstado(caminho)
+    assert estado.execucao == 1
+    assert [p["alteracao"] for p in estado.filtrar_alterados([_produto("1", "Capa iPhone 15", 29.9)])] == ["NOVO"]
+    estado.fechar()
+
+def test_titulos_inalterados_nao_voltam_para_a_ia(tmp_path):
+    """Valida que a categoria guardada no índice substitui a IA quando o título não mudou."""
+    caminho = str(tmp_path / "estado.sqlite")
+    itens = [(_dados("1", "Tela Touch Display Generico", 99.0), CONTEXTO)]
+
+    estado = IndiceEstado(caminho, assinatura="v1")
+    ia = ClassificadorFalso()
+    estado.filtrar_alterados(montar_objetos_lote(itens, classificador_ai=ia, categorias_conhecidas=estado.categorias_conhecidas(itens)))
+    estado.finalizar(catalogo_completo=True)
+    estado.fechar()
+    assert ia.titulos == ["Tela Touch Display Generico"]
+
+    estado = IndiceEstado(caminho, assinatura="v1")
+    ia = ClassificadorFalso()
+    produtos = montar_objetos_lote(itens, classificador_ai=ia, categorias_conhecidas=estado.categorias_conhecidas(itens))
+    estado.fechar()
+    assert ia.titulos == []
+    assert produtos[0]["produto"]["categoria"] == "Tablet"
+
+    # Outra assinatura do classificador: a categoria guardada não vale mais
+    estado = IndiceEstado(caminho, assinatura="v2")
+    assert estado.categorias_conhecidas(itens) == {}
+    estado.fechar()
+
+def test_scraper_modo_delta_contra_site_local(site_local, tmp_path, monkeypatch):
+    """Valida o modo delta ponta a ponta: a segunda coleta do mesmo catálogo não emite nada."""
+    monkeypatch.chdir(tmp_path)
+
+    def coletar():
+        bot = MagaluScraper(modo_fetch="http", concorrencia=2, url_listagem=site_local.url_base + "/lista/?page={pagina}",
+                            fallback_navegador=False, taxa_requisicoes=100, delta=True, caminho_estado=str(tmp_path / "estado.sqlite"))
+        return bot.coletar_produtos()
+
+    primeira = coletar()
+    # As páginas 1 e 2 do site local repetem os mesmos 3 produtos
+    assert [p["alteracao"] for p in primeira] == ["NOVO"] * 3
+    assert coletar() == []
@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from src.fetchers import (MARCADOR_CARD, PADROES_BLOQUEADOS, FetcherHttp, FetcherPoolSelenium, FetcherSelenium,
+                          pagina_precisa_javascript, pagina_tem_cards)
+from src.limitador import LimitadorAdaptativo
+from src.metricas import metricas
+from src.scraper import MagaluScraper
+
+PASTA_FIXTURES = Path(__file__).parent / "fixtures"
+
+def test_fetcher_http_entrega_paginas_em_ordem(site_local):
+    """Valida que o modo HTTP busca várias páginas em paralelo, as entrega na ordem da paginação e para no fim do catálogo."""
+    fetcher = FetcherHttp(concorrencia=4)
+    try:
+        paginas = list(fetcher.iterar_paginas(lambda p: f"{site_local.url_base}/lista/?page={p}", max_paginas=5))
+    finally:
+        fetcher.fechar()
+
+    assert [numero for numero, _ in paginas] == [1, 2, 3]
+    assert [pagina_tem_cards(html) for _, html in paginas] == [True, True, False]
+
+class FallbackFalso:
+    """Imita o fetcher do navegador, registrando as URLs que chegam a ele."""
+
+    def __init__(self, html=None):
+        self.html = html
+        self.urls = []
+
+    def buscar_lote(self, urls):
+        self.urls.extend(urls)
+        return [self.html] * len(urls)
+
+    def fechar(self):
+        pass
+
+def test_fetcher_http_nao_abre_o_navegador_no_fim_do_catalogo(site_local):
+    """Valida que a página vazia do fim do catálogo não vai ao fallback, e uma casca de listagem sem cards vai."""
+    fallback = FallbackFalso()
+    fetcher = FetcherHttp(concorrencia=4, fallback=fallback)
+    try:
+        paginas = list(fetcher.iterar_paginas(lambda p: f"{site_local.url_base}/lista/?page={p}", max_paginas=5))
+    finally:
+        fetcher.fechar()
+
+    assert [numero for numero, _ in paginas] == [1, 2, 3]
+    assert fallback.urls == []
+
+    listagem = (PASTA_FIXTURES / "listagem_magalu.html").read_text(encoding="utf-8")
+    casca = '<html><body><ul data-testid="product-list"></ul><script src="/app.js"></script></body></html>'
+    assert pagina_precisa_javascript(casca)
+    assert not pagina_precisa_javascript((PASTA_FIXTURES / "listagem_vazia.html").read_text(encoding="utf-8"))
+    assert not pagina_precisa_javascript(listagem) and not pagina_precisa_javascript(None)
+
+def test_fetcher_http_repete_falhas_de_rede_sem_o_navegador(site_local):
+    """Valida que uma URL que não responde é tentada de novo por HTTP e não cai no fallback."""
+    fallback = FallbackFalso()
+    fetcher = FetcherHttp(fallback=fallback, timeout=2, tentativas=2, espera_retentativa=0)
+    metricas.reiniciar()
+    try:
+        htmls = fetcher.buscar_lote(["http://127.0.0.1:9/lista/?page=1", f"{site_local.url_base}/lista/?page=1"])
+    finally:
+        fetcher.fechar()
+
+    assert htmls[0] is None and pagina_tem_cards(htmls[1])
+    assert fallback.urls == []
+    contadores = metricas.resumo()["contadores"]
+    assert contadores["retentativas_busca"] == 1 and contadores["falhas_busca"] == 1
+
+def test_scraper_modo_http_contra_site_local(site_local, tmp_path, monkeypatch):
+    """Valida a coleta completa em modo HTTP: mesmo parsing de cards e parada no fim do catálogo."""
+    monkeypatch.chdir(tmp_path)
+    bot = MagaluScraper(
+        modo_fetch="http",
+        concorrencia=2,
+        url_listagem=site_local.url_base + "/lista/?page={pagina}",
+        fallback_navegador=False,
+        taxa_requisicoes=100,
+        deduplicar=False  # as páginas 1 e 2 do site local repetem os mesmos cards
+    )
+
+    produtos = bot.coletar_produtos()
+
+    assert len(produtos) == 6
+    assert [p['origem']['pagina_origem'] for p in produtos] == [1, 1, 1, 2, 2, 2]
+    assert [p['produto']['categoria'] for p in produtos[:3]] == ["Smartphone", "Proteção", "Suporte"]
+    assert produtos[0]['preço']['preco_base'] == 1199.0
+    assert produtos[1]['vendedor']['tipo_vendedor'] == "VENDEDOR_TERCEIRO"
+
+
+class DriverFalso:
+    """Imita o WebDriver: serve o HTML salvo até a página 5 e falha na primeira visita à página 3."""
+
+    falhas_pendentes = {3}
+    trava = threading.Lock()
+
+    def __init__(self, listagem, vazia):
+        self.listagem = listagem
+        self.vazia = vazia
+        self.page_source = None
+        self.encerrado = False
+
+    def get(self, url):
+        pagina = int(url.rsplit("=", 1)[1])
+        with DriverFalso.trava:
+            if pagina in DriverFalso.falhas_pendentes:
+                DriverFalso.falhas_pendentes.discard(pagina)
+                raise RuntimeError("chrome not reachable")
+        self.page_source = self.listagem if pagina <= 5 else self.vazia
+
+    def find_elements(self, por, seletor):
+        return [object()] * self.page_source.count(MARCADOR_CARD)
+
+    def execute_script(self, script):
+        return "complete"
+
+    def quit(self):
+        self.encerrado = True
+
+def test_pool_de_navegadores_em_ordem_com_reinicio():
+    """Valida o pool: ordem da paginação, fim do catálogo compartilhado e reinício de navegador que falhou."""
+    listagem = (PASTA_FIXTURES / "listagem_magalu.html").read_text(encoding="utf-8")
+    vazia = (PASTA_FIXTURES / "listagem_vazia.html").read_text(encoding="utf-8")
+    drivers = []
+
+    def criar_driver():
+        driver = DriverFalso(listagem, vazia)
+        drivers.append(driver)
+        return driver
+
+    fetcher = FetcherPoolSelenium(criar_driver, trabalhadores=3, timeout_cards=0.5,
+                                  criar_limitador=lambda: LimitadorAdaptativo(taxa=100, taxa_maxima=100))
+    paginas = []
+    for numero, html in fetcher.iterar_paginas(lambda p: f"http://site/lista/?page={p}"):
+        paginas.append(numero)
+        if not pagina_tem_cards(html):
+            break
+
+    assert paginas == [1, 2, 3, 4, 5, 6]
+    assert len(drivers) == 4  # 3 navegadores + 1 reiniciado após a falha
+    assert all(d.encerrado for d in drivers)
+
+def test_navegador_enxuto_conta_requisicoes_bloqueadas():
+    """Valida as opções do Chrome enxuto e a contagem de bloqueios e bytes lida do log de desempenho."""
+    opcoes = MagaluScraper().chrome_options
+    assert opcoes.page_load_strategy == "eager"
+    assert opcoes.experimental_options["prefs"]["profile.managed_default_content_settings.images"] == 2
+    assert opcoes.to_capabilities()["goog:loggingPrefs"] == {"performance": "ALL"}
+    assert MagaluScraper(navegador_enxuto=False).chrome_options.page_load_strategy == "normal"
+    assert "*.woff*" in PADROES_BLOQUEADOS
+
+    listagem = (PASTA_FIXTURES / "listagem_magalu.html").read_text(encoding="utf-8")
+    eventos = [
+        ("Network.loadingFailed", {"blockedReason": "inspector"}),
+        ("Network.loadingFailed", {"blockedReason": "inspector"}),
+        ("Network.loadingFailed", {"errorText": "net::ERR_ABORTED"}),
+        ("Network.loadingFinished", {"encodedDataLength": 3072}),
+        ("Network.requestWillBeSent", {})
+    ]
+
+    class DriverComLog(DriverFalso):
+        def get_log(self, tipo):
+            assert tipo == "performance"
+            return [{"message": json.dumps({"message": {"method": m, "params": p}})} for m, p in eventos]
+
+    metricas.reiniciar()
+    fetcher = FetcherSelenium(lambda: DriverComLog(listagem, listagem), timeout_cards=0.5, medir_rede=True,
+                              limitador=LimitadorAdaptativo(taxa=100, taxa_maxima=100))
+    fetcher.buscar_lote(["http://site/lista/?page=1", "http://site/lista/?page=2"])
+    fetcher.fechar()
+
+    resumo = metricas.resumo()
+    assert fetcher.bloqueadas == 4 and fetcher.paginas == 2
+    assert resumo["contadores"]["requisicoes_bloqueadas"] == 4
+    assert resumo["histogramas"]["kb_por_pagina"]["max"] == 3.0
+
+def test_limitador_recua_em_falhas_e_acelera_em_sucessos():
+    """Valida o limitador: espaça as requisições pela taxa e a ajusta conforme as respostas."""
+    limitador = LimitadorAdaptativo(taxa=20, capacidade=1, taxa_minima=5, taxa_maxima=40)
+
+    inicio = time.monotonic()
+    for _ in range(3):
+        limitador.aguardar()
+    assert time.monotonic() - inicio >= 0.09  # 1 token de rajada + 2 esperas de 1/20 s
+
+    limitador.registrar_falha()
+    limitador.registrar_falha()
+    limitador.registrar_falha()
+    assert limitador.taxa == 5  # não passa do piso
+
+    for _ in range(50):
+        limitador.registrar_sucesso()
+    assert limitador.taxa == 40  # nem do teto
@@ -0,0 +1,54 @@
+import json
+
+from src.historico import HistoricoPrecos
+from src.parsers import montar_objeto_produto
+
+def _produto(id_produto, preco, timestamp, categoria_titulo="Capa Capinha iPhone 15", preco_antigo=0):
+    dados = {"id_produto": id_produto, "titulo": categoria_titulo, "preco_antigo": preco_antigo, "preco_pix": preco,
+             "preco_atual": preco, "parcelamento_original": "N/A"}
+    contexto = {"timestamp": timestamp, "ambiente": "dev", "versao_pipeline": "v1.0", "tipo_coleta": "web_scraping",
+                "url_produto": "http://teste", "canal_venda": "VENDA_DIRETA", "loja": "Magazine Luiza", "pagina": 1}
+    return montar_objeto_produto(dados, contexto)
+
+def test_historico_consultas_de_preco(tmp_path):
+    """Valida último preço, mínimo/máximo na janela, maiores descontos e quedas de preço."""
+    historico = HistoricoPrecos(str(tmp_path / "precos.sqlite"))
+    assert historico.ingerir([
+        _produto("1", 100.0, "2026-10-12 09:00:00"),
+        _produto("1", 95.0, "2026-10-14 09:00:00"),
+        _produto("1", 80.0, "2026-10-18 09:00:00", preco_antigo=100.0),
+        _produto("2", 50.0, "2026-10-12 09:00:00"),
+        _produto("2", 48.0, "2026-10-18 09:00:00", preco_antigo=60.0),
+        _produto("3", 1199.0, "2026-10-18 09:00:00", categoria_titulo="Smartphone Samsung Galaxy A16"),
+    ]) == 6
+    # Reingerir a mesma observação não duplica
+    assert historico.ingerir([_produto("1", 80.0, "2026-10-18 09:00:00")]) == 0
+
+    assert historico.ultimo_preco("1")["preco_base"] == 80.0
+    assert historico.ultimo_preco("inexistente") is None
+    assert historico.minimo_maximo("1", inicio="2026-10-13") == {"minimo": 80.0, "maximo": 95.0, "observacoes": 2}
+
+    descontos = historico.maiores_descontos(inicio="2026-10-18")
+    assert [(d["id_produto"], d["desconto_percentual"]) for d in descontos[:2]] == [("1", 20.0), ("2", 20.0)]
+    assert [d["id_produto"] for d in historico.maiores_descontos(categoria="Smartphone")] == ["3"]
+
+    quedas = historico.quedas_de_preco(inicio="2026-10-12", percentual_minimo=10)
+    assert [(q["id_produto"], q["preco_maximo"], q["preco_atual"], q["queda_percentual"]) for q in quedas] == [("1", 100.0, 80.0, 20.0)]
+    historico.fechar()
+
+def test_historico_importa_arquivos_brutos_uma_vez(tmp_path):
+    """Valida o importador dos arquivos de data/raw (JSON indentado e JSON Lines), sem reimportar."""
+    pasta = tmp_path / "raw"
+    pasta.mkdir()
+    (pasta / "produtos_magalu_20260101_090000.json").write_text(
+        json.dumps([_produto("1", 100.0, "2026-01-01 09:00:00")], ensure_ascii=False, indent=4), encoding="utf-8")
+    (pasta / "produtos_magalu_20260102_090000.jsonl").write_text(
+        "\n".join(json.dumps(p, ensure_ascii=False) for p in [_produto("1", 90.0, "2026-01-02 09:00:00"),
+                                                               _produto("2", 10.0, "2026-01-02 09:00:00")]) + "\n",
+        encoding="utf-8")
+
+    historico = HistoricoPrecos(str(tmp_path / "precos.sqlite"))
+    assert historico.importar_pasta(str(pasta)) == 3
+    assert historico.importar_pasta(str(pasta)) == 0
+    assert historico.minimo_maximo("1") == {"minimo": 90.0, "maximo": 100.0, "observacoes": 2}
+    historico.fechar()
@@ -0,0 +1,51 @@
+import logging
+
+from src.utils import FiltroAmostragem, configurar_logs, encerrar_logs
+
+class Contador:
+    """Argumento de log que conta quantas vezes foi convertido em texto."""
+
+    def __init__(self):
+        self.formatacoes = 0
+
+    def __str__(self):
+        self.formatacoes += 1
+        return "produto"
+
+def test_logs_em_fila_com_debug_amostrado(tmp_path, monkeypatch):
+    """Valida a escrita em segundo plano, a amostragem do DEBUG e a formatação adiada."""
+    monkeypatch.chdir(tmp_path)
+    raiz = logging.getLogger()
+    nivel_original = raiz.level
+
+    configurar_logs(nivel=logging.INFO)
+    try:
+        ignorado = Contador()
+        logging.debug("Título: %s", ignorado)
+        logging.info("📡 Página %s buscada.", 1)
+    finally:
+        encerrar_logs()
+    assert ignorado.formatacoes == 0  # abaixo do nível: nunca vira texto
+
+    configurar_logs(nivel=logging.DEBUG, amostragem_debug=10)
+    try:
+        for i in range(25):
+            logging.debug("Título: %s", i)
+    finally:
+        encerrar_logs()
+        raiz.setLevel(nivel_original)
+
+    linhas = (tmp_path / "data/logs/scraping.log").read_text(encoding="utf-8").splitlines()
+    assert sum("📡 Página 1 buscada." in linha for linha in linhas) == 1
+    assert [linha.split("Título: ")[1] for linha in linhas if "Título:" in linha] == ["0", "10", "20"]
+
+def test_filtro_amostragem_conta_cada_mensagem_separadamente():
+    """Valida que a amostragem é por modelo de mensagem e nunca descarta INFO ou acima."""
+    filtro = FiltroAmostragem(intervalo=3)
+
+    def registro(nivel, mensagem):
+        return logging.LogRecord("root", nivel, __file__, 1, mensagem, None, None)
+
+    assert [filtro.filter(registro(logging.DEBUG, "Título: %s")) for _ in range(4)] == [True, False, False, True]
+    assert filtro.filter(registro(logging.DEBUG, "Resultado Final: %s"))
+    assert all(filtro.filter(registro(logging.WARNING, "Título: %s")) for _ in range(3))
@@ -0,0 +1,99 @@
+import json
+
+import pyarrow.parquet as pq
+import pytest
+
+from main import salvar_dados, salvar_parquet
+from src.checkpoint import Checkpoint
+from src.parsers import montar_objeto_produto
+
+def _produto_vip():
+    dados = {"id_produto": "1", "titulo": "Capa Capinha iPhone 15", "preco_antigo": 0, "preco_pix": 29.9,
+             "preco_atual": 29.9, "parcelamento_original": "N/A"}
+    contexto = {"timestamp": "2026-10-18 09:30:00", "ambiente": "dev", "versao_pipeline": "v1.0",
+                "tipo_coleta": "web_scraping", "url_produto": "http://teste", "canal_venda": "VENDA_DIRETA",
+                "loja": "Magazine Luiza", "pagina": 1}
+    return montar_objeto_produto(dados, contexto)
+
+def test_salvar_dados_grava_jsonl_e_renomeia_ao_final(tmp_path, monkeypatch):
+    """Valida o sink em streaming: uma linha compacta por produto e arquivo final só após o último lote."""
+    monkeypatch.chdir(tmp_path)
+    lotes = [(1, [{"id": "a", "titulo": "Capa"}, {"id": "b", "titulo": "Película"}]), (2, [{"id": "c", "titulo": "Cabo"}])]
+
+    caminho, total = salvar_dados(iter(lotes))
+
+    assert total == 3
+    assert caminho.endswith(".jsonl")
+    linhas = (tmp_path / caminho).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(linha)["id"] for linha in linhas] == ["a", "b", "c"]
+    assert linhas[1] == '{"id":"b","titulo":"Película"}'
+    assert not list((tmp_path / "data/raw").glob("*.parcial"))
+
+def test_salvar_dados_preserva_paginas_gravadas_em_caso_de_queda(tmp_path, monkeypatch):
+    """Valida que uma queda no meio da coleta deixa as páginas já gravadas no arquivo .parcial."""
+    monkeypatch.chdir(tmp_path)
+
+    def lotes():
+        yield 1, [{"id": "a"}]
+        raise RuntimeError("chrome caiu")
+
+    with pytest.raises(RuntimeError):
+        salvar_dados(lotes())
+
+    parciais = list((tmp_path / "data/raw").glob("*.jsonl.parcial"))
+    assert len(parciais) == 1
+    assert parciais[0].read_text(encoding="utf-8") == '{"id":"a"}\n'
+    assert not list((tmp_path / "data/raw").glob("*.jsonl"))
+
+def test_salvar_dados_retoma_do_checkpoint(tmp_path, monkeypatch):
+    """Valida a retomada: reabre o .parcial, descarta a página gravada pela metade e conclui o checkpoint."""
+    monkeypatch.chdir(tmp_path)
+    configuracao = {"formato": "jsonl", "max_paginas": None}
+
+    def lotes_com_queda():
+        yield 1, [{"id": "a"}]
+        yield 2, [{"id": "b"}]
+        raise RuntimeError("chrome caiu")
+
+    with pytest.raises(RuntimeError):
+        vistos = lambda pagina: {"vistos": {"a": 1, "b": 2} if pagina >= 2 else {"a": 1}}
+        salvar_dados(lotes_com_queda(), checkpoint=Checkpoint(configuracao, complemento=vistos))
+
+    # Página 3 chegou a ser escrita pela metade antes do processo morrer
+    parcial = next((tmp_path / "data/raw").glob("*.jsonl.parcial"))
+    with open(parcial, "a", encoding="utf-8") as f:
+        f.write('{"id": "c", "tit')
+
+    checkpoint = Checkpoint(configuracao)
+    retomada = checkpoint.carregar()
+    assert retomada["ultima_pagina"] == 2 and retomada["total"] == 2
+    assert retomada["vistos"] == {"a": 1, "b": 2}
+    assert Checkpoint({"formato": "parquet", "max_paginas": None}).carregar() is None
+
+    caminho, total = salvar_dados(iter([(3, [{"id": "c"}])]), checkpoint=checkpoint)
+
+    assert total == 3
+    linhas = (tmp_path / caminho).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(linha)["id"] for linha in linhas] == ["a", "b", "c"]
+    assert Checkpoint(configuracao).carregar() is None
+
+def test_salvar_parquet_retoma_sem_sobrescrever_arquivos(tmp_path, monkeypatch):
+    """Valida a retomada em Parquet: os arquivos da execução interrompida são mantidos e a numeração continua."""
+    monkeypatch.chdir(tmp_path)
+    configuracao = {"formato": "parquet"}
+    produto = _produto_vip()
+
+    def lotes_com_queda():
+        yield 1, [produto]
+        raise RuntimeError("chrome caiu")
+
+    with pytest.raises(RuntimeError):
+        salvar_parquet(lotes_com_queda(), caminho=str(tmp_path / "bronze"), checkpoint=Checkpoint(configuracao))
+
+    checkpoint = Checkpoint(configuracao)
+    assert checkpoint.carregar()["ultima_pagina"] == 1
+    _, total = salvar_parquet(iter([(2, [produto])]), checkpoint=checkpoint)
+
+    assert total == 2
+    assert len(list((tmp_path / "bronze").rglob("*.parquet"))) == 2
+    assert len(pq.read_table(tmp_path / "bronze")) == 2
@@ -0,0 +1,55 @@
+import json
+
+from src.metricas import Metricas, metricas, percentil
+from src.scraper import MagaluScraper
+
+def test_metricas_resumo_json_e_textfile_prometheus(tmp_path):
+    """Valida percentis, taxas, o resumo JSON da execução e o textfile do Prometheus."""
+    assert percentil([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 50) == 5
+    assert percentil([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 95) == 10
+    assert percentil([], 50) is None
+
+    registro = Metricas()
+    for _ in range(3):
+        with registro.cronometrar("parse"):
+            pass
+    for quantidade in (60, 60, 58):
+        registro.observar("cards_por_pagina", quantidade)
+    registro.incrementar("cards", 178)
+    registro.incrementar("ia_titulos", 89)
+    registro.incrementar("cache_ia_acertos", 3)
+    registro.incrementar("cache_ia_falhas", 1)
+
+    caminho_prom = tmp_path / "prom" / "magalu.prom"
+    caminho = registro.gravar(pasta=str(tmp_path / "metricas"), caminho_prometheus=str(caminho_prom))
+
+    with open(caminho, encoding="utf-8") as f:
+        resumo = json.load(f)
+    assert resumo["estagios"]["parse"]["contagem"] == 3
+    assert resumo["histogramas"]["cards_por_pagina"] == {"contagem": 3, "media": 59.33, "p50": 60, "p95": 60, "max": 60}
+    assert resumo["taxas"] == {"fallback_ia": 0.5, "acerto_cache_ia": 0.75}
+
+    texto = caminho_prom.read_text(encoding="utf-8")
+    assert 'magalu_scraper_estagio_duracao_segundos_count{estagio="parse"} 3' in texto
+    assert 'magalu_scraper_cards_por_pagina{quantile="0.5"} 60' in texto
+    assert "magalu_scraper_cards_total 178" in texto
+    assert "magalu_scraper_taxa_fallback_ia 0.5" in texto
+
+def test_coleta_alimenta_as_metricas_dos_estagios(site_local, tmp_path, monkeypatch):
+    """Valida que uma coleta registra busca, parse, regras e montagem por página, além dos contadores."""
+    monkeypatch.chdir(tmp_path)
+    bot = MagaluScraper(modo_fetch="http", concorrencia=2, url_listagem=site_local.url_base + "/lista/?page={pagina}",
+                        fallback_navegador=False, taxa_requisicoes=100)
+
+    metricas.reiniciar()
+    bot.coletar_produtos()
+    resumo = metricas.resumo()
+
+    assert resumo["estagios"]["busca"]["contagem"] == 4  # janelas de 2 páginas: 1-2 e 3-4
+    assert resumo["estagios"]["parse"]["contagem"] == 3
+    assert resumo["estagios"]["regras"]["contagem"] == 1  # a página 2 só tem cards repetidos
+    assert resumo["estagios"]["montagem"]["contagem"] == 1
+    assert resumo["histogramas"]["cards_por_pagina"]["p50"] == 3
+    assert resumo["contadores"]["paginas"] == 2
+    assert resumo["contadores"]["produtos"] == 3  # a página 2 repete os cards da página 1
+    assert resumo["contadores"]["cards_duplicados"] == 3
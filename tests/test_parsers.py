@@ -1,4 +1,13 @@
-from src.parsers import limpar_valor_simples_para_float, normalizar_texto, detectar_bundle
+from pathlib import Path
+
+from src.parsers import (
+    limpar_valor_simples_para_float, normalizar_texto, detectar_bundle,
+    montar_objetos_lote, localizar_termos, categorizar_por_regras,
+    calcular_preco_total_parcelado, limpar_valores_lote, detectar_bundle_lote,
+    calcular_parcelado_lote, extrair_cards
+)
+
+PASTA_FIXTURES = Path(__file__).parent / "fixtures"
 
 def test_limpar_valor_real_brasileiro():
     """Valida se o conversor de moeda lida com pontos, vírgulas e R$"""
@@ -43,4 +52,87 @@ def test_bundles_reais():
     assert detectar_bundle("iPhone 15 com Brinde Capinha e Película") is True
     assert detectar_bundle("Combo Gamer: Mouse + Teclado") is True
     assert detectar_bundle("Relógio + 7 Pulseiras") is True
-    
\ No newline at end of file
+    
+
+class ClassificadorFalso:
+    """Dublê do ProductClassifier que registra as chamadas em lote."""
+
+    def __init__(self):
+        self.chamadas = []
+
+    def classificar_lote(self, titulos, batch_size=16):
+        self.chamadas.append(list(titulos))
+        return ["Tablet"] * len(titulos)
+
+
+def test_montar_objetos_lote_envia_fallback_em_uma_chamada():
+    """Valida que só os títulos sem regra vão para a IA, em uma única chamada e na ordem original."""
+    contexto = {
+        "timestamp": "2026-01-19", "versao_pipeline": "1.0", "ambiente": "dev",
+        "tipo_coleta": "teste", "loja": "Teste", "canal_venda": "PLATAFORMA",
+        "url_produto": "http://teste.com", "pagina": 1
+    }
+    itens = [
+        ({"id_produto": "1", "titulo": "Smartphone Samsung Galaxy A16", "preco_atual": 900.0}, contexto),
+        ({"id_produto": "2", "titulo": "Tela Touch Display Generico", "preco_atual": 50.0}, contexto),
+        ({"id_produto": "3", "titulo": "Caneta Touch Universal", "preco_atual": 30.0}, contexto),
+    ]
+    ia = ClassificadorFalso()
+
+    produtos = montar_objetos_lote(itens, classificador_ai=ia)
+
+    assert ia.chamadas == [["Tela Touch Display Generico", "Caneta Touch Universal"]]
+    assert [p['produto']['categoria'] for p in produtos] == ["Smartphone", "Tablet", "Tablet"]
+
+
+def test_localizar_termos_igual_ao_find():
+    """Valida que o casador compilado devolve a mesma primeira posição que `str.find`, inclusive em termos sobrepostos."""
+    titulos = [
+        "relógio smartwatch hw5 com pulseira extra",
+        "pocola smartband mi band fitband",
+        "celular antigo 2g com capinha e película",
+        "microchip pré-pago redmi note 13 pro",
+    ]
+    for titulo in titulos:
+        posicoes = localizar_termos(titulo)
+        esperado = {t: titulo.find(t) for t in posicoes}
+        assert posicoes == esperado
+        for termo in ("smartwatch", "watch", "band", "fit", "chip", "redmi", "celular", "capa"):
+            if termo in titulo:
+                assert posicoes[termo] == titulo.find(termo)
+
+def test_hierarquia_de_regras():
+    """Valida a ordem dos blocos (acessório antes do hardware, desempate de relógio e fallback de IA)."""
+    assert categorizar_por_regras("capa para iphone 15") == "Proteção"
+    assert categorizar_por_regras("iphone 15 com capa") == "Smartphone"
+    assert categorizar_por_regras("smartwatch hw5 + pulseira") == "Smartwatch"
+    assert categorizar_por_regras("kit 3 pulseiras para relógio") == "Acessório"
+    assert categorizar_por_regras("caneta touch universal") is None
+
+def test_versoes_em_lote_iguais_as_escalares():
+    """Valida que as versões em lote devolvem exatamente o mesmo que as funções escalares."""
+    precos = ["R$ 1.299,50", "2.500,00", "ou R$\xa0899,90 no Pix", "N/A", "", "12x de R$ 150,00 sem juros"]
+    titulos = [
+        "Xiaomi Redmi 14C 256GB 4+4GB RAM",
+        "Smartphone Samsung Galaxy A54 + Fone Bluetooth",
+        "Relógio + 7 Pulseiras",
+        "Celular Dual Sim + 4G",
+    ]
+
+    assert limpar_valores_lote(precos).tolist() == [limpar_valor_simples_para_float(p) for p in precos]
+    assert calcular_parcelado_lote(precos).tolist() == [calcular_preco_total_parcelado(p) for p in precos]
+    assert detectar_bundle_lote(titulos).tolist() == [detectar_bundle(t) for t in titulos]
+
+def test_extrair_cards_da_listagem_salva():
+    """Valida a extração só dos cards: campos normalizados, ausentes como None e mesmo resultado nos dois parsers."""
+    html = (PASTA_FIXTURES / "listagem_magalu.html").read_text(encoding="utf-8")
+
+    cards = extrair_cards(html)
+
+    assert [c['titulo'][:20] for c in cards] == ["Smartphone Samsung G", "Capa Capinha Anti Im", "Suporte Garra Celula"]
+    assert cards[0]['preco_original'] == "R$ 1.499,00"
+    assert cards[0]['parcelamento'] == "10x de R$ 119,90 sem juros"
+    assert cards[1]['preco_original'] is None and cards[1]['parcelamento'] is None
+    assert cards[2]['link'].endswith("?seller_id=acessoriosbr")
+    assert extrair_cards(html, parser="html.parser") == cards
+    assert extrair_cards((PASTA_FIXTURES / "listagem_vazia.html").read_text(encoding="utf-8")) == []
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from src.pipeline import ErroEstagio, PipelineEstagios
+
+def _lento(segundos, funcao=lambda chave, valor: valor):
+    def estagio(chave, valor):
+        time.sleep(segundos)
+        return funcao(chave, valor)
+    return estagio
+
+def test_pipeline_sobrepoe_estagios_e_preserva_a_ordem():
+    """Valida o pipeline: estágios simultâneos (duração ~ estágio mais lento), ordem da fonte e contrapressão."""
+    produzidos = []
+
+    def fonte():
+        for i in range(1, 9):
+            time.sleep(0.05)
+            produzidos.append(i)
+            yield i, i
+
+    pipeline = PipelineEstagios(fonte(), [("dobro", _lento(0.05, lambda c, v: v * 2)),
+                                          ("texto", _lento(0.05, lambda c, v: str(v)))], capacidade=1)
+    inicio = time.monotonic()
+    resultados = []
+    for chave, valor in pipeline:
+        resultados.append((chave, valor))
+        # Fonte, dois estágios e três filas de 1 item: a fonte nunca se adianta mais que isso
+        assert len(produzidos) - chave <= 6
+
+    assert resultados == [(i, str(i * 2)) for i in range(1, 9)]
+    assert time.monotonic() - inicio < 0.8  # em sequência seriam 8 x 0,15 s = 1,2 s
+
+def test_pipeline_isola_falhas_por_estagio_e_item():
+    """Valida que a falha de um estágio em um item não derruba o pipeline nem passa pelos estágios seguintes."""
+    vistos = []
+
+    def dividir(chave, valor):
+        return 10 / valor
+
+    def registrar(chave, valor):
+        vistos.append(chave)
+        return valor
+
+    resultados = list(PipelineEstagios(iter([(1, 5), (2, 0), (3, 2)]), [("divisão", dividir), ("registro", registrar)]))
+
+    assert [chave for chave, _ in resultados] == [1, 2, 3]
+    assert isinstance(resultados[1][1], ErroEstagio) and resultados[1][1].estagio == "divisão"
+    assert [resultados[0][1], resultados[2][1]] == [2.0, 5.0]
+    assert vistos == [1, 3]
+
+def test_pipeline_relanca_erro_da_fonte_e_fecha_o_gerador():
+    """Valida que uma exceção da fonte chega ao consumidor e que interromper a iteração fecha a fonte."""
+    def fonte_quebrada():
+        yield 1, 1
+        raise RuntimeError("navegador caiu")
+
+    with pytest.raises(RuntimeError, match="navegador caiu"):
+        list(PipelineEstagios(fonte_quebrada(), [("eco", lambda c, v: v)]))
+
+    fechada = []
+
+    def fonte_infinita():
+        try:
+            i = 0
+            while True:
+                i += 1
+                yield i, i
+        finally:
+            fechada.append(True)
+
+    pipeline = PipelineEstagios(fonte_infinita(), [("eco", lambda c, v: v)])
+    for chave, _ in pipeline:
+        if chave == 3:
+            break
+    pipeline.fechar()
+    assert fechada == [True]
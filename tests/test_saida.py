@@ -0,0 +1,46 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.parsers import montar_objeto_produto
+from src.saida import EscritorParquet, achatar_produto
+
+def _produto(id_produto, titulo, preco, loja="Magazine Luiza", canal="VENDA_DIRETA", timestamp="2026-10-18 09:30:00"):
+    dados = {"id_produto": id_produto, "titulo": titulo, "preco_antigo": preco * 1.2, "preco_pix": preco,
+             "preco_atual": preco, "parcelamento_original": "10x de R$ 10,00 sem juros"}
+    contexto = {"timestamp": timestamp, "ambiente": "dev", "versao_pipeline": "v1.0", "tipo_coleta": "web_scraping",
+                "url_produto": f"https://www.magazinevoce.com.br/p/{id_produto}/", "canal_venda": canal, "loja": loja,
+                "pagina": 1}
+    return montar_objeto_produto(dados, contexto)
+
+def test_achatar_produto_cobre_todos_os_blocos():
+    """Valida que o Schema VIP vira uma linha plana com data de coleta derivada do timestamp."""
+    linha = achatar_produto(_produto("123", "Capa Capinha iPhone 15", 29.9, loja="Capinhas", canal="MARKETPLACE"))
+
+    assert linha["data_coleta"] == "2026-10-18"
+    assert linha["categoria"] == "Proteção"
+    assert linha["preco_base"] == 29.9
+    assert linha["parcelas_max"] == 10 and linha["sem_juros"] is True
+    assert linha["tipo_vendedor"] == "VENDEDOR_TERCEIRO" and linha["canal_venda"] == "MARKETPLACE"
+    assert linha["pagina_origem"] == 1
+
+def test_escritor_parquet_particiona_e_le_so_o_necessario(tmp_path):
+    """Valida o dataset particionado por data/categoria, com dicionário nas colunas repetidas e leitura podada."""
+    escritor = EscritorParquet(str(tmp_path / "bronze"), id_execucao="teste", linhas_por_lote=2)
+    escritor.adicionar([_produto("1", "Capa Capinha iPhone 15", 29.9), _produto("2", "Smartphone Samsung Galaxy A16", 1199.0)])
+    escritor.adicionar([_produto("3", "Película de Vidro iPhone 15", 19.9, timestamp="2026-10-19 09:30:00")])
+    escritor.fechar()
+
+    assert escritor.total == 3
+    particoes = sorted(p.relative_to(tmp_path / "bronze").parent.as_posix() for p in (tmp_path / "bronze").rglob("*.parquet"))
+    assert particoes == [
+        "data_coleta=2026-10-18/categoria=Prote%C3%A7%C3%A3o",
+        "data_coleta=2026-10-18/categoria=Smartphone",
+        "data_coleta=2026-10-19/categoria=Prote%C3%A7%C3%A3o",
+    ]
+
+    arquivo = next((tmp_path / "bronze").rglob("*.parquet"))
+    assert pa.types.is_dictionary(pq.read_schema(arquivo).field("vendedor_nome").type)
+
+    tabela = pq.read_table(tmp_path / "bronze", columns=["id_site", "preco_base"], filters=[("categoria", "=", "Proteção")])
+    assert sorted(tabela.column("id_site").to_pylist()) == ["1", "3"]
+    assert tabela.column_names == ["id_site", "preco_base"]